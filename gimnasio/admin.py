@@ -0,0 +1,135 @@
+"""
+Admin de los modelos del gimnasio, pensado para tablas de millones de filas.
+
+- Cada lista carga sus llaves foráneas con list_select_related: __str__ de
+  Membresia, Pago y RegistroEntrada muestra el cliente.
+- Sin COUNT(*) de la tabla completa: show_full_result_count=False y, sin
+  filtros, PaginadorEstimado con las estadísticas de la base de datos.
+- Llaves foráneas con autocompletado, en lugar de un <select> con toda la tabla.
+- Búsquedas por prefijo (^), que usan los índices de la migración 0007.
+- date_hierarchy solo sobre columnas con índice.
+- La sede de membresías, pagos y entradas es de solo lectura: save() la copia
+  del cliente.
+- Acciones en bloque con UPDATE de conjunto; update() no dispara señales, así
+  que las acciones invalidan ellas mismas las cachés y métricas.
+"""
+from django.contrib import admin, messages
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache_dashboard, cache_entradas
+from .models import Cliente, Membresia, MetricaDiaria, Pago, PerfilUsuario, RegistroEntrada, Sede
+from .paginacion import PaginadorEstimado
+
+# Clientes por UPDATE al sincronizar `activo` tras una acción (límite de parámetros de SQLite)
+LOTE_ACCION = 500
+
+
+class AdminGrande(admin.ModelAdmin):
+    """Opciones comunes a las listas de tablas grandes"""
+    show_full_result_count = False
+    paginator = PaginadorEstimado
+    list_per_page = 50
+
+
+def _invalidar_tras_accion(membresias=(), contraseñas=()):
+    """Lo que harían las señales de cada fila modificada, una sola vez para todo el bloque"""
+    for sede in membresias:
+        MetricaDiaria.objects.refrescar(timezone.localdate(), sede, campos=['membresias'])
+    MetricaDiaria.objects.actualizar_clientes_activos()
+    cache_entradas.invalidar(*contraseñas)
+    transaction.on_commit(cache_dashboard.invalidar)
+
+
+@admin.register(Cliente)
+class ClienteAdmin(AdminGrande):
+    list_display = ('nombre', 'apellidos', 'email', 'telefono', 'activo', 'fecha_registro')
+    list_filter = ('sede', 'activo')
+    search_fields = ('^nombre', '^apellidos', '^email', '^telefono', '=contraseña')
+    date_hierarchy = 'fecha_registro'
+    ordering = ('-fecha_registro',)
+    readonly_fields = ('contraseña',)
+    raw_id_fields = ('usuario',)
+    actions = ['reconciliar_activo']
+
+    @admin.action(description='Reconciliar "activo" con las membresías vigentes')
+    def reconciliar_activo(self, request, queryset):
+        with transaction.atomic():
+            modificados = queryset.sincronizar_activo()
+            if modificados:
+                _invalidar_tras_accion()
+        self.message_user(request, f'{modificados} clientes corregidos', messages.SUCCESS)
+
+
+@admin.register(Membresia)
+class MembresiaAdmin(AdminGrande):
+    list_display = ('cliente', 'tipo', 'fecha_inicio', 'fecha_fin', 'costo', 'pagado')
+    list_select_related = ('cliente',)
+    list_filter = ('sede', 'pagado', 'tipo')
+    search_fields = ('^cliente__nombre', '^cliente__apellidos', '^cliente__email')
+    autocomplete_fields = ('cliente',)
+    readonly_fields = ('sede',)
+    ordering = ('-pk',)
+    actions = ['marcar_pagadas']
+
+    def get_queryset(self, request):
+        # También para el autocompletado de Pago, que muestra str(membresía)
+        return super().get_queryset(request).select_related('cliente')
+
+    @admin.action(description='Marcar como pagadas')
+    def marcar_pagadas(self, request, queryset):
+        with transaction.atomic():
+            pendientes = queryset.filter(pagado=False)
+            clientes = dict(pendientes.values_list('cliente_id', 'cliente__contraseña').distinct())
+            sedes = set(pendientes.values_list('sede_id', flat=True).distinct())
+            marcadas = pendientes.update(pagado=True)
+            ids = list(clientes)
+            for inicio in range(0, len(ids), LOTE_ACCION):
+                Cliente.objects.filter(pk__in=ids[inicio:inicio + LOTE_ACCION]).sincronizar_activo()
+            if marcadas:
+                _invalidar_tras_accion(membresias=sedes, contraseñas=clientes.values())
+        self.message_user(request, f'{marcadas} membresías marcadas como pagadas', messages.SUCCESS)
+
+
+@admin.register(Pago)
+class PagoAdmin(AdminGrande):
+    list_display = ('membresia', 'monto', 'metodo', 'fecha_pago')
+    list_select_related = ('membresia__cliente',)
+    list_filter = ('sede', 'metodo')
+    search_fields = ('^membresia__cliente__nombre', '^membresia__cliente__apellidos', '^membresia__cliente__email')
+    autocomplete_fields = ('membresia',)
+    readonly_fields = ('sede',)
+    date_hierarchy = 'fecha_pago'
+    ordering = ('-fecha_pago',)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'membresia':
+            # Etiqueta de la membresía seleccionada sin consulta extra por su cliente
+            kwargs['queryset'] = Membresia.objects.select_related('cliente')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+@admin.register(RegistroEntrada)
+class RegistroEntradaAdmin(AdminGrande):
+    list_display = ('cliente', 'sede', 'fecha_entrada')
+    list_select_related = ('cliente', 'sede')
+    list_filter = ('sede',)
+    search_fields = ('^cliente__nombre', '^cliente__apellidos', '^cliente__email')
+    autocomplete_fields = ('cliente',)
+    readonly_fields = ('sede',)
+    date_hierarchy = 'fecha_entrada'
+
+
+@admin.register(Sede)
+class SedeAdmin(admin.ModelAdmin):
+    list_display = ('nombre',)
+    search_fields = ('nombre',)
+
+
+@admin.register(PerfilUsuario)
+class PerfilUsuarioAdmin(admin.ModelAdmin):
+    list_display = ('usuario', 'sede')
+    list_select_related = ('usuario', 'sede')
+    list_filter = ('sede',)
+    search_fields = ('^usuario__username',)
+    raw_id_fields = ('usuario',)
@@ -0,0 +1,129 @@
+"""
+Búsqueda paginada y widget de autocompletado para campos que apuntan a
+tablas grandes (clientes y membresías).
+
+Un <select> normal consulta y dibuja una opción por cada fila de la tabla en
+cada carga del formulario. El widget solo dibuja la opción seleccionada y
+Select2 pide el resto a un endpoint JSON mientras se escribe, así que el costo
+del formulario no depende del tamaño de la tabla.
+
+La búsqueda primero toma las coincidencias por prefijo (pueden usar los
+índices de la migración 0007) y, si no alcanzan para la página, completa con
+las que contienen el texto en cualquier posición, que sí recorren la tabla.
+"""
+from django import forms
+from django.db.models import Q
+from django.urls import reverse
+
+RESULTADOS_POR_PAGINA = 20
+
+# Campos de Cliente en los que se busca
+CAMPOS_BUSQUEDA = ('nombre', 'apellidos', 'email', 'telefono')
+
+
+def _coincidencias(texto, prefijo, lookup):
+    condicion = Q()
+    for campo in CAMPOS_BUSQUEDA:
+        condicion |= Q(**{f'{prefijo}{campo}__{lookup}': texto})
+    return condicion
+
+
+def buscar(queryset, texto, pagina=1, prefijo='', orden=('pk',), tamaño=RESULTADOS_POR_PAGINA):
+    """
+    Retorna (resultados, hay_mas) de la página `pagina` (desde 1) de `queryset`
+    filtrado por `texto` en los campos de cliente; `prefijo` es la ruta al
+    cliente desde el modelo del queryset (p. ej. 'cliente__'). Sin texto no
+    hay resultados: el widget exige al menos un carácter.
+    """
+    texto = texto.strip()
+    if not texto:
+        return [], False
+    pagina = max(pagina, 1)
+    desde, hasta = (pagina - 1) * tamaño, pagina * tamaño
+
+    por_prefijo = queryset.filter(_coincidencias(texto, prefijo, 'istartswith')).order_by(*orden)
+    # Una fila de más para saber si hay otra página sin contar todas las coincidencias
+    resultados = list(por_prefijo[desde:hasta + 1])
+    if len(resultados) > tamaño:
+        return resultados[:tamaño], True
+
+    # Las coincidencias por contenido siguen a las de prefijo: se descuentan de la posición
+    total_prefijo = desde + len(resultados) if resultados or not desde else por_prefijo.count()
+    por_contenido = queryset.filter(_coincidencias(texto, prefijo, 'icontains')).exclude(
+        _coincidencias(texto, prefijo, 'istartswith')
+    ).order_by(*orden)
+    inicio = max(desde - total_prefijo, 0)
+    faltan = tamaño - len(resultados)
+    resultados += list(por_contenido[inicio:inicio + faltan + 1])
+    if len(resultados) > tamaño:
+        return resultados[:tamaño], True
+    return resultados, False
+
+
+def etiqueta_cliente(cliente):
+    return f'{cliente.nombre} {cliente.apellidos} · {cliente.email}'
+
+
+def etiqueta_membresia(membresia):
+    pendiente = '' if membresia.pagado else ' · pendiente de pago'
+    return (
+        f'{membresia.cliente.nombre} {membresia.cliente.apellidos} · {membresia.get_tipo_display()} '
+        f'{membresia.fecha_inicio:%d/%m/%Y} a {membresia.fecha_fin:%d/%m/%Y}{pendiente}'
+    )
+
+
+def respuesta_json(resultados, hay_mas, etiqueta):
+    """Formato que espera Select2 con ajax"""
+    return {
+        'results': [{'id': objeto.pk, 'text': etiqueta(objeto)} for objeto in resultados],
+        'pagination': {'more': hay_mas},
+    }
+
+
+class SelectAutocompletar(forms.Select):
+    """
+    <select> que solo incluye la opción seleccionada; las demás las busca
+    static/js/autocompletar.js en la URL `url` (nombre de URL) con Select2.
+    `etiqueta` da el texto de la opción seleccionada, igual que el endpoint.
+    """
+
+    class Media:
+        css = {'all': (
+            'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/css/select2.min.css',
+            'https://cdn.jsdelivr.net/npm/select2-bootstrap-5-theme@1.3.0/dist/select2-bootstrap-5-theme.min.css',
+        )}
+        js = (
+            'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/select2.min.js',
+            'js/autocompletar.js',
+        )
+
+    def __init__(self, url, etiqueta=str, placeholder='Escriba para buscar...', attrs=None):
+        super().__init__(attrs)
+        self.url = url
+        self.etiqueta = etiqueta
+        self.placeholder = placeholder
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocompletar'] = reverse(self.url)
+        attrs['data-placeholder'] = self.placeholder
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Solo la opción vacía y la seleccionada, con una consulta por pk"""
+        seleccionados = [v for v in value if v not in ('', None)]
+        opciones = []
+        queryset = getattr(self.choices, 'queryset', None)
+        if seleccionados and queryset is not None:
+            campo = self.choices.field.to_field_name or 'pk'
+            try:
+                for objeto in queryset.filter(**{f'{campo}__in': seleccionados}):
+                    opciones.append(self.create_option(
+                        name, getattr(objeto, campo), self.etiqueta(objeto), True, len(opciones) + 1
+                    ))
+            except (TypeError, ValueError):
+                # Valor inválido enviado en el formulario: se muestra vacío y el campo reporta el error
+                pass
+        if not self.is_required or not opciones:
+            opciones.insert(0, self.create_option(name, '', '', not opciones, 0))
+        return [(None, opciones, 0)]
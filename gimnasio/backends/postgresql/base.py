@@ -0,0 +1,136 @@
+"""
+PostgreSQL con un pool de conexiones dentro de cada proceso.
+
+Se activa con settings_dict['POOL'] (DB_POOL_MAX > 0 en settings). Al cerrar la
+conexión de Django (fin de cada petición con CONN_MAX_AGE=0) la conexión de
+psycopg vuelve al pool en lugar de cerrarse; la siguiente petición de cualquier
+hilo la reutiliza sin nuevo handshake TCP/SSL. Sin POOL se comporta igual que
+el backend de Django. `manage.py verificar_pool` lo comprueba contra PostgreSQL.
+"""
+import os
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+
+class PoolConexiones:
+    """
+    Conexiones libres en pila (se reutiliza la más reciente) y un semáforo que
+    limita las conexiones en uso a `maximo`; si no hay cupo se espera `espera`
+    segundos. Las conexiones libres más viejas que `vida` segundos se cierran y
+    las que llevan más de `verificar` segundos sin uso se prueban antes de darlas.
+    Al devolverla, la conexión se restablece (ABORT y DISCARD ALL): nada de la
+    sesión anterior (transacción, SET, tablas temporales) pasa a la siguiente.
+    """
+
+    def __init__(self, maximo=10, espera=10, vida=600, verificar=30):
+        self._libres = []  # [(conexión, creada, devuelta)]
+        self._bloqueo = threading.Lock()
+        self._cupo = threading.BoundedSemaphore(maximo)
+        self.espera = espera
+        self.vida = vida
+        self.verificar = verificar
+
+    def tomar(self, conectar):
+        """Retorna (conexión, creada); `conectar` abre una nueva si no hay libres"""
+        if not self._cupo.acquire(timeout=self.espera):
+            raise base.Database.OperationalError(
+                f'Pool de conexiones agotado: sin conexión libre tras {self.espera}s'
+            )
+        try:
+            ahora = time.monotonic()
+            while True:
+                with self._bloqueo:
+                    if not self._libres:
+                        break
+                    conexion, creada, devuelta = self._libres.pop()
+                if ahora - creada > self.vida or not self._usable(conexion, ahora - devuelta):
+                    self._cerrar(conexion)
+                    continue
+                return conexion, creada
+            return conectar(), ahora
+        except BaseException:
+            self._cupo.release()
+            raise
+
+    def devolver(self, conexion, creada):
+        try:
+            if not conexion.closed and conexion.info.transaction_status != base.Database.extensions.TRANSACTION_STATUS_UNKNOWN:
+                conexion.reset()
+                with self._bloqueo:
+                    self._libres.append((conexion, creada, time.monotonic()))
+            else:
+                self._cerrar(conexion)
+        except base.Database.Error:
+            self._cerrar(conexion)
+        finally:
+            self._cupo.release()
+
+    def cerrar(self):
+        with self._bloqueo:
+            libres, self._libres = self._libres, []
+        for conexion, _, _ in libres:
+            self._cerrar(conexion)
+
+    def _usable(self, conexion, inactiva):
+        if conexion.closed:
+            return False
+        if inactiva < self.verificar:
+            return True
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except base.Database.Error:
+            return False
+
+    def _cerrar(self, conexion):
+        try:
+            conexion.close()
+        except base.Database.Error:
+            pass
+
+
+_pools = {}
+_bloqueo_pools = threading.Lock()
+
+
+def _pool(alias, configuracion):
+    # Por proceso: un worker de gunicorn nunca hereda conexiones del proceso padre
+    clave = (alias, os.getpid())
+    with _bloqueo_pools:
+        if clave not in _pools:
+            _pools[clave] = PoolConexiones(**configuracion)
+        return _pools[clave]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _creada = None
+
+    @property
+    def pool(self):
+        configuracion = self.settings_dict.get('POOL')
+        if not configuracion:
+            return None
+        return _pool(self.alias, configuracion)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        conexion, self._creada = pool.tomar(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # Lo que super() deja en el wrapper y en la conexión al abrir una nueva;
+        # reset() al devolverla la dejó con el aislamiento por defecto del servidor
+        opciones = self.settings_dict['OPTIONS']
+        self.isolation_level = base.IsolationLevel(opciones.get('isolation_level', base.IsolationLevel.READ_COMMITTED))
+        if 'isolation_level' in opciones:
+            conexion.isolation_level = self.isolation_level
+        return conexion
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.devolver(self.connection, self._creada)
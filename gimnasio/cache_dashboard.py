@@ -0,0 +1,54 @@
+"""
+Caché por bloques y por sede del dashboard.
+
+Cada bloque (métricas, próximas a vencer, vencidas) de cada sede se guarda por
+separado junto con la hora en que se calculó; el dashboard consolidado combina
+los de todas las sedes. `gimnasio.signals` borra solo los bloques que dependen
+del modelo modificado, en la sede de la fila; la vigencia corta
+(DASHBOARD_CACHE_TTL) cubre lo que no pasa por señales y, con una caché por
+proceso (LocMem), los demás workers. La clave incluye la fecha local, así que
+al cambiar de día todo se recalcula.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import sedes as sedes_gimnasio
+from .models import Cliente, Membresia, MetricaDiaria, Pago, RegistroEntrada
+
+PREFIJO = 'dashboard:'
+
+# Modelos de los que depende cada bloque
+DEPENDENCIAS = {
+    'metricas': (Cliente, Membresia, MetricaDiaria, Pago, RegistroEntrada),
+    'proximas_vencer': (Cliente, Membresia),
+    'membresias_vencidas': (Cliente, Membresia),
+}
+
+
+def _clave(bloque, sede, fecha=None):
+    return f'{PREFIJO}{bloque}:{sede}:{fecha or timezone.localdate()}'
+
+
+def obtener(bloque, calcular, sede):
+    """
+    Retorna (valor, calculado, acierto) del bloque de la sede; si no está en caché
+    lo calcula con `calcular()` y lo guarda
+    """
+    clave = _clave(bloque, sede)
+    guardado = cache.get(clave)
+    if guardado is not None:
+        return guardado['valor'], guardado['calculado'], True
+    guardado = {'valor': calcular(), 'calculado': timezone.now()}
+    cache.set(clave, guardado, getattr(settings, 'DASHBOARD_CACHE_TTL', 60))
+    return guardado['valor'], guardado['calculado'], False
+
+
+def invalidar(*bloques, sedes=None):
+    """Borra los bloques indicados (todos por defecto) de las sedes indicadas (todas por defecto)"""
+    sedes = sedes_gimnasio.ids() if sedes is None else sedes
+    cache.delete_many([_clave(bloque, sede) for bloque in (bloques or DEPENDENCIAS) for sede in sedes])
+
+
+def bloques_de(modelo):
+    return [bloque for bloque, modelos in DEPENDENCIAS.items() if modelo in modelos]
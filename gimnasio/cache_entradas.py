@@ -0,0 +1,78 @@
+"""
+Caché de credenciales para el registro de entradas.
+
+Relaciona la contraseña de entrada con el cliente y la ventana de su membresía
+activa. Se invalida con las señales de `gimnasio.signals` y la vigencia
+(ENTRADAS_CACHE_TTL) nunca pasa de la medianoche local.
+
+Con un acierto la entrada no lee la membresía: quedan el INSERT de la entrada,
+el UPDATE de la fila del día en MetricaDiaria y la lista de últimos registros.
+Las señales solo invalidan la caché del proceso que guardó el cambio; con la
+caché LocMem por defecto cada worker tiene la suya y un cambio de membresía tarda
+hasta ENTRADAS_CACHE_TTL (60 s por defecto) en verse en los demás. Con varios
+workers y una vigencia larga la caché debe ser compartida (CACHE_BACKEND).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .fechas import segundos_hasta_medianoche
+
+PREFIJO = 'entradas:credencial:'
+CLAVE_ACIERTOS = 'entradas:aciertos'
+CLAVE_FALLOS = 'entradas:fallos'
+
+
+def _clave(contraseña):
+    return f'{PREFIJO}{contraseña}'
+
+
+def _contar(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, 1, None)
+
+
+def obtener_acceso(contraseña, hoy=None):
+    """Retorna el acceso en caché si la membresía sigue vigente hoy, o None"""
+    if hoy is None:
+        hoy = timezone.localdate()
+    acceso = cache.get(_clave(contraseña))
+    if acceso and acceso['fecha_inicio'] <= hoy <= acceso['fecha_fin']:
+        _contar(CLAVE_ACIERTOS)
+        return acceso
+    _contar(CLAVE_FALLOS)
+    return None
+
+
+def guardar_acceso(contraseña, membresia):
+    """Guarda en caché el cliente y la ventana de su membresía activa"""
+    cliente = membresia.cliente
+    acceso = {
+        'cliente_id': cliente.pk,
+        'nombre': cliente.nombre,
+        'apellidos': cliente.apellidos,
+        'membresia_id': membresia.pk,
+        'tipo_membresia': membresia.get_tipo_display(),
+        'fecha_inicio': membresia.fecha_inicio,
+        'fecha_fin': membresia.fecha_fin,
+    }
+    ttl = min(settings.ENTRADAS_CACHE_TTL, segundos_hasta_medianoche())
+    cache.set(_clave(contraseña), acceso, ttl)
+    return acceso
+
+
+def invalidar(*contraseñas):
+    cache.delete_many([_clave(c) for c in contraseñas if c])
+
+
+def estadisticas():
+    aciertos = cache.get(CLAVE_ACIERTOS, 0)
+    fallos = cache.get(CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': round(aciertos / total, 4) if total else None,
+    }
@@ -0,0 +1,126 @@
+"""
+Consultas frecuentes de las vistas, como querysets sin evaluar.
+
+Las vistas (síncronas y async) las ejecutan y `manage.py verificar_indices`
+revisa su plan con EXPLAIN, así que el chequeo de índices cubre el mismo SQL
+que corre en producción. Las de las métricas del día están en
+`MetricaDiaria.objects.consultas_del_dia`, que usa `refrescar`.
+"""
+from datetime import timedelta
+
+from django.db.models import DateField, Exists, F, OuterRef, Q, Value
+
+from .fechas import inicio_del_dia, rango_dia
+from .models import Cliente, DiasEntre, Membresia, MetricaDiaria, RegistroEntrada
+
+# Campos por los que se puede ordenar la lista de clientes
+ORDEN_CLIENTES = {'nombre', 'apellidos', 'telefono', 'email', 'fecha_registro', 'activo'}
+
+
+# Clientes
+def buscar_clientes(busqueda, orden, sede):
+    """Clientes de la sede filtrados por nombre, apellidos, email o teléfono y ordenados en la base de datos"""
+    clientes = Cliente.objects.de_sede(sede)
+    if busqueda:
+        clientes = clientes.filter(
+            Q(nombre__icontains=busqueda) |
+            Q(apellidos__icontains=busqueda) |
+            Q(email__icontains=busqueda) |
+            Q(telefono__icontains=busqueda)
+        )
+    if orden.lstrip('-') not in ORDEN_CLIENTES:
+        orden = '-fecha_registro'
+    return clientes.order_by(orden, '-pk')
+
+
+def estado_clientes(ids):
+    """Estado de membresía de los clientes indicados (una página), sin orden"""
+    return Cliente.objects.con_estado_membresia().filter(pk__in=ids).order_by()
+
+
+def membresias_de_cliente(cliente):
+    return cliente.membresias.order_by('-fecha_inicio')
+
+
+def entradas_de_cliente(cliente):
+    """Últimas 10 entradas del cliente"""
+    return cliente.entradas.all()[:10]
+
+
+# Registro de entrada
+def membresia_activa(contraseña, hoy):
+    """Membresía activa más lejana de la contraseña (una sola consulta)"""
+    return Membresia.objects.activas(hoy).select_related('cliente').filter(
+        cliente__contraseña=contraseña
+    ).order_by('-fecha_fin')
+
+
+def cliente_por_contraseña(contraseña):
+    return Cliente.objects.filter(contraseña=contraseña)
+
+
+def ultima_membresia(cliente):
+    """Membresía más reciente del cliente, pagada o no, para explicar por qué no puede entrar"""
+    return Membresia.objects.filter(cliente=cliente).order_by('-fecha_fin')
+
+
+def ultimos_registros(sede):
+    """
+    Últimos 10 registros de la sede con el estado de membresía de cada entrada en una
+    sola consulta. Los ids salen primero de un índice de fecha_entrada (subconsulta) y
+    el join con el cliente y la anotación se hacen solo para esas 10 filas; unidos
+    directamente, sin sede, el planificador puede recorrer todos los clientes.
+    """
+    ids = RegistroEntrada.objects.de_sede(sede).order_by('-fecha_entrada').values('pk')[:10]
+    return RegistroEntrada.objects.filter(pk__in=ids).select_related('cliente').con_membresia_activa()
+
+
+# Historial de entradas
+def filtrar_entradas(sede, desde=None, hasta=None, cliente_id=None):
+    """Entradas de la sede entre dos fechas locales (inclusive) y de un cliente"""
+    entradas = RegistroEntrada.objects.de_sede(sede)
+    if desde:
+        entradas = entradas.filter(fecha_entrada__gte=inicio_del_dia(desde))
+    if hasta:
+        entradas = entradas.filter(fecha_entrada__lt=rango_dia(hasta)[1])
+    if cliente_id:
+        entradas = entradas.filter(cliente_id=cliente_id)
+    return entradas
+
+
+def historial_entradas(sede, desde=None, hasta=None, cliente_id=None):
+    return filtrar_entradas(sede, desde, hasta, cliente_id).select_related('cliente').con_ultima_membresia()
+
+
+# Dashboard
+def metricas_de_sede(sede, desde, hasta):
+    return MetricaDiaria.objects.filter(sede_id=sede, fecha__gte=desde, fecha__lte=hasta).order_by('fecha')
+
+
+def proximas_vencer(sede, hoy):
+    """Membresías pagadas de la sede que vencen en los próximos 7 días"""
+    return Membresia.objects.filter(
+        sede_id=sede,
+        fecha_fin__gte=hoy,
+        fecha_fin__lte=hoy + timedelta(days=7),
+        pagado=True
+    ).select_related('cliente').order_by('fecha_fin')
+
+
+def membresias_vencidas(sede, hoy):
+    """Membresías vencidas (último año) de la sede, de clientes SIN membresía activa"""
+    clientes_con_membresia_activa = Membresia.objects.filter(
+        cliente=OuterRef('cliente'),
+        fecha_fin__gte=hoy,
+        pagado=True
+    )
+    return Membresia.objects.filter(
+        sede_id=sede,
+        fecha_fin__lt=hoy,
+        fecha_fin__gte=hoy - timedelta(days=360),
+        pagado=True
+    ).exclude(
+        Exists(clientes_con_membresia_activa)
+    ).annotate(
+        dias_vencida=DiasEntre(Value(hoy, output_field=DateField()), F('fecha_fin'))
+    ).select_related('cliente').order_by('-fecha_fin')
@@ -0,0 +1,63 @@
+"""
+Asignación de contraseñas de entrada únicas.
+
+Cada contraseña es la imagen de un número de secuencia por una permutación con
+clave (red de Feistel sobre los números de CREDENCIAL_DIGITOS cifras). Números
+distintos dan contraseñas distintas, así que no hace falta consultar las
+existentes ni reintentar, y conocer una contraseña no permite adivinar la del
+cliente siguiente. El contador y la clave viven en la única fila de
+SecuenciaCredenciales: reservar 1 o 10 000 números cuesta un UPDATE y un SELECT.
+
+Cuando la secuencia supera la capacidad de CREDENCIAL_DIGITOS cifras, las
+siguientes contraseñas tienen dos cifras más. Las longitudes distintas nunca
+coinciden, y las contraseñas anteriores (año + teléfono) tienen 5 cifras, una
+longitud impar que esta permutación no produce. El índice único de
+Cliente.contraseña respalda la garantía ante contraseñas escritas a mano.
+"""
+import hashlib
+import hmac
+import secrets
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+RONDAS = 8
+
+
+def _digitos(numero):
+    """Cifras (siempre pares) de la contraseña del número `numero` de la secuencia"""
+    digitos = max(settings.CREDENCIAL_DIGITOS + settings.CREDENCIAL_DIGITOS % 2, 4)
+    while numero >= 10 ** digitos:
+        digitos += 2
+    return digitos
+
+
+def credencial(numero, clave):
+    """Contraseña del número `numero` de la secuencia: biyección sobre [0, 10^digitos)"""
+    digitos = _digitos(numero)
+    mitad = 10 ** (digitos // 2)
+    izquierda, derecha = divmod(numero, mitad)
+    for ronda in range(RONDAS):
+        resumen = hmac.new(clave, f'{digitos}:{ronda}:{derecha}'.encode(), hashlib.sha256).digest()
+        izquierda, derecha = derecha, (izquierda + int.from_bytes(resumen[:8], 'big')) % mitad
+    return f'{izquierda * mitad + derecha:0{digitos}d}'
+
+
+def asignar(cantidad=1, secuencia=None):
+    """
+    Reserva `cantidad` números de la secuencia y retorna sus contraseñas.
+    `secuencia` es el modelo SecuenciaCredenciales (el histórico en migraciones).
+    """
+    if secuencia is None:
+        secuencia = apps.get_model('gimnasio', 'SecuenciaCredenciales')
+    with transaction.atomic():
+        # El UPDATE bloquea la fila hasta el final de la transacción: rangos sin solaparse
+        if not secuencia.objects.filter(pk=1).update(siguiente=F('siguiente') + cantidad):
+            # Base de datos vaciada después de migrar (p. ej. flush)
+            secuencia.objects.get_or_create(pk=1, defaults={'clave': secrets.token_hex(32)})
+            secuencia.objects.filter(pk=1).update(siguiente=F('siguiente') + cantidad)
+        fila = secuencia.objects.get(pk=1)
+    clave = bytes.fromhex(fila.clave)
+    return [credencial(numero, clave) for numero in range(fila.siguiente - cantidad, fila.siguiente)]
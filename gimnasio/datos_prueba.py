@@ -0,0 +1,250 @@
+"""
+Utilidades para sembrar datos sintéticos.
+
+`sembrar_datos` y `base_de_datos_temporal` las usan los comandos de benchmark y
+de verificación de índices sobre una base de datos de prueba. `generar_gimnasio`
+produce un gimnasio realista (historial de membresías, pagos y años de entradas
+con horas pico) y es lo que ejecuta `manage.py generar_datos`.
+"""
+import io
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from . import cache_dashboard
+from .models import SEDE_PRINCIPAL, Cliente, Membresia, Pago, RegistroEntrada, Sede
+
+
+@contextmanager
+def base_de_datos_temporal(archivo=None):
+    """
+    Crea una base de datos de prueba, la usa dentro del bloque y la destruye al salir.
+    Con `archivo`, en SQLite se crea en ese archivo en vez de en memoria, para que
+    varios hilos compartan la base como en un servidor real. Las bases con
+    TEST['MIRROR'] = 'default' (la réplica) apuntan a la de prueba mientras tanto.
+    """
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    if archivo and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST'] = {**connection.settings_dict['TEST'], 'NAME': str(archivo)}
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    espejos = {
+        alias: connections[alias].settings_dict['NAME'] for alias in connections
+        if alias != DEFAULT_DB_ALIAS and connections[alias].settings_dict['TEST'].get('MIRROR') == DEFAULT_DB_ALIAS
+    }
+    for alias in espejos:
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        for alias, nombre in espejos.items():
+            connections[alias].close()
+            connections[alias].settings_dict['NAME'] = nombre
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+def sembrar_datos(total_clientes, total_entradas, lote=10000):
+    """
+    Inserta clientes con una membresía pagada vigente, su pago y entradas
+    repartidas en los últimos dos años. Retorna las contraseñas generadas.
+    """
+    hoy = timezone.localdate()
+    Cliente.objects.bulk_create(
+        [
+            Cliente(
+                nombre=f'Cliente{i}', apellidos='Prueba', telefono=f'{i:010d}',
+                email=f'cliente{i}@prueba.local', contraseña=f'B{i:07d}'
+            )
+            for i in range(total_clientes)
+        ],
+        batch_size=lote
+    )
+    ids = list(Cliente.objects.values_list('pk', flat=True))
+    Membresia.objects.bulk_create(
+        [
+            Membresia(
+                cliente_id=pk, sede_id=SEDE_PRINCIPAL, tipo='mensual', costo=500, pagado=True,
+                fecha_inicio=hoy - timedelta(days=10), fecha_fin=hoy + timedelta(days=20)
+            )
+            for pk in ids
+        ],
+        batch_size=lote
+    )
+    ahora = timezone.now()
+    Pago.objects.bulk_create(
+        [
+            Pago(
+                membresia_id=pk, sede_id=SEDE_PRINCIPAL, monto=500, metodo='efectivo',
+                fecha_pago=ahora - timedelta(days=10)
+            )
+            for pk in Membresia.objects.values_list('pk', flat=True)
+        ],
+        batch_size=lote
+    )
+
+    for inicio in range(0, total_entradas, lote):
+        RegistroEntrada.objects.bulk_create([
+            RegistroEntrada(
+                cliente_id=random.choice(ids), sede_id=SEDE_PRINCIPAL,
+                fecha_entrada=ahora - timedelta(minutes=random.randint(1, 2 * 365 * 24 * 60))
+            )
+            for _ in range(min(lote, total_entradas - inicio))
+        ])
+
+    # Estadísticas actualizadas para que el planificador use los índices
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    return [f'B{i:07d}' for i in range(total_clientes)]
+
+
+NOMBRES = [
+    'Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Miguel', 'Sofía', 'Diego',
+    'Fernanda', 'Carlos', 'Valeria', 'Ricardo', 'Daniela', 'Alejandro', 'Paola', 'Eduardo',
+]
+APELLIDOS = [
+    'García', 'Hernández', 'López', 'Martínez', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+    'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Reyes', 'Jiménez', 'Torres',
+]
+# tipo: (peso al elegir, días de vigencia como en MembresiaForm, costo)
+PLANES = {
+    'mensual': (60, 30, Decimal('500')),
+    'semanal': (15, 7, Decimal('150')),
+    'visita': (15, 0, Decimal('50')),
+    'anual': (10, 365, Decimal('5000')),
+}
+METODOS = [('efectivo', 55), ('tarjeta', 35), ('transferencia', 10)]
+# Horas de entrada: pico matutino, mediodía y pico vespertino (media, desviación, peso)
+HORARIOS = [(7, 1.0, 40), (13, 1.5, 15), (19, 1.5, 45)]
+PROBABILIDAD_RENOVAR = 0.85
+
+
+def _crear(modelo, objetos, lote):
+    """bulk_create que deja las pk asignadas también en backends que no las retornan"""
+    creados = modelo.objects.bulk_create(objetos, batch_size=lote)
+    if creados and creados[0].pk is None:
+        pks = modelo.objects.order_by('-pk').values_list('pk', flat=True)[:len(creados)]
+        for objeto, pk in zip(creados, reversed(pks)):
+            objeto.pk = pk
+    return creados
+
+
+def _momento(rng, dia, zona):
+    media, desviacion, _ = rng.choices(HORARIOS, weights=[peso for *_, peso in HORARIOS])[0]
+    minutos = int(rng.gauss(media, desviacion) * 60)
+    while not 5 * 60 <= minutos < 23 * 60:  # horario del gimnasio
+        minutos = int(rng.gauss(media, desviacion) * 60)
+    return datetime.combine(dia, time(minutos // 60, minutos % 60), tzinfo=zona)
+
+
+def _historial(rng, registro, hoy):
+    """Membresías encadenadas desde el registro hasta que el cliente deja de renovar"""
+    inicio = registro
+    tipos = list(PLANES)
+    pesos = [peso for peso, _, _ in PLANES.values()]
+    while inicio <= hoy:
+        tipo = rng.choices(tipos, weights=pesos)[0]
+        _, dias, costo = PLANES[tipo]
+        fin = inicio + timedelta(days=dias)
+        yield tipo, inicio, fin, costo
+        if rng.random() > PROBABILIDAD_RENOVAR:
+            return
+        inicio = fin + timedelta(days=rng.choice([1, 1, 1, 2, 3, 7, 15, 30]))
+
+
+def _sedes(cantidad):
+    """Ids de las primeras `cantidad` sedes; crea las que falten"""
+    ids = list(Sede.objects.order_by('pk').values_list('pk', flat=True)[:cantidad])
+    for numero in range(len(ids) + 1, cantidad + 1):
+        ids.append(Sede.objects.get_or_create(nombre=f'Sede {numero}')[0].pk)
+    return ids
+
+
+def generar_gimnasio(total_clientes, años=2, semilla=0, lote=5000, sedes=1):
+    """
+    Genera clientes registrados a lo largo de `años`, cada uno con su historial de
+    membresías (los cuatro tipos), un pago por membresía pagada y entradas con
+    horas pico según su frecuencia de asistencia. Los clientes se reparten entre
+    `sedes` sedes (se crean si faltan) y todo lo suyo queda en su sede. Los datos
+    se insertan por lotes de `lote` clientes; al final se sincroniza `activo`, se
+    reconstruyen las métricas diarias y se invalida la caché del dashboard. Con la
+    misma semilla el resultado es el mismo. Retorna un dict con lo creado.
+    """
+    rng = random.Random(semilla)
+    zona = timezone.get_current_timezone()
+    ahora = timezone.now()
+    hoy = timezone.localdate(ahora)
+    primer_dia = hoy - timedelta(days=int(365 * años))
+    dias_totales = (hoy - primer_dia).days
+    primer_pk = None
+    creados = {'clientes': 0, 'membresias': 0, 'pagos': 0, 'entradas': 0}
+    base = Cliente.objects.count()
+    ids_sedes = _sedes(sedes)
+
+    for desde in range(0, total_clientes, lote):
+        clientes = []
+        for i in range(base + desde, base + min(desde + lote, total_clientes)):
+            # Más altas recientes que antiguas
+            dia = primer_dia + timedelta(days=int(dias_totales * rng.random() ** 0.7))
+            clientes.append(Cliente(
+                nombre=rng.choice(NOMBRES), apellidos=f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}',
+                telefono=f'55{i:08d}', email=f'cliente{i}@gimnasio.local', contraseña=f'G{i:07d}',
+                fecha_registro=_momento(rng, dia, zona), sede_id=ids_sedes[i % len(ids_sedes)],
+            ))
+        _crear(Cliente, clientes, lote)
+        primer_pk = primer_pk or clientes[0].pk
+
+        membresias, frecuencias = [], []
+        for cliente in clientes:
+            frecuencia = rng.uniform(0.5, 5) / 7  # visitas por día de membresía
+            for tipo, inicio, fin, costo in _historial(rng, timezone.localdate(cliente.fecha_registro), hoy):
+                membresias.append(Membresia(
+                    cliente=cliente, sede_id=cliente.sede_id, tipo=tipo, fecha_inicio=inicio, fecha_fin=fin, costo=costo,
+                    # La última renovación a veces sigue pendiente de pago
+                    pagado=fin < hoy or rng.random() < 0.9,
+                ))
+                frecuencias.append(frecuencia)
+        _crear(Membresia, membresias, lote)
+
+        pagos, entradas = [], []
+        metodos = [metodo for metodo, _ in METODOS]
+        pesos_metodos = [peso for _, peso in METODOS]
+        for membresia, frecuencia in zip(membresias, frecuencias):
+            if membresia.pagado:
+                pagos.append(Pago(
+                    membresia=membresia, sede_id=membresia.sede_id, monto=membresia.costo,
+                    metodo=rng.choices(metodos, weights=pesos_metodos)[0],
+                    fecha_pago=min(_momento(rng, membresia.fecha_inicio, zona), ahora),
+                ))
+            dias = (min(membresia.fecha_fin, hoy) - membresia.fecha_inicio).days + 1
+            visitas = 1 if membresia.tipo == 'visita' else int(dias * frecuencia + rng.random())
+            for _ in range(visitas):
+                momento = _momento(rng, membresia.fecha_inicio + timedelta(days=rng.randrange(dias)), zona)
+                if momento <= ahora:
+                    entradas.append(RegistroEntrada(
+                        cliente_id=membresia.cliente_id, sede_id=membresia.sede_id, fecha_entrada=momento
+                    ))
+        Pago.objects.bulk_create(pagos, batch_size=lote)
+        RegistroEntrada.objects.bulk_create(entradas, batch_size=lote)
+
+        creados['clientes'] += len(clientes)
+        creados['membresias'] += len(membresias)
+        creados['pagos'] += len(pagos)
+        creados['entradas'] += len(entradas)
+
+    if primer_pk is not None:
+        # bulk_create no dispara señales: estado activo, métricas y caché del dashboard
+        Cliente.objects.filter(pk__gte=primer_pk).sincronizar_activo(hoy)
+        call_command('reconstruir_metricas', desde=str(primer_dia), stdout=io.StringIO())
+        cache_dashboard.invalidar()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    return creados
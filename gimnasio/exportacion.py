@@ -0,0 +1,168 @@
+"""
+Exportaciones a Excel/CSV con memoria acotada.
+
+Las filas se leen con `.iterator()` y se escriben una a una en un archivo (el
+temporal de `gimnasio.trabajos`): en CSV línea por línea y en Excel con un libro
+openpyxl de solo escritura, así el consumo no depende del número de filas.
+openpyxl se importa solo al exportar a Excel para no cargarlo en cada worker.
+"""
+import csv
+import io
+from itertools import chain
+
+from django.utils import timezone
+
+from .fechas import inicio_del_dia, rango_dia
+from .models import Cliente, Membresia, Pago, RegistroEntrada
+
+TAMAÑO_LOTE = 2000
+
+# Por cada exportación: modelo, campo para el filtro de fechas y columnas (encabezado, campo)
+EXPORTACIONES = {
+    'clientes': {
+        'modelo': Cliente,
+        'titulo': 'Clientes',
+        'campo_fecha': 'fecha_registro',
+        'columnas': [
+            ('Nombre', 'nombre'),
+            ('Apellidos', 'apellidos'),
+            ('Teléfono', 'telefono'),
+            ('Email', 'email'),
+            ('Fecha de registro', 'fecha_registro'),
+            ('Activo', 'activo'),
+        ],
+    },
+    'membresias': {
+        'modelo': Membresia,
+        'titulo': 'Membresías',
+        'campo_fecha': 'fecha_inicio',
+        'columnas': [
+            ('Cliente', 'cliente__nombre'),
+            ('Apellidos', 'cliente__apellidos'),
+            ('Tipo', 'tipo'),
+            ('Fecha inicio', 'fecha_inicio'),
+            ('Fecha fin', 'fecha_fin'),
+            ('Costo', 'costo'),
+            ('Pagado', 'pagado'),
+        ],
+    },
+    'pagos': {
+        'modelo': Pago,
+        'titulo': 'Pagos',
+        'campo_fecha': 'fecha_pago',
+        'columnas': [
+            ('Cliente', 'membresia__cliente__nombre'),
+            ('Apellidos', 'membresia__cliente__apellidos'),
+            ('Membresía', 'membresia__tipo'),
+            ('Fecha de pago', 'fecha_pago'),
+            ('Monto', 'monto'),
+            ('Método', 'metodo'),
+        ],
+    },
+    'entradas': {
+        'modelo': RegistroEntrada,
+        'titulo': 'Entradas',
+        'campo_fecha': 'fecha_entrada',
+        'columnas': [
+            ('Cliente', 'cliente__nombre'),
+            ('Apellidos', 'cliente__apellidos'),
+            ('Email', 'cliente__email'),
+            ('Fecha de entrada', 'fecha_entrada'),
+        ],
+    },
+}
+
+
+class EcoCSV:
+    """Pseudo-buffer para csv.writer: retorna la línea en lugar de guardarla"""
+    def write(self, valor):
+        return valor
+
+
+def filtrar(nombre, desde=None, hasta=None, sede=None):
+    """Queryset de la exportación de la sede (None = todas) con el rango de fechas [desde, hasta] (ambos incluidos)"""
+    exportacion = EXPORTACIONES[nombre]
+    modelo = exportacion['modelo']
+    campo = exportacion['campo_fecha']
+    queryset = modelo.objects.de_sede(sede)
+
+    if modelo._meta.get_field(campo).get_internal_type() == 'DateTimeField':
+        # Límites locales semiabiertos para usar el índice de la columna
+        if desde:
+            queryset = queryset.filter(**{f'{campo}__gte': inicio_del_dia(desde)})
+        if hasta:
+            queryset = queryset.filter(**{f'{campo}__lt': rango_dia(hasta)[1]})
+    else:
+        if desde:
+            queryset = queryset.filter(**{f'{campo}__gte': desde})
+        if hasta:
+            queryset = queryset.filter(**{f'{campo}__lte': hasta})
+    return queryset.order_by('pk')
+
+
+def encabezados(nombre):
+    return [encabezado for encabezado, _ in EXPORTACIONES[nombre]['columnas']]
+
+
+def _convertidores(modelo, campos):
+    """Por columna: etiqueta de choices o datetime local sin zona (Excel no admite zona)"""
+    convertidores = []
+    for campo in campos:
+        *relaciones, atributo = campo.split('__')
+        opciones = modelo
+        for relacion in relaciones:
+            opciones = opciones._meta.get_field(relacion).related_model
+        field = opciones._meta.get_field(atributo)
+        if field.choices:
+            etiquetas = dict(field.choices)
+            convertidores.append(lambda valor, etiquetas=etiquetas: etiquetas.get(valor, valor))
+        elif field.get_internal_type() == 'DateTimeField':
+            convertidores.append(
+                lambda valor: timezone.localtime(valor).replace(tzinfo=None) if valor else valor
+            )
+        else:
+            convertidores.append(None)
+    return convertidores
+
+
+def filas(nombre, desde=None, hasta=None, sede=None):
+    """Genera las filas de la exportación leyendo la base de datos por lotes"""
+    exportacion = EXPORTACIONES[nombre]
+    campos = [campo for _, campo in exportacion['columnas']]
+    convertidores = _convertidores(exportacion['modelo'], campos)
+
+    valores = filtrar(nombre, desde, hasta, sede).values_list(*campos).iterator(chunk_size=TAMAÑO_LOTE)
+    for fila in valores:
+        yield [
+            convertir(valor) if convertir else valor
+            for convertir, valor in zip(convertidores, fila)
+        ]
+
+
+def escribir_excel(nombre, filas_exportacion, destino):
+    """Escribe las filas en un libro de solo escritura sobre `destino` (archivo abierto)"""
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(EXPORTACIONES[nombre]['titulo'])
+    hoja.append(encabezados(nombre))
+    for fila in filas_exportacion:
+        hoja.append(fila)
+    libro.save(destino)
+
+
+def lineas_csv(nombre, filas_exportacion):
+    escritor = csv.writer(EcoCSV())
+    return (escritor.writerow(fila) for fila in chain([encabezados(nombre)], filas_exportacion))
+
+
+def escribir(nombre, formato, filas_exportacion, destino):
+    """Escribe las filas en `destino` (archivo binario abierto) como 'csv' o 'xlsx'"""
+    if formato == 'csv':
+        texto = io.TextIOWrapper(destino, encoding='utf-8', newline='')
+        texto.writelines(lineas_csv(nombre, filas_exportacion))
+        texto.flush()
+        # Sin cerrar `destino`, que sigue siendo de quien llama
+        texto.detach()
+    else:
+        escribir_excel(nombre, filas_exportacion, destino)
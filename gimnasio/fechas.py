@@ -0,0 +1,47 @@
+"""
+Rangos de fechas con zona horaria para filtrar columnas DateTimeField.
+
+Convierte un día o un mes local (TIME_ZONE) en límites semiabiertos
+[inicio, fin) de datetimes con zona, de modo que los filtros comparen la
+columna directamente y puedan usar sus índices (a diferencia de
+`__date`, `__month` o `__year`, que envuelven la columna en una función).
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def inicio_del_dia(fecha):
+    """Medianoche local de la fecha como datetime con zona"""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def rango_dias(desde, hasta):
+    """Rango [desde 00:00, día siguiente a hasta 00:00) en hora local"""
+    return inicio_del_dia(desde), inicio_del_dia(hasta + timedelta(days=1))
+
+
+def rango_dia(fecha):
+    return rango_dias(fecha, fecha)
+
+
+def rango_mes(fecha):
+    """Rango [día 1 del mes, día 1 del mes siguiente) en hora local"""
+    primero = fecha.replace(day=1)
+    siguiente = (primero + timedelta(days=32)).replace(day=1)
+    return inicio_del_dia(primero), inicio_del_dia(siguiente)
+
+
+def segundos_hasta_medianoche():
+    """Segundos que faltan para la siguiente medianoche local (al menos 1)"""
+    ahora = timezone.localtime()
+    medianoche = inicio_del_dia(ahora.date() + timedelta(days=1))
+    return max(int((medianoche - ahora).total_seconds()), 1)
+
+
+def parse_fecha(valor):
+    """Convierte 'AAAA-MM-DD' en date; retorna None si está vacío o es inválido"""
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
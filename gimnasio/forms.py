@@ -1,6 +1,15 @@
 from django import forms
-from .models import Cliente, Membresia, Pago, RegistroEntrada
-from datetime import datetime, timedelta
+from . import sedes
+from .autocompletar import SelectAutocompletar, etiqueta_cliente, etiqueta_membresia
+from .models import Cliente, Membresia, Pago, RegistroEntrada, Sede
+from datetime import timedelta
+
+
+def _opciones_sede(campo, sede=None):
+    """Opciones del campo de sede desde la lista en caché, sin consultar la tabla"""
+    vacia = [] if campo.empty_label is None else [('', campo.empty_label)]
+    campo.choices = vacia + [(s.pk, s.nombre) for s in sedes.listar() if sede is None or s.pk == sede]
+
 
 class ClienteForm(forms.ModelForm):
     # Campo opcional para mostrar la contraseña generada (solo lectura)
@@ -16,8 +25,9 @@ class ClienteForm(forms.ModelForm):
     
     class Meta:
         model = Cliente
-        fields = ['nombre', 'apellidos', 'telefono', 'email', 'activo', 'contraseña_generada']
+        fields = ['sede', 'nombre', 'apellidos', 'telefono', 'email', 'activo', 'contraseña_generada']
         widgets = {
+            'sede': forms.Select(attrs={'class': 'form-control'}),
             'nombre': forms.TextInput(attrs={'class': 'form-control'}),
             'apellidos': forms.TextInput(attrs={'class': 'form-control'}),
             'telefono': forms.TextInput(attrs={'class': 'form-control'}),
@@ -25,45 +35,37 @@ class ClienteForm(forms.ModelForm):
             'activo': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, sede=None, **kwargs):
         super().__init__(*args, **kwargs)
+        if sede is not None:
+            # Personal de una sede (o sede elegida): el cliente queda en ella
+            del self.fields['sede']
+            if not self.instance.pk:
+                self.instance.sede_id = sede
+        else:
+            _opciones_sede(self.fields['sede'])
         # Si estamos editando un cliente existente, mostrar su contraseña actual
+        # (la de un cliente nuevo la asigna Cliente.save al guardarlo)
         if self.instance and self.instance.pk and self.instance.contraseña:
             self.fields['contraseña_generada'].initial = self.instance.contraseña
-        elif self.instance and not self.instance.pk:
-            # Para clientes nuevos, generar una contraseña de ejemplo
-            self.fields['contraseña_generada'].initial = self._generar_contraseña_ejemplo()
-    
-    def _generar_contraseña_ejemplo(self):
-        """Genera un ejemplo de contraseña basado en el año actual"""
-        año_actual = datetime.now().year
-        ultimos_2_año = str(año_actual)[-2:]
-        return f"{ultimos_2_año}123"  # Ejemplo con 123 como últimos dígitos
-    
-    def save(self, commit=True):
-        cliente = super().save(commit=False)
-        
-        # Si es un cliente nuevo, generar contraseña automáticamente
-        if not cliente.pk:
-            cliente.generar_contraseña()
-        # Si se modificó el teléfono, regenerar contraseña
-        elif 'telefono' in self.changed_data:
-            cliente.generar_contraseña()
-        
-        if commit:
-            cliente.save()
-        return cliente
 
 class MembresiaForm(forms.ModelForm):
     class Meta:
         model = Membresia
         fields = ['cliente', 'tipo', 'fecha_inicio', 'costo']
         widgets = {
-            'cliente': forms.Select(attrs={'class': 'form-control'}),
+            # Búsqueda en el servidor en lugar de una opción por cliente
+            'cliente': SelectAutocompletar('buscar_clientes', etiqueta_cliente, 'Buscar cliente por nombre, email o teléfono'),
             'tipo': forms.Select(attrs={'class': 'form-control'}),
             'fecha_inicio': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'costo': forms.NumberInput(attrs={'class': 'form-control'}),
         }
+
+    def __init__(self, *args, sede=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'cliente' in self.fields:
+            # Solo clientes de la sede; la membresía toma la sede del cliente
+            self.fields['cliente'].queryset = Cliente.objects.de_sede(sede)
     
     def clean(self):
         cleaned_data = super().clean()
@@ -98,11 +100,29 @@ class PagoForm(forms.ModelForm):
         model = Pago
         fields = ['membresia', 'monto', 'metodo', 'comprobante']
         widgets = {
-            'membresia': forms.Select(attrs={'class': 'form-control'}),
+            # Búsqueda en el servidor en lugar de una opción por membresía
+            'membresia': SelectAutocompletar('buscar_membresias', etiqueta_membresia, 'Buscar membresía por cliente'),
             'monto': forms.NumberInput(attrs={'class': 'form-control'}),
             'metodo': forms.Select(attrs={'class': 'form-control'}),
             'comprobante': forms.FileInput(attrs={'class': 'form-control'}),
         }
+    
+    def __init__(self, *args, sede=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Solo membresías de la sede; el cliente se usa al mostrar la opción seleccionada y en las señales del pago
+        self.fields['membresia'].queryset = Membresia.objects.de_sede(sede).select_related('cliente')
+
+class FiltroEntradasForm(forms.Form):
+    """Filtro por cliente del historial de entradas (las fechas se leen directo de GET)"""
+    cliente = forms.ModelChoiceField(
+        queryset=Cliente.objects.all(),
+        required=False,
+        widget=SelectAutocompletar('buscar_clientes', etiqueta_cliente, 'Todos', attrs={'id': 'cliente'}),
+    )
+
+    def __init__(self, *args, sede=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['cliente'].queryset = Cliente.objects.de_sede(sede)
 
 class RegistroEntradaForm(forms.Form):
     contraseña = forms.CharField(
@@ -121,4 +141,35 @@ class RegistroEntradaForm(forms.Form):
             cliente = Cliente.objects.get(contraseña=contraseña)
             return cliente
         except Cliente.DoesNotExist:
-            raise forms.ValidationError('No existe un cliente con esa contraseña')
\ No newline at end of file
+            raise forms.ValidationError('No existe un cliente con esa contraseña')
+class ImportacionClientesForm(forms.Form):
+    sede = forms.ModelChoiceField(
+        queryset=Sede.objects.all(),
+        label='Sede',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        help_text='Sede de los clientes importados'
+    )
+    archivo = forms.FileField(
+        label='Archivo',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.xlsx,.csv'}),
+        help_text='Excel (.xlsx) o CSV con encabezados en la primera fila'
+    )
+    simular = forms.BooleanField(
+        label='Solo validar (no guardar)',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    
+    def __init__(self, *args, sede=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if sede is not None:
+            # Personal de una sede (o sede elegida): sin elegir otra
+            self.fields['sede'].initial = sede
+            self.fields['sede'].disabled = True
+        _opciones_sede(self.fields['sede'], sede)
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(('.xlsx', '.csv')):
+            raise forms.ValidationError('El archivo debe ser .xlsx o .csv')
+        return archivo
@@ -0,0 +1,237 @@
+"""
+Importación masiva de clientes y membresías desde Excel/CSV.
+
+Cada fila describe un cliente y, opcionalmente, una membresía; las filas que
+repiten el email de un cliente del mismo archivo solo agregan membresías. Los
+datos se validan con las reglas de ClienteForm/MembresiaForm (incluida la
+fecha_fin según el tipo), se insertan con bulk_create por lotes, cada lote en
+su transacción, y `activo` y las métricas se recalculan una sola vez al final.
+Las membresías se consideran pagadas salvo que la columna `pagado` diga "no".
+Todos los clientes del archivo quedan en la sede indicada.
+"""
+import csv
+import io
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache_dashboard, cache_entradas, credenciales
+from .forms import ClienteForm, MembresiaForm
+from .models import SEDE_PRINCIPAL, Cliente, Membresia
+
+TAMAÑO_LOTE = 1000
+
+COLUMNAS = [
+    'nombre', 'apellidos', 'telefono', 'email', 'fecha_registro',
+    'tipo', 'fecha_inicio', 'costo', 'pagado',
+]
+
+VALORES_FALSOS = {'0', 'no', 'false', 'falso', 'n'}
+
+
+class ClienteImportacionForm(ClienteForm):
+    """ClienteForm sin la consulta de email único por fila: se verifica por lote"""
+    def validate_unique(self):
+        pass
+
+
+class MembresiaImportacionForm(MembresiaForm):
+    """MembresiaForm sin el cliente, que todavía no existe al validar la fila"""
+    class Meta(MembresiaForm.Meta):
+        fields = ['tipo', 'fecha_inicio', 'costo']
+
+
+@dataclass
+class ResultadoImportacion:
+    clientes: int = 0
+    membresias: int = 0
+    filas: int = 0
+    errores: list = field(default_factory=list)
+
+    def agregar_error(self, numero, mensaje):
+        self.errores.append((numero, mensaje))
+
+
+def _normalizar(encabezado):
+    """'Teléfono ' -> 'telefono'"""
+    texto = unicodedata.normalize('NFKD', str(encabezado or '')).encode('ascii', 'ignore').decode()
+    return texto.strip().lower().replace(' ', '_')
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, float) and valor.is_integer():
+        # Excel guarda teléfonos y costos enteros como float
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def leer_filas(archivo, nombre):
+    """Genera (número de fila, dict) leyendo el archivo en streaming (xlsx o csv)"""
+    if nombre.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezados = [_normalizar(celda) for celda in next(filas, [])]
+            for numero, fila in enumerate(filas, start=2):
+                if any(celda not in (None, '') for celda in fila):
+                    yield numero, {c: _texto(v) for c, v in zip(encabezados, fila) if c}
+        finally:
+            libro.close()
+    else:
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+        lector = csv.reader(texto)
+        encabezados = [_normalizar(celda) for celda in next(lector, [])]
+        for numero, fila in enumerate(lector, start=2):
+            if any(celda.strip() for celda in fila):
+                yield numero, {c: v.strip() for c, v in zip(encabezados, fila) if c}
+
+
+def _errores_form(form):
+    return '; '.join(
+        f'{campo}: {" ".join(mensajes)}' if campo != '__all__' else ' '.join(mensajes)
+        for campo, mensajes in form.errors.items()
+    )
+
+
+class ImportadorClientes:
+    def __init__(self, lote=TAMAÑO_LOTE, simular=False, sede=SEDE_PRINCIPAL):
+        self.lote = lote
+        self.simular = simular
+        self.sede = sede
+        self.resultado = ResultadoImportacion()
+        # email -> pk (o el Cliente aún sin guardar del lote en curso)
+        self._clientes = {}
+        self._primer_pk = None
+        self._primer_registro = None
+
+    def importar(self, filas):
+        pendientes = []
+        for numero, datos in filas:
+            self.resultado.filas += 1
+            pendientes.append((numero, datos))
+            if len(pendientes) >= self.lote:
+                self._procesar_lote(pendientes)
+                pendientes = []
+        if pendientes:
+            self._procesar_lote(pendientes)
+
+        if not self.simular and self._primer_pk is not None:
+            self._finalizar()
+        return self.resultado
+
+    def _validar(self, numero, datos):
+        """Retorna (Cliente o None, Membresia o None); registra los errores de la fila"""
+        email = datos.get('email', '')
+        cliente = None
+        if email not in self._clientes:
+            form = ClienteImportacionForm(data={**datos, 'activo': 'on'}, sede=self.sede)
+            if not form.is_valid():
+                self.resultado.agregar_error(numero, _errores_form(form))
+                return None, None
+            # La contraseña se asigna por lote al guardar
+            cliente = form.save(commit=False)
+            fecha_registro = datos.get('fecha_registro')
+            if fecha_registro:
+                try:
+                    cliente.fecha_registro = timezone.make_aware(
+                        datetime.combine(date.fromisoformat(fecha_registro[:10]), datetime.min.time())
+                    )
+                except ValueError:
+                    self.resultado.agregar_error(numero, f'fecha_registro: fecha inválida "{fecha_registro}"')
+                    return None, None
+        elif not datos.get('tipo'):
+            self.resultado.agregar_error(numero, f'email: {email} está repetido en el archivo')
+            return None, None
+
+        membresia = None
+        if datos.get('tipo'):
+            form = MembresiaImportacionForm(data=datos)
+            if not form.is_valid():
+                self.resultado.agregar_error(numero, _errores_form(form))
+                return None, None
+            membresia = form.save(commit=False)
+            membresia.sede_id = self.sede
+            membresia.pagado = datos.get('pagado', '').lower() not in VALORES_FALSOS
+        return cliente, membresia
+
+    def _procesar_lote(self, filas):
+        validas = []
+        for numero, datos in filas:
+            cliente, membresia = self._validar(numero, datos)
+            if cliente is not None or membresia is not None:
+                validas.append((numero, datos.get('email', ''), cliente, membresia))
+
+        # Emails que ya existen en la base de datos: una consulta por lote
+        nuevos = {email for _, email, cliente, _ in validas if cliente is not None}
+        existentes = set(
+            Cliente.objects.filter(email__in=nuevos).values_list('email', flat=True)
+        ) if nuevos else set()
+
+        clientes = []
+        membresias = []
+        for numero, email, cliente, membresia in validas:
+            if cliente is not None:
+                if email in existentes:
+                    self.resultado.agregar_error(numero, f'email: ya existe un cliente con {email}')
+                    continue
+                if email in self._clientes:
+                    # Segunda fila nueva con el mismo email dentro del lote
+                    if membresia is None:
+                        self.resultado.agregar_error(numero, f'email: {email} está repetido en el archivo')
+                        continue
+                    cliente = None
+                else:
+                    self._clientes[email] = cliente
+                    clientes.append(cliente)
+            if membresia is not None:
+                membresias.append((email, membresia))
+
+        if self.simular:
+            self.resultado.clientes += len(clientes)
+            self.resultado.membresias += len(membresias)
+            return
+
+        with transaction.atomic():
+            # bulk_create no llama a Cliente.save: un rango de contraseñas para todo el lote
+            for cliente, contraseña in zip(clientes, credenciales.asignar(len(clientes))):
+                cliente.contraseña = contraseña
+            Cliente.objects.bulk_create(clientes, batch_size=self.lote)
+            for email, membresia in membresias:
+                cliente = self._clientes[email]
+                membresia.cliente_id = cliente if isinstance(cliente, int) else cliente.pk
+            Membresia.objects.bulk_create([m for _, m in membresias], batch_size=self.lote)
+
+        for cliente in clientes:
+            self._clientes[cliente.email] = cliente.pk
+            if self._primer_pk is None or cliente.pk < self._primer_pk:
+                self._primer_pk = cliente.pk
+            if self._primer_registro is None or cliente.fecha_registro < self._primer_registro:
+                self._primer_registro = cliente.fecha_registro
+        cache_entradas.invalidar(*{cliente.contraseña for cliente in clientes})
+        self.resultado.clientes += len(clientes)
+        self.resultado.membresias += len(membresias)
+
+    def _finalizar(self):
+        """bulk_create no dispara señales: estado activo, métricas y caché del dashboard"""
+        Cliente.objects.filter(pk__gte=self._primer_pk).sincronizar_activo()
+        call_command(
+            'reconstruir_metricas', desde=str(timezone.localdate(self._primer_registro)),
+            stdout=io.StringIO(),
+        )
+        cache_dashboard.invalidar()
+
+
+def importar_archivo(archivo, nombre, lote=TAMAÑO_LOTE, simular=False, sede=SEDE_PRINCIPAL):
+    return ImportadorClientes(lote=lote, simular=simular, sede=sede).importar(leer_filas(archivo, nombre))
@@ -0,0 +1,161 @@
+"""
+Instrumentación de rendimiento por vista (se activa con INSTRUMENTACION=True).
+
+El middleware mide en cada petición las consultas SQL (número, tiempo y
+repeticiones de la misma consulta, señal de N+1), el tiempo de render de
+plantillas y el tiempo total. Agrupa las muestras por nombre de URL
+(`lista_clientes`, `registro_entrada`, ...), responde con `Server-Timing` y cada
+proceso vuelca sus estadísticas a INSTRUMENTACION_DIRECTORIO para que
+`manage.py reporte_rendimiento` las combine. Apagado, el middleware se retira
+de la cadena (MiddlewareNotUsed) y no cuesta nada.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+MUESTRAS_POR_VISTA = 500
+DUPLICADAS_POR_VISTA = 20
+
+_LISTA_PARAMETROS = re.compile(r'\((?:%s, )+%s\)')
+
+_estado = threading.local()
+_bloqueo = threading.Lock()
+# vista -> {'muestras': deque[(total, sql, consultas, plantillas)], 'duplicadas': {huella: [máx, peticiones]}}
+_estadisticas = defaultdict(lambda: {'muestras': deque(maxlen=MUESTRAS_POR_VISTA), 'duplicadas': {}})
+_ultimo_volcado = 0.0
+
+
+def huella(sql):
+    """SQL con parámetros y listas IN normalizadas: misma huella = misma consulta"""
+    return _LISTA_PARAMETROS.sub('(...)', sql)
+
+
+class _Medicion:
+    def __init__(self):
+        self.consultas = 0
+        self.sql = 0.0
+        self.plantillas = 0.0
+        self.huellas = Counter()
+        self.profundidad = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - inicio
+            self.consultas += 1
+            self.huellas[huella(sql)] += 1
+
+
+def _instrumentar_plantillas():
+    """Envuelve el render del backend de plantillas para sumar su tiempo a la petición"""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'instrumentado', False):
+        return
+    render_original = Template.render
+
+    def render(self, *args, **kwargs):
+        medicion = getattr(_estado, 'medicion', None)
+        if medicion is None:
+            return render_original(self, *args, **kwargs)
+        medicion.profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            return render_original(self, *args, **kwargs)
+        finally:
+            medicion.profundidad -= 1
+            if not medicion.profundidad:
+                medicion.plantillas += time.perf_counter() - inicio
+
+    render.instrumentado = True
+    Template.render = render
+
+
+def registrar(vista, total, medicion):
+    """Agrega la muestra de una petición a las estadísticas del proceso"""
+    with _bloqueo:
+        datos = _estadisticas[vista]
+        datos['muestras'].append((total, medicion.sql, medicion.consultas, medicion.plantillas))
+        duplicadas = datos['duplicadas']
+        for sql, veces in medicion.huellas.items():
+            if veces > 1:
+                maximo, peticiones = duplicadas.get(sql, (0, 0))
+                duplicadas[sql] = (max(maximo, veces), peticiones + 1)
+        if len(duplicadas) > DUPLICADAS_POR_VISTA:
+            # Se conservan las de más repeticiones
+            datos['duplicadas'] = dict(
+                sorted(duplicadas.items(), key=lambda item: item[1], reverse=True)[:DUPLICADAS_POR_VISTA]
+            )
+
+
+def instantanea():
+    with _bloqueo:
+        return {
+            vista: {
+                'muestras': list(datos['muestras']),
+                'duplicadas': [[sql, maximo, peticiones] for sql, (maximo, peticiones) in datos['duplicadas'].items()],
+            }
+            for vista, datos in _estadisticas.items()
+        }
+
+
+def directorio():
+    return Path(getattr(settings, 'INSTRUMENTACION_DIRECTORIO', settings.BASE_DIR / 'rendimiento'))
+
+
+def volcar(forzar=False):
+    """Escribe las estadísticas del proceso en <directorio>/<pid>.json cada cierto tiempo"""
+    global _ultimo_volcado
+    ahora = time.monotonic()
+    if not forzar and ahora - _ultimo_volcado < getattr(settings, 'INSTRUMENTACION_VOLCADO', 10):
+        return
+    _ultimo_volcado = ahora
+    destino = directorio()
+    destino.mkdir(parents=True, exist_ok=True)
+    temporal = destino / f'.{os.getpid()}.json'
+    temporal.write_text(json.dumps(instantanea()))
+    temporal.replace(destino / f'{os.getpid()}.json')
+
+
+class InstrumentacionMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _instrumentar_plantillas()
+
+    def __call__(self, request):
+        medicion = _estado.medicion = _Medicion()
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pila:
+                for connection in connections.all():
+                    pila.enter_context(connection.execute_wrapper(medicion))
+                response = self.get_response(request)
+        finally:
+            _estado.medicion = None
+        total = time.perf_counter() - inicio
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else '<sin ruta>'
+        duplicadas = sum(veces - 1 for veces in medicion.huellas.values() if veces > 1)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={medicion.sql * 1000:.1f};desc="{medicion.consultas} consultas, {duplicadas} repetidas"',
+            f'tpl;dur={medicion.plantillas * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        registrar(vista, total, medicion)
+        volcar()
+        return response
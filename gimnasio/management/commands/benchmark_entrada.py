@@ -0,0 +1,72 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from gimnasio.datos_prueba import base_de_datos_temporal, sembrar_datos
+from gimnasio.models import MetricaDiaria
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el registro de entradas (consultas y latencia p95) sobre una base de datos '
+        'de prueba temporal sembrada con clientes y entradas. No toca la base de datos real.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=10000)
+        parser.add_argument('--entradas', type=int, default=1000000)
+        parser.add_argument('--repeticiones', type=int, default=200)
+        # Membresía activa (si no está en caché), INSERT de la entrada, UPDATE de la
+        # fila del día en MetricaDiaria y últimos registros
+        parser.add_argument('--max-consultas', type=int, default=4,
+                            help='Consultas permitidas por entrada registrada')
+        # p95 medido a 10k/1M con SQLite: unos 20 ms, la mayor parte en la plantilla
+        parser.add_argument('--p95-ms', type=float, default=25.0,
+                            help='Presupuesto de latencia p95 en milisegundos')
+
+    def handle(self, *args, **options):
+        # Sin collectstatic: la plantilla no depende del manifiesto de archivos estáticos
+        sin_manifiesto = override_settings(
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'
+        )
+        with sin_manifiesto, base_de_datos_temporal():
+            contraseñas = sembrar_datos(options['clientes'], options['entradas'])
+            # Como al arrancar cada worker de gunicorn (gimnasio/metricas.py)
+            MetricaDiaria.objects.preparar_dia()
+            consultas, tiempos = self._medir(contraseñas, options['repeticiones'])
+
+        tiempos.sort()
+        p95 = tiempos[max(int(len(tiempos) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f'Entradas medidas: {len(tiempos)} | consultas máx: {max(consultas)} | '
+            f'mediana: {statistics.median(tiempos):.2f}ms | p95: {p95:.2f}ms'
+        )
+
+        errores = []
+        if max(consultas) > options['max_consultas']:
+            errores.append(f'{max(consultas)} consultas > {options["max_consultas"]}')
+        if p95 > options['p95_ms']:
+            errores.append(f'p95 {p95:.2f}ms > {options["p95_ms"]}ms')
+        if errores:
+            raise CommandError('Presupuesto excedido: ' + ', '.join(errores))
+        self.stdout.write(self.style.SUCCESS('Dentro del presupuesto'))
+
+    def _medir(self, contraseñas, repeticiones):
+        client = Client()
+        url = reverse('registro_entrada')
+        consultas = []
+        tiempos = []
+        for _ in range(repeticiones):
+            contraseña = random.choice(contraseñas)
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                client.post(url, {'contraseña': contraseña}, secure=True)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(len(capturadas))
+        return consultas, tiempos
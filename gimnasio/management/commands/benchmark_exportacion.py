@@ -0,0 +1,104 @@
+import importlib.util
+import resource
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from gimnasio import exportacion
+from gimnasio.datos_prueba import base_de_datos_temporal, sembrar_datos
+
+
+class _PicoRSS:
+    """Mide el pico de memoria residente (RSS) del proceso durante el bloque"""
+    INTERVALO = 0.005
+
+    def __enter__(self):
+        self.inicial = self.pico = self._rss()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+        self.pico = max(self.pico, self._rss())
+
+    @property
+    def incremento_mb(self):
+        return (self.pico - self.inicial) / 1024 / 1024
+
+    def _muestrear(self):
+        while not self._detener.wait(self.INTERVALO):
+            self.pico = max(self.pico, self._rss())
+
+    def _rss(self):
+        try:
+            with open('/proc/self/statm') as statm:
+                return int(statm.read().split()[1]) * resource.getpagesize()
+        except OSError:
+            # Sin /proc: máximo histórico del proceso (ru_maxrss está en KB en Linux)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la exportación en streaming (CSV y Excel de solo escritura, como la '
+        'escribe la cola de gimnasio.trabajos) con la exportación anterior basada en '
+        'pandas: filas/s e incremento del pico de RSS. Usa una base de datos de prueba temporal.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=50000)
+        parser.add_argument('--entradas', type=int, default=200000)
+        parser.add_argument('--datos', choices=sorted(exportacion.EXPORTACIONES), default='clientes')
+
+    def handle(self, *args, **options):
+        datos = options['datos']
+        with base_de_datos_temporal():
+            sembrar_datos(options['clientes'], options['entradas'])
+            total = exportacion.filtrar(datos).count()
+            self.stdout.write(f'Exportando {total} filas de {datos}')
+
+            # Primero los métodos en streaming: pandas deja memoria retenida por el proceso
+            metodos = [
+                ('streaming csv', lambda: self._escribir(datos, 'csv')),
+                ('streaming xlsx', lambda: self._escribir(datos, 'xlsx')),
+            ]
+            if importlib.util.find_spec('pandas') is None:
+                self.stdout.write(self.style.WARNING('pandas no está instalado: se omite la comparación'))
+            else:
+                metodos.append(('pandas xlsx', lambda: self._exportar_pandas(datos)))
+
+            for nombre, exportar in metodos:
+                with _PicoRSS() as memoria:
+                    inicio = time.perf_counter()
+                    tamaño = exportar()
+                    duracion = time.perf_counter() - inicio
+                self.stdout.write(
+                    f'{nombre:<15} {duracion:7.2f}s | {total / duracion:10.0f} filas/s | '
+                    f'pico RSS +{memoria.incremento_mb:7.1f} MB | {tamaño / 1024 / 1024:.1f} MB'
+                )
+
+    def _escribir(self, datos, formato):
+        """Lo mismo que gimnasio.trabajos.procesar: las filas por lotes a un archivo temporal"""
+        with tempfile.TemporaryFile() as archivo:
+            exportacion.escribir(datos, formato, exportacion.filas(datos), archivo)
+            return archivo.tell()
+
+    def _exportar_pandas(self, datos):
+        """La exportación anterior: todas las filas en un DataFrame y el libro en memoria"""
+        import pandas as pd
+
+        campos = [campo for _, campo in exportacion.EXPORTACIONES[datos]['columnas']]
+        filas = exportacion.filtrar(datos).values(*campos)
+        df = pd.DataFrame(list(filas))
+        for columna in df.select_dtypes(include=['datetimetz']).columns:
+            df[columna] = df[columna].dt.tz_localize(None)
+
+        with tempfile.TemporaryFile() as archivo:
+            with pd.ExcelWriter(archivo, engine='openpyxl') as writer:
+                df.to_excel(writer, sheet_name=exportacion.EXPORTACIONES[datos]['titulo'], index=False)
+            return archivo.tell()
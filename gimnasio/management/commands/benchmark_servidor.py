@@ -0,0 +1,267 @@
+import http.client
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+USUARIO = 'benchmark'
+
+# Ajustes del servidor de prueba: SQLite temporal y, opcionalmente, latencia artificial por consulta
+AJUSTES = '''
+from gimnasio_project.settings import *
+
+DATABASES = {{'default': {{
+    'ENGINE': 'gimnasio.backends.sqlite3',
+    'NAME': {base!r},
+    'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+}}}}
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+INSTRUMENTACION = False
+
+if {latencia!r}:
+    import time
+    from django.db.backends.signals import connection_created
+
+    def _con_latencia(execute, sql, params, many, context):
+        time.sleep({latencia!r})
+        return execute(sql, params, many, context)
+
+    def _agregar_latencia(sender, connection, **kwargs):
+        connection.execute_wrappers.append(_con_latencia)
+
+    connection_created.connect(_agregar_latencia)
+'''
+
+# operación: (peso, método, nombre de URL)
+OPERACIONES = {
+    'entrada': (75, 'POST', 'registro_entrada'),
+    'dashboard': (15, 'GET', 'dashboard'),
+    'estado caché': (10, 'GET', 'estadisticas_cache_entradas'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el rendimiento de gunicorn con workers síncronos (SERVIDOR=wsgi) y con '
+        'workers de uvicorn (SERVIDOR=asgi) con el mismo número de workers: peticiones/s, '
+        'latencia por operación y memoria residente total de los procesos. Usa una base '
+        'SQLite temporal con datos de generar_datos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--workers-wsgi', type=int,
+                            help='Workers síncronos, para igualar la memoria del modo asgi (por defecto --workers)')
+        parser.add_argument('--workers-asgi', type=int, help='Workers de uvicorn (por defecto --workers)')
+        parser.add_argument('--conexiones', type=int, default=32, help='Clientes concurrentes')
+        parser.add_argument('--duracion', type=float, default=15, help='Segundos de carga por modo')
+        parser.add_argument('--clientes', type=int, default=300)
+        parser.add_argument('--latencia-ms', type=float, default=0,
+                            help='Latencia artificial por consulta (simula una base de datos remota)')
+        parser.add_argument('--modos', default='wsgi,asgi', choices=['wsgi,asgi', 'wsgi', 'asgi'])
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directorio:
+            entorno = self._preparar(Path(directorio), options)
+            resultados = {}
+            for modo in options['modos'].split(','):
+                workers = options[f'workers_{modo}'] or options['workers']
+                self.stdout.write(f'Modo {modo}: {workers} workers, {options["conexiones"]} conexiones')
+                resultados[modo] = self._medir(modo, workers, entorno, options)
+                self._reportar(resultados[modo])
+
+        if 'wsgi' in resultados and 'asgi' in resultados:
+            wsgi, asgi = resultados['wsgi'], resultados['asgi']
+            self.stdout.write(self.style.SUCCESS(
+                f'asgi/wsgi: {asgi["por_segundo"] / wsgi["por_segundo"]:.2f}x peticiones/s con '
+                f'{asgi["memoria_mb"]:.0f} MB frente a {wsgi["memoria_mb"]:.0f} MB'
+            ))
+
+    def _preparar(self, directorio, options):
+        (directorio / 'ajustes_benchmark.py').write_text(AJUSTES.format(
+            base=str(directorio / 'benchmark.sqlite3'), latencia=options['latencia_ms'] / 1000
+        ))
+        entorno = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'ajustes_benchmark',
+            'PYTHONPATH': os.pathsep.join([str(directorio), str(settings.BASE_DIR)]),
+            'DEBUG': 'False',
+            'DJANGO_SUPERUSER_PASSWORD': USUARIO,
+        }
+        entorno.pop('DATABASE_URL', None)
+        manage = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py')]
+        for comando in (
+            ['migrate', '--noinput'],
+            ['generar_datos', '--clientes', str(options['clientes']), '--años', '1', '--forzar'],
+            ['createsuperuser', '--noinput', '--username', USUARIO, '--email', 'benchmark@gimnasio.local'],
+        ):
+            proceso = subprocess.run(manage + comando, env=entorno, capture_output=True, text=True)
+            if proceso.returncode:
+                raise CommandError(f'Falló {" ".join(comando)}:\n{proceso.stderr[-2000:]}')
+        return entorno
+
+    def _medir(self, modo, workers, entorno, options):
+        puerto = self._puerto_libre()
+        servidor = subprocess.Popen(
+            ['gunicorn', '--bind', f'127.0.0.1:{puerto}', '--workers', str(workers),
+             '--log-level', 'warning'],
+            env={**entorno, 'SERVIDOR': modo}, cwd=settings.BASE_DIR,
+        )
+        try:
+            self._esperar(puerto, servidor)
+            sesiones = [_Sesion(puerto, semilla) for semilla in range(options['conexiones'])]
+            for sesion in sesiones:
+                sesion.iniciar(options['clientes'])
+
+            fin = time.monotonic() + options['duracion']
+            hilos = [threading.Thread(target=sesion.trabajar, args=(fin,)) for sesion in sesiones]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            memoria = _rss_arbol(servidor.pid)
+        finally:
+            servidor.send_signal(signal.SIGTERM)
+            servidor.wait(timeout=30)
+
+        tiempos, errores = defaultdict(list), Counter()
+        for sesion in sesiones:
+            for operacion, muestras in sesion.tiempos.items():
+                tiempos[operacion].extend(muestras)
+            errores.update(sesion.errores)
+        total = sum(len(muestras) for muestras in tiempos.values())
+        return {
+            'por_segundo': total / options['duracion'],
+            'tiempos': tiempos,
+            'errores': errores,
+            'memoria_mb': memoria / 1024 / 1024,
+        }
+
+    def _reportar(self, resultado):
+        self.stdout.write(
+            f'  {resultado["por_segundo"]:.0f} peticiones/s | RSS total {resultado["memoria_mb"]:.0f} MB'
+        )
+        for operacion, muestras in sorted(resultado['tiempos'].items()):
+            muestras.sort()
+            p95 = muestras[max(int(len(muestras) * 0.95) - 1, 0)]
+            self.stdout.write(
+                f'  {operacion:<14} {len(muestras):>7} | mediana {statistics.median(muestras):7.1f}ms | '
+                f'p95 {p95:7.1f}ms'
+            )
+        for mensaje, veces in resultado['errores'].most_common(5):
+            self.stdout.write(self.style.ERROR(f'  x{veces} {mensaje}'))
+
+    def _puerto_libre(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def _esperar(self, puerto, servidor):
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            if servidor.poll() is not None:
+                raise CommandError(f'gunicorn terminó con código {servidor.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', puerto), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError('gunicorn no respondió en 30s')
+
+
+class _Sesion:
+    """Un recepcionista con sesión iniciada y conexión HTTP keep-alive propia"""
+
+    def __init__(self, puerto, semilla):
+        self.puerto = puerto
+        self.rng = random.Random(semilla)
+        self.cookies = {}
+        self.tiempos = defaultdict(list)
+        self.errores = Counter()
+        self.conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=60)
+
+    def iniciar(self, clientes):
+        self.clientes = clientes
+        self.peticion('GET', reverse('login'))
+        respuesta = self.peticion('POST', reverse('login'), {'username': USUARIO, 'password': USUARIO})
+        if respuesta.status != 302:
+            raise CommandError(f'No se pudo iniciar sesión (HTTP {respuesta.status})')
+
+    def peticion(self, metodo, ruta, datos=None):
+        # Detrás del proxy de Railway: HTTPS según X-Forwarded-Proto y CSRF con Origin
+        origen = f'https://127.0.0.1:{self.puerto}'
+        cabeceras = {
+            'X-Forwarded-Proto': 'https', 'Origin': origen, 'Referer': origen + ruta,
+            'Cookie': '; '.join(f'{k}={v}' for k, v in self.cookies.items()),
+        }
+        cuerpo = None
+        if metodo == 'POST':
+            datos = {**datos, 'csrfmiddlewaretoken': self.cookies.get('csrftoken', '')}
+            cuerpo = urlencode(datos)
+            cabeceras['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            self.conexion.request(metodo, ruta, cuerpo, cabeceras)
+            respuesta = self.conexion.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # El servidor cerró la conexión keep-alive inactiva: se reintenta como un navegador
+            self.conexion.close()
+            self.conexion.request(metodo, ruta, cuerpo, cabeceras)
+            respuesta = self.conexion.getresponse()
+        respuesta.read()
+        for cabecera in respuesta.headers.get_all('Set-Cookie') or []:
+            for nombre, morsel in SimpleCookie(cabecera).items():
+                self.cookies[nombre] = morsel.value
+        return respuesta
+
+    def trabajar(self, fin):
+        nombres = list(OPERACIONES)
+        pesos = [peso for peso, _, _ in OPERACIONES.values()]
+        while time.monotonic() < fin:
+            operacion = self.rng.choices(nombres, weights=pesos)[0]
+            _, metodo, url = OPERACIONES[operacion]
+            datos = {'contraseña': f'G{self.rng.randrange(self.clientes):07d}'} if metodo == 'POST' else None
+            inicio = time.perf_counter()
+            try:
+                respuesta = self.peticion(metodo, reverse(url), datos)
+                if respuesta.status >= 400:
+                    self.errores[f'{operacion}: HTTP {respuesta.status}'] += 1
+            except (OSError, http.client.HTTPException) as error:
+                self.errores[f'{operacion}: {type(error).__name__}'] += 1
+                self.conexion.close()
+            self.tiempos[operacion].append((time.perf_counter() - inicio) * 1000)
+
+
+def _rss_arbol(pid):
+    """Memoria residente (bytes) del proceso y sus hijos, leída de /proc"""
+    hijos = defaultdict(list)
+    for entrada in Path('/proc').iterdir():
+        if entrada.name.isdigit():
+            try:
+                padre = int((entrada / 'stat').read_text().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            hijos[padre].append(int(entrada.name))
+
+    total, pendientes = 0, [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        pendientes.extend(hijos[actual])
+        try:
+            total += int(Path(f'/proc/{actual}/statm').read_text().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except OSError:
+            pass
+    return total
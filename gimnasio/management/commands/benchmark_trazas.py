@@ -0,0 +1,98 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from gimnasio.datos_prueba import base_de_datos_temporal
+from gimnasio.models import Cliente, Membresia
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el costo por llamada (µs y consultas) de los métodos de Cliente/Membresia '
+        'que registran diagnósticos: logger "gimnasio" en INFO (producción), en DEBUG y en '
+        'DEBUG con las trazas detalladas. Usa una base de datos de prueba temporal y '
+        'descarta la salida del log.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--llamadas', type=int, default=2000)
+        parser.add_argument('--historial', type=int, default=20,
+                            help='Membresías vencidas del cliente sin membresía activa')
+
+    def handle(self, *args, **options):
+        with base_de_datos_temporal():
+            sin_membresia, con_membresia, membresia = self._datos(options['historial'])
+            casos = [
+                ('Cliente.get_membresia_activa (sin activa)', sin_membresia.get_membresia_activa),
+                ('Cliente.tiene_membresia_activa (activa)', con_membresia.tiene_membresia_activa),
+                ('Membresia.dias_restantes', lambda: membresia.dias_restantes),
+                ('Membresia.esta_activa', lambda: membresia.esta_activa),
+            ]
+            modos = [
+                ('INFO', logging.INFO, logging.WARNING),
+                ('DEBUG', logging.DEBUG, logging.WARNING),
+                ('DEBUG + trazas', logging.DEBUG, logging.DEBUG),
+            ]
+            for modo, nivel, nivel_trazas in modos:
+                self.stdout.write(f'Logger "gimnasio" en {modo}:')
+                with _NivelTemporal('gimnasio', nivel), _NivelTemporal('gimnasio.trazas', nivel_trazas):
+                    for nombre, llamada in casos:
+                        microsegundos, consultas = self._medir(llamada, options['llamadas'])
+                        self.stdout.write(
+                            f'  {nombre:<45} {microsegundos:9.2f} µs/llamada | {consultas} consultas'
+                        )
+
+    def _datos(self, historial):
+        hoy = timezone.localdate()
+        sin_membresia, con_membresia = Cliente.objects.bulk_create([
+            Cliente(nombre='Sin', apellidos='Membresía', telefono='5500000001',
+                    email='sin@prueba.local', contraseña='T0000001'),
+            Cliente(nombre='Con', apellidos='Membresía', telefono='5500000002',
+                    email='con@prueba.local', contraseña='T0000002'),
+        ])
+        Membresia.objects.bulk_create([
+            Membresia(
+                cliente=sin_membresia, sede_id=sin_membresia.sede_id, tipo='mensual', costo=100, pagado=True,
+                fecha_inicio=hoy - timedelta(days=31 * (i + 2)),
+                fecha_fin=hoy - timedelta(days=31 * (i + 1)),
+            )
+            for i in range(historial)
+        ])
+        membresia = Membresia.objects.create(
+            cliente=con_membresia, tipo='mensual', costo=100, pagado=True,
+            fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=30),
+        )
+        return sin_membresia, con_membresia, membresia
+
+    def _medir(self, llamada, llamadas):
+        with CaptureQueriesContext(connection) as capturadas:
+            llamada()
+        inicio = time.perf_counter()
+        for _ in range(llamadas):
+            llamada()
+        return (time.perf_counter() - inicio) * 1e6 / llamadas, len(capturadas)
+
+
+class _NivelTemporal:
+    """Fija el nivel del logger y descarta su salida mientras dura el bloque"""
+
+    def __init__(self, nombre, nivel):
+        self.logger = logging.getLogger(nombre)
+        self.nivel = nivel
+
+    def __enter__(self):
+        self.anterior = (self.logger.level, self.logger.handlers, self.logger.propagate)
+        self.logger.setLevel(self.nivel)
+        self.logger.handlers = [logging.NullHandler()]
+        self.logger.propagate = False
+        return self
+
+    def __exit__(self, *exc):
+        self.logger.level, self.logger.handlers, self.logger.propagate = self.anterior
+        # setLevel limpia la caché de isEnabledFor de todos los loggers
+        self.logger.setLevel(self.logger.level)
@@ -0,0 +1,264 @@
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gimnasio import cache_dashboard, urls
+from gimnasio.datos_prueba import base_de_datos_temporal, generar_gimnasio
+from gimnasio.models import SEDE_PRINCIPAL, Cliente, Membresia, TrabajoExportacion
+
+USUARIO = 'benchmark'
+
+
+class Escenario(NamedTuple):
+    nombre: str
+    url: str
+    args: tuple = ()
+    metodo: str = 'get'
+    # dict o función que recibe el número de repetición (para POST que crean datos únicos)
+    datos: object = None
+    estado: int = 200
+    preparar: Optional[Callable] = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Recorre todas las URL de gimnasio/urls.py con el cliente de pruebas de Django sobre '
+        'una base de datos temporal con datos de generar_datos y mide consultas, latencia '
+        'mediana y memoria asignada por petición. Compara con la línea base JSON y falla '
+        'si hay regresiones; con --guardar la reescribe.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=300)
+        parser.add_argument('--años', type=float, default=1)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--linea-base', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'linea_base.json'))
+        parser.add_argument('--guardar', action='store_true',
+                            help='Escribe los resultados como nueva línea base')
+        parser.add_argument('--solo-consultas', action='store_true',
+                            help='Compara solo el número de consultas (máquinas distintas a la de la línea base)')
+        parser.add_argument('--tolerancia', type=float, default=0.5,
+                            help='Aumento relativo permitido de latencia y memoria')
+        parser.add_argument('--margen-ms', type=float, default=5.0,
+                            help='Aumento absoluto de latencia que nunca cuenta como regresión')
+
+    def handle(self, *args, **options):
+        parametros = {k: options[k] for k in ('clientes', 'años', 'semilla')}
+        linea_base = Path(options['linea_base'])
+        base = None
+        if not options['guardar']:
+            if not linea_base.exists():
+                raise CommandError(f'No existe la línea base {linea_base}; genérela con --guardar')
+            base = json.loads(linea_base.read_text())
+            if base['parametros'] != parametros:
+                raise CommandError(
+                    f'La línea base se generó con {base["parametros"]}; use los mismos parámetros'
+                )
+
+        # Sin manifiesto de collectstatic: el benchmark no depende de los estáticos compilados
+        sin_manifiesto = override_settings(
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'
+        )
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), sin_manifiesto, \
+                base_de_datos_temporal():
+            generar_gimnasio(options['clientes'], años=options['años'], semilla=options['semilla'])
+            client = Client()
+            usuario = User.objects.create_user(USUARIO, password=USUARIO, is_superuser=True, is_staff=True)
+            client.force_login(usuario)
+            escenarios = self._escenarios(usuario)
+            self._verificar_cobertura(escenarios)
+            resultados = {
+                escenario.nombre: self._medir(client, usuario, escenario, options['repeticiones'])
+                for escenario in escenarios
+            }
+
+        if options['guardar']:
+            linea_base.parent.mkdir(parents=True, exist_ok=True)
+            linea_base.write_text(json.dumps(
+                {'parametros': parametros, 'escenarios': resultados}, indent=2, ensure_ascii=False
+            ) + '\n')
+
+        regresiones = self._reportar(resultados, base and base['escenarios'], options)
+        if options['guardar']:
+            self.stdout.write(self.style.SUCCESS(f'Línea base guardada en {linea_base}'))
+        elif regresiones:
+            raise CommandError(f'{len(regresiones)} regresiones:\n  ' + '\n  '.join(regresiones))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto a la línea base'))
+
+    def _escenarios(self, usuario):
+        hoy = timezone.localdate()
+        cliente = Cliente.objects.annotate(total=Count('membresias')).order_by('-total', 'pk').first()
+        activa = (
+            Membresia.objects.activas(timezone.localdate()).exclude(cliente=cliente)
+            .select_related('cliente').order_by('pk').first()
+        )
+        trabajo = TrabajoExportacion.objects.create(
+            usuario=usuario, datos='clientes', formato='csv', estado='terminado', total=1, procesadas=1
+        )
+        trabajo.archivo.save(trabajo.nombre_archivo, ContentFile(b'id,nombre\n1,Ana\n'))
+        datos_cliente = {
+            'nombre': cliente.nombre, 'apellidos': cliente.apellidos,
+            'telefono': cliente.telefono, 'email': cliente.email, 'sede': cliente.sede_id,
+        }
+
+        return [
+            Escenario('dashboard', 'dashboard'),
+            Escenario('dashboard sin caché', 'dashboard', preparar=cache_dashboard.invalidar),
+            Escenario('login', 'login'),
+            Escenario('login POST', 'login', metodo='post',
+                      datos={'username': USUARIO, 'password': USUARIO}, estado=302),
+            Escenario('logout POST', 'logout', metodo='post', estado=302),
+            Escenario('lista_clientes', 'lista_clientes'),
+            Escenario('lista_clientes búsqueda', 'lista_clientes', datos={'q': 'García', 'orden': 'nombre'}),
+            Escenario('clientes_datos', 'clientes_datos', datos={'draw': 1, 'start': 0, 'length': 25}),
+            Escenario('buscar_clientes', 'buscar_clientes', datos={'q': cliente.nombre[:3]}),
+            Escenario('buscar_clientes contenido', 'buscar_clientes', datos={'q': 'ez', 'page': 2}),
+            Escenario('nuevo_cliente', 'nuevo_cliente'),
+            Escenario('nuevo_cliente POST', 'nuevo_cliente', metodo='post', estado=302, datos=lambda i: {
+                'nombre': 'Benchmark', 'apellidos': str(i), 'telefono': f'56{i:08d}',
+                'email': f'benchmark{i}@gimnasio.local', 'sede': SEDE_PRINCIPAL,
+            }),
+            Escenario('importar_clientes', 'importar_clientes'),
+            Escenario('detalle_cliente', 'detalle_cliente', (cliente.pk,)),
+            Escenario('editar_cliente', 'editar_cliente', (cliente.pk,)),
+            Escenario('editar_cliente POST', 'editar_cliente', (cliente.pk,), 'post', datos_cliente, 302),
+            Escenario('regenerar_contraseña POST', 'regenerar_contraseña', (cliente.pk,), 'post', estado=302),
+            Escenario('nueva_membresia', 'nueva_membresia'),
+            Escenario('nueva_membresia_cliente', 'nueva_membresia_cliente', (cliente.pk,)),
+            Escenario('nueva_membresia POST', 'nueva_membresia', metodo='post', estado=302, datos={
+                'cliente': cliente.pk, 'tipo': 'mensual', 'fecha_inicio': hoy, 'costo': '500',
+            }),
+            Escenario('nuevo_pago', 'nuevo_pago'),
+            Escenario('nuevo_pago_membresia', 'nuevo_pago_membresia', (activa.pk,)),
+            Escenario('buscar_membresias', 'buscar_membresias', datos={'q': cliente.apellidos[:3]}),
+            Escenario('nuevo_pago POST', 'nuevo_pago', metodo='post', estado=302, datos={
+                'membresia': activa.pk, 'monto': '500', 'metodo': 'efectivo',
+            }),
+            Escenario('registro_entrada', 'registro_entrada'),
+            Escenario('registro_entrada POST', 'registro_entrada', metodo='post',
+                      datos={'contraseña': activa.cliente.contraseña}),
+            Escenario('historial_entradas', 'historial_entradas'),
+            Escenario('historial_entradas filtrado', 'historial_entradas', datos={
+                'cliente': cliente.pk, 'fecha_inicio': hoy - timedelta(days=90),
+            }),
+            Escenario('exportar_entradas', 'exportar_entradas', datos={
+                'formato': 'csv', 'fecha_inicio': hoy - timedelta(days=30),
+            }),
+            Escenario('estadisticas_cache_entradas', 'estadisticas_cache_entradas'),
+            Escenario('exportar POST', 'exportar', metodo='post',
+                      datos={'datos': 'pagos', 'formato': 'csv'}, estado=302),
+            Escenario('exportar_clientes POST', 'exportar_clientes', metodo='post', estado=302),
+            Escenario('trabajos_exportacion', 'trabajos_exportacion'),
+            Escenario('estado_trabajo', 'estado_trabajo', (trabajo.pk,)),
+            Escenario('descargar_trabajo', 'descargar_trabajo', (trabajo.pk,)),
+            # Con una sede elegida; el último escenario vuelve a todas las sedes
+            Escenario('elegir_sede POST', 'elegir_sede', metodo='post', estado=302, datos={'sede': SEDE_PRINCIPAL}),
+            Escenario('dashboard de una sede', 'dashboard'),
+            Escenario('lista_clientes de una sede', 'lista_clientes'),
+            Escenario('elegir_sede todas POST', 'elegir_sede', metodo='post', estado=302, datos={'sede': ''}),
+            # Admin (gimnasio/admin.py): listas sin N+1 ni COUNT(*) de la tabla completa
+            Escenario('admin clientes', 'admin:gimnasio_cliente_changelist'),
+            Escenario('admin membresías', 'admin:gimnasio_membresia_changelist'),
+            Escenario('admin pagos', 'admin:gimnasio_pago_changelist'),
+            Escenario('admin entradas', 'admin:gimnasio_registroentrada_changelist'),
+            Escenario('admin autocompletar membresía', 'admin:autocomplete', datos={
+                'term': cliente.apellidos[:3], 'app_label': 'gimnasio', 'model_name': 'pago', 'field_name': 'membresia',
+            }),
+        ]
+
+    def _verificar_cobertura(self, escenarios):
+        """Toda URL con nombre de gimnasio/urls.py debe tener al menos un escenario"""
+        cubiertas = {escenario.url for escenario in escenarios}
+        faltantes = [p.name for p in urls.urlpatterns if p.name and p.name not in cubiertas]
+        if faltantes:
+            raise CommandError('URL sin escenario de benchmark: ' + ', '.join(faltantes))
+
+    def _peticion(self, client, usuario, escenario, repeticion):
+        if escenario.preparar:
+            escenario.preparar()
+        datos = escenario.datos(repeticion) if callable(escenario.datos) else escenario.datos or {}
+        response = getattr(client, escenario.metodo)(
+            reverse(escenario.url, args=escenario.args), datos, secure=True
+        )
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        if response.status_code != escenario.estado:
+            raise CommandError(
+                f'{escenario.nombre}: respuesta {response.status_code}, se esperaba {escenario.estado}'
+            )
+        if escenario.url == 'logout':
+            client.force_login(usuario)
+
+    def _medir(self, client, usuario, escenario, repeticiones):
+        # Calentamiento: cachés, plantillas compiladas y conexión abierta
+        self._peticion(client, usuario, escenario, 0)
+
+        tiempos, consultas = [], 0
+        for repeticion in range(1, repeticiones + 1):
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                self._peticion(client, usuario, escenario, repeticion)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas = max(consultas, len(capturadas))
+
+        # Memoria en una petición aparte: tracemalloc distorsiona la latencia
+        tracemalloc.start()
+        try:
+            self._peticion(client, usuario, escenario, repeticiones + 1)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'consultas': consultas,
+            'ms': round(statistics.median(tiempos), 2),
+            'memoria_kb': round(pico / 1024),
+        }
+
+    def _reportar(self, resultados, base, options):
+        regresiones = []
+        self.stdout.write(f'{"escenario":<32} {"consultas":>9} {"ms":>9} {"memoria KB":>11}  línea base')
+        for nombre, actual in resultados.items():
+            anterior = (base or {}).get(nombre)
+            comparacion = ''
+            if base is not None and anterior is None:
+                comparacion = 'nuevo'
+            elif anterior:
+                comparacion = f'{anterior["consultas"]} / {anterior["ms"]} / {anterior["memoria_kb"]}'
+                if actual['consultas'] > anterior['consultas']:
+                    regresiones.append(f'{nombre}: {anterior["consultas"]} -> {actual["consultas"]} consultas')
+                if not options['solo_consultas']:
+                    limite_ms = anterior['ms'] * (1 + options['tolerancia']) + options['margen_ms']
+                    if actual['ms'] > limite_ms:
+                        regresiones.append(f'{nombre}: {anterior["ms"]} -> {actual["ms"]} ms')
+                    if actual['memoria_kb'] > anterior['memoria_kb'] * (1 + options['tolerancia']) + 64:
+                        regresiones.append(
+                            f'{nombre}: {anterior["memoria_kb"]} -> {actual["memoria_kb"]} KB asignados'
+                        )
+            estilo = self.style.ERROR if any(r.startswith(f'{nombre}:') for r in regresiones) else str
+            self.stdout.write(estilo(
+                f'{nombre:<32} {actual["consultas"]:>9} {actual["ms"]:>9.2f} {actual["memoria_kb"]:>11}  {comparacion}'
+            ))
+        for nombre in sorted(set(base or {}) - set(resultados)):
+            self.stdout.write(self.style.WARNING(f'{nombre}: está en la línea base pero ya no se mide'))
+        return regresiones
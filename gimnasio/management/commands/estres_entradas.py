@@ -0,0 +1,130 @@
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from gimnasio.datos_prueba import base_de_datos_temporal, generar_gimnasio
+from gimnasio.models import Cliente, Membresia, RegistroEntrada
+
+USUARIO = 'estres'
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de estrés de concurrencia: varios hilos registran entradas y, en una '
+        'fracción de las operaciones, dan de alta membresías y pagos a la vez, cada uno '
+        'con su propia conexión. Usa una base de datos temporal (en SQLite, un archivo) '
+        'con la configuración de conexión de settings. Falla si alguna petición falla, '
+        'p. ej. con "database is locked".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--operaciones', type=int, default=100, help='Operaciones por hilo')
+        parser.add_argument('--escrituras', type=float, default=0.2,
+                            help='Fracción de operaciones que registran membresía y pago')
+        parser.add_argument('--clientes', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directorio, \
+                base_de_datos_temporal(archivo=Path(directorio) / 'estres.sqlite3'):
+            generar_gimnasio(options['clientes'], años=1)
+            User.objects.create_user(USUARIO, password=USUARIO, is_superuser=True)
+            hoy = timezone.localdate()
+            contraseñas = list(
+                Membresia.objects.activas(hoy).values_list('cliente__contraseña', flat=True).distinct()
+            )
+            clientes = list(Cliente.objects.values_list('pk', flat=True))
+            if not contraseñas:
+                raise CommandError('Los datos generados no tienen clientes con membresía activa')
+            self.stdout.write(f'Base de datos: {self._descripcion()}')
+            entradas_previas = RegistroEntrada.objects.count()
+
+            tiempos, errores = defaultdict(list), Counter()
+            barrera = threading.Barrier(options['hilos'])
+            hilos = [
+                threading.Thread(target=self._trabajar, args=(
+                    semilla, barrera, options, contraseñas, clientes, tiempos, errores,
+                ))
+                for semilla in range(options['hilos'])
+            ]
+            inicio = time.perf_counter()
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            duracion = time.perf_counter() - inicio
+            entradas = RegistroEntrada.objects.count() - entradas_previas
+
+        total = sum(len(t) for t in tiempos.values())
+        self.stdout.write(
+            f'{total} operaciones en {duracion:.2f}s con {options["hilos"]} hilos '
+            f'({total / duracion:.0f} op/s), {entradas} entradas registradas'
+        )
+        for operacion, muestras in sorted(tiempos.items()):
+            muestras.sort()
+            p95 = muestras[max(int(len(muestras) * 0.95) - 1, 0)]
+            self.stdout.write(
+                f'  {operacion:<12} {len(muestras):>6} | mediana {statistics.median(muestras):7.1f}ms | '
+                f'p95 {p95:7.1f}ms | máx {muestras[-1]:7.1f}ms'
+            )
+        if errores:
+            for mensaje, veces in errores.most_common():
+                self.stdout.write(self.style.ERROR(f'  x{veces} {mensaje}'))
+            raise CommandError(f'{sum(errores.values())} operaciones fallaron')
+        self.stdout.write(self.style.SUCCESS('Sin errores de concurrencia'))
+
+    def _descripcion(self):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                modo = cursor.fetchone()[0]
+                cursor.execute('PRAGMA busy_timeout')
+                espera = cursor.fetchone()[0]
+            inmediata = connection.settings_dict.get('TRANSACCION_INMEDIATA', False)
+            return f'SQLite journal_mode={modo}, busy_timeout={espera}ms, BEGIN IMMEDIATE={inmediata}'
+        pool = connection.settings_dict.get('POOL')
+        return f'{connection.vendor}, CONN_MAX_AGE={connection.settings_dict["CONN_MAX_AGE"]}, pool={pool}'
+
+    def _trabajar(self, semilla, barrera, options, contraseñas, clientes, tiempos, errores):
+        rng = random.Random(semilla)
+        client = Client()
+        try:
+            client.login(username=USUARIO, password=USUARIO)
+            barrera.wait()
+            for _ in range(options['operaciones']):
+                if rng.random() < options['escrituras']:
+                    operacion = 'membresía'
+                    peticiones = self._alta(rng.choice(clientes))
+                else:
+                    operacion = 'entrada'
+                    peticiones = [(reverse('registro_entrada'), {'contraseña': rng.choice(contraseñas)})]
+                inicio = time.perf_counter()
+                try:
+                    for url, datos in peticiones:
+                        response = client.post(url, datos, secure=True)
+                        if response.status_code >= 400:
+                            errores[f'{operacion}: HTTP {response.status_code}'] += 1
+                except Exception as error:
+                    errores[f'{operacion}: {type(error).__name__}: {error}'] += 1
+                tiempos[operacion].append((time.perf_counter() - inicio) * 1000)
+        finally:
+            connections.close_all()
+
+    def _alta(self, cliente):
+        """Membresía semanal y su pago, como en recepción; el pago se arma tras crear la membresía"""
+        yield reverse('nueva_membresia'), {
+            'cliente': cliente, 'tipo': 'semanal', 'fecha_inicio': timezone.localdate(), 'costo': '150',
+        }
+        membresia = Membresia.objects.filter(cliente_id=cliente).latest('pk')
+        yield reverse('nuevo_pago'), {'membresia': membresia.pk, 'monto': '150', 'metodo': 'efectivo'}
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gimnasio.datos_prueba import generar_gimnasio
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos realistas en la base de datos configurada: clientes, '
+        'historial de membresías de los cuatro tipos, pagos y entradas con horas pico '
+        'matutinas y vespertinas. Pensado para desarrollo y pruebas de carga.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=1000)
+        parser.add_argument('--años', type=float, default=2,
+                            help='Antigüedad del primer registro')
+        parser.add_argument('--semilla', type=int, default=0,
+                            help='Misma semilla y escala, mismos datos')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Clientes por lote de bulk_create')
+        parser.add_argument('--sedes', type=int, default=1,
+                            help='Sedes entre las que se reparten los clientes (se crean si faltan)')
+        parser.add_argument('--forzar', action='store_true',
+                            help='Permite generar datos con DEBUG=False')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forzar']:
+            raise CommandError('DEBUG=False: ¿es la base de producción? Use --forzar si está seguro.')
+        if options['clientes'] < 1 or options['lote'] < 1 or options['sedes'] < 1:
+            raise CommandError('--clientes, --lote y --sedes deben ser positivos')
+
+        inicio = time.monotonic()
+        creados = generar_gimnasio(
+            options['clientes'], años=options['años'], semilla=options['semilla'], lote=options['lote'],
+            sedes=options['sedes'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{creados["clientes"]} clientes, {creados["membresias"]} membresías, '
+            f'{creados["pagos"]} pagos y {creados["entradas"]} entradas generados '
+            f'({time.monotonic() - inicio:.1f}s)'
+        ))
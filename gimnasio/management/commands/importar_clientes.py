@@ -0,0 +1,55 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gimnasio.importacion import COLUMNAS, TAMAÑO_LOTE, importar_archivo
+from gimnasio.models import SEDE_PRINCIPAL, Sede
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa clientes y membresías desde un archivo .xlsx o .csv con las columnas: '
+        + ', '.join(COLUMNAS) + '. Las filas con errores se omiten y se reportan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--lote', type=int, default=TAMAÑO_LOTE,
+                            help='Filas por transacción y por bulk_create')
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo valida el archivo, sin guardar nada')
+        parser.add_argument('--errores', help='Guarda las filas con error en este archivo CSV')
+        parser.add_argument('--sede', type=int, default=SEDE_PRINCIPAL,
+                            help='Id de la sede de los clientes importados')
+
+    def handle(self, *args, **options):
+        if not Sede.objects.filter(pk=options['sede']).exists():
+            raise CommandError(f'No existe la sede {options["sede"]}')
+        inicio = time.monotonic()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_archivo(
+                    archivo, options['archivo'], lote=options['lote'], simular=options['simular'],
+                    sede=options['sede'],
+                )
+        except OSError as error:
+            raise CommandError(f'No se pudo leer el archivo: {error}')
+        duracion = time.monotonic() - inicio
+
+        if options['errores'] and resultado.errores:
+            with open(options['errores'], 'w', newline='', encoding='utf-8') as salida:
+                escritor = csv.writer(salida)
+                escritor.writerow(['fila', 'error'])
+                escritor.writerows(resultado.errores)
+        for numero, mensaje in resultado.errores[:20]:
+            self.stdout.write(self.style.WARNING(f'Fila {numero}: {mensaje}'))
+        if len(resultado.errores) > 20:
+            self.stdout.write(self.style.WARNING(f'... y {len(resultado.errores) - 20} errores más'))
+
+        accion = 'validados' if options['simular'] else 'importados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.filas} filas leídas: {resultado.clientes} clientes y '
+            f'{resultado.membresias} membresías {accion}, {len(resultado.errores)} filas con error '
+            f'({duracion:.2f}s)'
+        ))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gimnasio import trabajos
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker de la cola de exportaciones fuera del proceso web: toma los TrabajoExportacion '
+        'pendientes y los procesa en un pool de hilos. Con gunicorn la cola ya se atiende en '
+        'cada worker web (TRABAJOS_EN_WEB); este comando sirve con runserver o en un servicio '
+        'que comparta MEDIA_ROOT con la web. Puede correr varias instancias a la vez; los '
+        'trabajos en proceso desde hace más de --abandono segundos vuelven a la cola.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=2,
+                            help='Trabajos procesados en paralelo')
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help='Segundos entre consultas a la cola cuando está vacía')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesa lo pendiente y termina')
+        parser.add_argument('--abandono', type=int, default=settings.TRABAJOS_ABANDONO,
+                            help='Segundos en proceso tras los que un trabajo se da por abandonado '
+                                 '(por defecto TRABAJOS_ABANDONO)')
+
+    def handle(self, *args, **options):
+        trabajos.atender_cola(
+            options['hilos'], options['intervalo'], options['abandono'], options['una_vez'],
+            avisar=self.stdout.write,
+        )
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, Max, Min, OuterRef, Q
+from django.utils import timezone
+
+from gimnasio import cache_dashboard
+from gimnasio.models import Cliente, Membresia, MetricaDiaria
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el campo activo de los clientes con UPDATE en bloque (pensado para cron a medianoche)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Cantidad de clientes (por rango de id) procesados en cada UPDATE'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Solo revisa clientes con membresías que iniciaron o vencieron desde la última ejecución'
+        )
+        parser.add_argument(
+            '--desde',
+            help='Fecha (AAAA-MM-DD) de la última ejecución para el modo incremental. Por defecto: ayer'
+        )
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        if lote <= 0:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        hoy = timezone.localdate()
+        inicio = time.monotonic()
+
+        clientes = Cliente.objects.all()
+        if options['incremental']:
+            desde = self._parse_desde(options['desde'], hoy)
+            # Membresías que iniciaron (desde, hoy] o vencieron [desde, hoy)
+            cambios = Membresia.objects.filter(cliente=OuterRef('pk')).filter(
+                Q(fecha_inicio__gt=desde, fecha_inicio__lte=hoy) |
+                Q(fecha_fin__gte=desde, fecha_fin__lt=hoy)
+            )
+            clientes = clientes.filter(Exists(cambios))
+
+        rango = Cliente.objects.aggregate(minimo=Min('pk'), maximo=Max('pk'))
+        modificados = 0
+        lotes = 0
+        if rango['minimo'] is not None:
+            for desde_pk in range(rango['minimo'], rango['maximo'] + 1, lote):
+                with transaction.atomic():
+                    modificados += clientes.filter(
+                        pk__gte=desde_pk, pk__lt=desde_pk + lote
+                    ).sincronizar_activo(hoy=hoy)
+                lotes += 1
+
+        # Los UPDATE en bloque no disparan señales: actualizar el resumen del día
+        if modificados:
+            MetricaDiaria.objects.actualizar_clientes_activos()
+            cache_dashboard.invalidar('metricas')
+
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{modificados} clientes actualizados en {lotes} lotes ({duracion:.2f}s)'
+        ))
+
+    def _parse_desde(self, valor, hoy):
+        if not valor:
+            return hoy - timedelta(days=1)
+        try:
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('--desde debe tener el formato AAAA-MM-DD')
@@ -0,0 +1,133 @@
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from gimnasio import cache_dashboard
+from gimnasio.fechas import parse_fecha, rango_dias
+from gimnasio.models import Cliente, Membresia, MetricaDiaria, Pago, RegistroEntrada, Sede
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla MetricaDiaria con consultas agrupadas por sede y día (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Primer día (AAAA-MM-DD). Por defecto: el primer dato registrado')
+        parser.add_argument('--hasta', help='Último día (AAAA-MM-DD). Por defecto: hoy')
+        parser.add_argument('--preparar', action='store_true',
+                            help='Solo crea las filas de hoy que falten, sin recalcular las demás '
+                                 '(cron de medianoche si la web no corre en gunicorn)')
+
+    def handle(self, *args, **options):
+        if options['preparar']:
+            creadas = MetricaDiaria.objects.preparar_dia()
+            self.stdout.write(self.style.SUCCESS(f'{creadas} filas de hoy creadas'))
+            return
+        inicio_reloj = time.monotonic()
+        hoy = timezone.localdate()
+        hasta = self._fecha(options['hasta'], 'hasta') or hoy
+        desde = self._fecha(options['desde'], 'desde') or self._primer_dia(hoy)
+        if desde > hasta:
+            raise CommandError('--desde no puede ser posterior a --hasta')
+
+        inicio, fin = rango_dias(desde, hasta)
+        entradas = self._por_dia(
+            RegistroEntrada.objects.filter(fecha_entrada__gte=inicio, fecha_entrada__lt=fin), 'fecha_entrada'
+        )
+        nuevos = self._por_dia(
+            Cliente.objects.filter(fecha_registro__gte=inicio, fecha_registro__lt=fin), 'fecha_registro'
+        )
+        clientes_previos = dict(
+            Cliente.objects.filter(fecha_registro__lt=inicio).order_by().values_list('sede').annotate(n=Count('pk'))
+        )
+
+        ingresos = defaultdict(dict)
+        pagos = (
+            Pago.objects.filter(fecha_pago__gte=inicio, fecha_pago__lt=fin)
+            .annotate(dia=TruncDate('fecha_pago')).values('sede', 'dia', 'metodo').annotate(total=Sum('monto'))
+        )
+        for fila in pagos:
+            ingresos[fila['sede'], fila['dia']][f'ingresos_{fila["metodo"]}'] = fila['total']
+
+        # Membresías activas por día: +1 el día de inicio, -1 el día siguiente al fin
+        pagadas = Membresia.objects.filter(pagado=True, fecha_inicio__lte=hasta, fecha_fin__gte=desde)
+        cambios = Counter()
+        for fila in pagadas.values('sede', 'fecha_inicio').annotate(n=Count('pk')):
+            cambios[fila['sede'], max(fila['fecha_inicio'], desde)] += fila['n']
+        for fila in pagadas.values('sede', 'fecha_fin').annotate(n=Count('pk')):
+            cambios[fila['sede'], fila['fecha_fin'] + timedelta(days=1)] -= fila['n']
+        vencimientos = {
+            (sede, dia): n for sede, dia, n in
+            Membresia.objects.filter(pagado=True, fecha_fin__range=(desde, hasta))
+            .values_list('sede', 'fecha_fin').annotate(n=Count('pk'))
+        }
+
+        metricas = []
+        for sede in Sede.objects.values_list('pk', flat=True):
+            activas = 0
+            total_clientes = clientes_previos.get(sede, 0)
+            dia = desde
+            while dia <= hasta:
+                clave = (sede, dia)
+                activas += cambios.get(clave, 0)
+                total_clientes += nuevos.get(clave, 0)
+                metrica = MetricaDiaria(
+                    sede_id=sede,
+                    fecha=dia,
+                    entradas=entradas.get(clave, 0),
+                    nuevos_clientes=nuevos.get(clave, 0),
+                    total_clientes=total_clientes,
+                    membresias_activas=activas,
+                    vencimientos=vencimientos.get(clave, 0),
+                    **{f'ingresos_{metodo}': Decimal('0') for metodo, _ in Pago.METODO_PAGO},
+                )
+                for campo, valor in ingresos.get(clave, {}).items():
+                    setattr(metrica, campo, valor)
+                metricas.append(metrica)
+                dia += timedelta(days=1)
+
+        campos = [
+            'entradas', 'nuevos_clientes', 'total_clientes', 'membresias_activas', 'vencimientos',
+            *(f'ingresos_{metodo}' for metodo, _ in Pago.METODO_PAGO),
+        ]
+        with transaction.atomic():
+            MetricaDiaria.objects.bulk_create(
+                metricas, batch_size=500,
+                update_conflicts=True, unique_fields=['sede', 'fecha'], update_fields=campos
+            )
+            if desde <= hoy <= hasta:
+                MetricaDiaria.objects.actualizar_clientes_activos()
+        cache_dashboard.invalidar('metricas')
+
+        duracion = time.monotonic() - inicio_reloj
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(metricas)} días de sede reconstruidos ({desde} a {hasta}) en {duracion:.2f}s'
+        ))
+
+    def _por_dia(self, queryset, campo):
+        """{(sede, día): filas}"""
+        filas = queryset.annotate(dia=TruncDate(campo)).values('sede', 'dia').annotate(n=Count('pk'))
+        return {(fila['sede'], fila['dia']): fila['n'] for fila in filas}
+
+    def _primer_dia(self, hoy):
+        primeros = [
+            Cliente.objects.aggregate(m=Min('fecha_registro'))['m'],
+            RegistroEntrada.objects.aggregate(m=Min('fecha_entrada'))['m'],
+            Pago.objects.aggregate(m=Min('fecha_pago'))['m'],
+        ]
+        fechas = [timezone.localdate(f) for f in primeros if f]
+        return min(fechas, default=hoy)
+
+    def _fecha(self, valor, nombre):
+        if not valor:
+            return None
+        fecha = parse_fecha(valor)
+        if fecha is None:
+            raise CommandError(f'--{nombre} debe tener el formato AAAA-MM-DD')
+        return fecha
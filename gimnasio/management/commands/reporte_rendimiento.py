@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from gimnasio import instrumentacion
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p / 100), len(ordenados) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Combina las estadísticas que vuelca el middleware de instrumentación '
+        '(INSTRUMENTACION=True) y muestra las vistas más lentas con sus consultas más repetidas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Vistas a mostrar')
+        parser.add_argument('--duplicadas', type=int, default=3,
+                            help='Consultas repetidas a mostrar por vista')
+        parser.add_argument('--limpiar', action='store_true',
+                            help='Borra los volcados después del reporte')
+
+    def handle(self, *args, **options):
+        directorio = instrumentacion.directorio()
+        archivos = sorted(directorio.glob('*.json')) if directorio.exists() else []
+        if not archivos:
+            self.stdout.write(f'No hay estadísticas en {directorio} (¿INSTRUMENTACION=True?)')
+            return
+
+        vistas = {}
+        for archivo in archivos:
+            for vista, datos in json.loads(archivo.read_text()).items():
+                combinada = vistas.setdefault(vista, {'muestras': [], 'duplicadas': {}})
+                combinada['muestras'].extend(datos['muestras'])
+                for sql, maximo, peticiones in datos['duplicadas']:
+                    maximo_previo, peticiones_previas = combinada['duplicadas'].get(sql, (0, 0))
+                    combinada['duplicadas'][sql] = (max(maximo, maximo_previo), peticiones + peticiones_previas)
+
+        filas = []
+        for vista, datos in vistas.items():
+            totales, sql, consultas, plantillas = zip(*datos['muestras'])
+            filas.append((percentil(totales, 95), vista, len(totales), totales, sql, consultas, plantillas))
+        filas.sort(reverse=True)
+
+        self.stdout.write(f'{len(archivos)} procesos, {sum(f[2] for f in filas)} peticiones\n')
+        self.stdout.write(
+            f'{"vista":<32} {"n":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+            f'{"sql p95":>8} {"tpl p95":>8} {"consultas":>10}'
+        )
+        for p95, vista, n, totales, sql, consultas, plantillas in filas[:options['top']]:
+            self.stdout.write(
+                f'{vista:<32} {n:>6} {percentil(totales, 50) * 1000:>8.1f} {p95 * 1000:>8.1f} '
+                f'{percentil(totales, 99) * 1000:>8.1f} {percentil(sql, 95) * 1000:>8.1f} '
+                f'{percentil(plantillas, 95) * 1000:>8.1f} {max(consultas):>10}'
+            )
+            duplicadas = sorted(vistas[vista]['duplicadas'].items(), key=lambda item: item[1], reverse=True)
+            for sql_repetido, (maximo, peticiones) in duplicadas[:options['duplicadas']]:
+                self.stdout.write(self.style.WARNING(
+                    f'    x{maximo} en {peticiones} peticiones: {sql_repetido[:150]}'
+                ))
+
+        if options['limpiar']:
+            for archivo in archivos:
+                archivo.unlink()
+            self.stdout.write(f'{len(archivos)} volcados eliminados')
@@ -0,0 +1,73 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Lo que hace cada worker al arrancar: cargar la aplicación WSGI y el URLconf
+CODIGO_ARRANQUE = (
+    'from django.core.wsgi import get_wsgi_application\n'
+    'get_wsgi_application()\n'
+    'import importlib\n'
+    'importlib.import_module({urlconf!r})\n'
+)
+
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa la aplicación WSGI y el URLconf en un proceso nuevo con "python -X importtime" '
+        'y falla si se cargan dependencias pesadas o si se excede el presupuesto de tiempo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--presupuesto-ms', type=float, default=600.0,
+                            help='Tiempo total de importación permitido en milisegundos')
+        parser.add_argument('--prohibidos', default='pandas,numpy,openpyxl',
+                            help='Paquetes (separados por coma) que no deben cargarse al arrancar')
+        parser.add_argument('--top', type=int, default=10,
+                            help='Módulos más lentos a mostrar')
+
+    def handle(self, *args, **options):
+        modulos = self._importar()
+        total_ms = sum(cumulativo for _, cumulativo, nivel in modulos.values() if nivel == 0) / 1000
+
+        self.stdout.write(f'{len(modulos)} módulos importados en {total_ms:.1f}ms')
+        lentos = sorted(modulos.items(), key=lambda item: item[1][0], reverse=True)[:options['top']]
+        for nombre, (propio, _, _) in lentos:
+            self.stdout.write(f'  {propio / 1000:8.1f}ms  {nombre}')
+
+        errores = []
+        prohibidos = [p.strip() for p in options['prohibidos'].split(',') if p.strip()]
+        cargados = sorted({
+            paquete for paquete in prohibidos for nombre in modulos
+            if nombre == paquete or nombre.startswith(paquete + '.')
+        })
+        if cargados:
+            errores.append('se cargan al arrancar: ' + ', '.join(cargados))
+        if total_ms > options['presupuesto_ms']:
+            errores.append(f'{total_ms:.1f}ms > {options["presupuesto_ms"]}ms')
+        if errores:
+            raise CommandError('Arranque fuera de presupuesto: ' + '; '.join(errores))
+        self.stdout.write(self.style.SUCCESS('Dentro del presupuesto'))
+
+    def _importar(self):
+        """Retorna {módulo: (tiempo propio µs, tiempo acumulado µs, nivel)}"""
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CODIGO_ARRANQUE.format(urlconf=settings.ROOT_URLCONF)],
+            cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True,
+        )
+        if proceso.returncode:
+            raise CommandError(f'No se pudo importar la aplicación:\n{proceso.stderr[-2000:]}')
+
+        modulos = {}
+        for linea in proceso.stderr.splitlines():
+            coincidencia = LINEA_IMPORTTIME.match(linea)
+            if coincidencia:
+                propio, cumulativo, sangria, nombre = coincidencia.groups()
+                modulos[nombre] = (int(propio), int(cumulativo), len(sangria) // 2)
+        return modulos
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from gimnasio import sedes
+from gimnasio.datos_prueba import base_de_datos_temporal
+from gimnasio.models import SEDE_PRINCIPAL, Cliente, Membresia, MetricaDiaria
+
+
+class Command(BaseCommand):
+    help = (
+        'Cuenta las consultas de registrar un pago y una membresía para un cliente con '
+        'historial largo y falla si superan el presupuesto o si no dependen solo de la '
+        'operación. Usa una base de datos de prueba temporal.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--historial', type=int, default=50,
+                            help='Membresías previas del cliente de prueba')
+        # Sesión, usuario y validación del formulario (4), la transacción con el INSERT, y
+        # tras el commit los dos UPDATE que sincronizan `activo`. El pago suma en la
+        # transacción el UPDATE de ingresos y el de `pagado`, y tras el commit recuenta
+        # las membresías activas del día (2 COUNT y un UPDATE) y los clientes activos.
+        parser.add_argument('--max-pago', type=int, default=15,
+                            help='Consultas permitidas al registrar un pago')
+        parser.add_argument('--max-membresia', type=int, default=9,
+                            help='Consultas permitidas al registrar una membresía')
+
+    def handle(self, *args, **options):
+        with base_de_datos_temporal():
+            client = self._sesion()
+            resultados = []
+            for historial in (0, options['historial']):
+                cliente = self._cliente(historial)
+                resultados.append(self._medir(client, cliente))
+
+        errores = []
+        for nombre, presupuesto in (('pago', options['max_pago']), ('membresia', options['max_membresia'])):
+            sin_historial, con_historial = (r[nombre] for r in resultados)
+            self.stdout.write(
+                f'{nombre}: {sin_historial} consultas sin historial, '
+                f'{con_historial} con {options["historial"]} membresías previas'
+            )
+            if con_historial != sin_historial:
+                errores.append(f'{nombre} depende del historial ({sin_historial} -> {con_historial})')
+            if max(sin_historial, con_historial) > presupuesto:
+                errores.append(f'{nombre}: {max(sin_historial, con_historial)} consultas > {presupuesto}')
+        for resultado in resultados:
+            if not resultado['activo']:
+                errores.append('el cliente no quedó activo tras el pago')
+
+        if errores:
+            raise CommandError('Presupuesto excedido: ' + '; '.join(errores))
+        self.stdout.write(self.style.SUCCESS('Dentro del presupuesto'))
+
+    def _sesion(self):
+        usuario = User.objects.create_user('verificador', password='verificador', is_superuser=True)
+        client = Client()
+        client.login(username='verificador', password='verificador')
+        # Fila de métricas de hoy, sede del usuario y lista de sedes ya en caché, como en operación normal
+        MetricaDiaria.objects.refrescar(timezone.localdate(), SEDE_PRINCIPAL)
+        sedes.sede_fija(usuario)
+        sedes.listar()
+        return client
+
+    def _cliente(self, historial):
+        hoy = timezone.localdate()
+        numero = Cliente.objects.count()
+        cliente = Cliente.objects.create(
+            nombre='Verificación', apellidos=str(numero), telefono=f'55{numero:08d}',
+            email=f'verificacion{numero}@prueba.local', activo=False
+        )
+        Membresia.objects.bulk_create([
+            Membresia(
+                cliente=cliente, sede_id=cliente.sede_id, tipo='mensual', costo=100, pagado=True,
+                fecha_inicio=hoy - timedelta(days=31 * (i + 2)),
+                fecha_fin=hoy - timedelta(days=31 * (i + 1)),
+            )
+            for i in range(historial)
+        ])
+        return cliente
+
+    def _medir(self, client, cliente):
+        hoy = timezone.localdate()
+        with CaptureQueriesContext(connection) as membresia:
+            client.post(reverse('nueva_membresia'), {
+                'cliente': cliente.pk, 'tipo': 'mensual', 'fecha_inicio': hoy, 'costo': '500',
+            }, secure=True)
+        nueva = cliente.membresias.latest('pk')
+
+        with CaptureQueriesContext(connection) as pago:
+            client.post(reverse('nuevo_pago'), {
+                'membresia': nueva.pk, 'monto': '500', 'metodo': 'efectivo',
+            }, secure=True)
+
+        cliente.refresh_from_db()
+        return {'pago': len(pago), 'membresia': len(membresia), 'activo': cliente.activo}
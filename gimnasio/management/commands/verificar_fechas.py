@@ -0,0 +1,95 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from gimnasio.datos_prueba import base_de_datos_temporal
+from gimnasio.fechas import rango_dia, rango_dias, rango_mes
+from gimnasio.models import Cliente, Membresia, Pago, RegistroEntrada
+
+ZONA = 'America/Mexico_City'
+# Días de los bordes: cambios de horario de 2021 (4 de abril se salta de 2:00 a 3:00,
+# 31 de octubre se repite de 1:00 a 2:00), fin de mes y fin de año
+DIAS_BORDE = [
+    date(2021, 2, 28), date(2021, 4, 4), date(2021, 10, 31), date(2021, 12, 31),
+]
+# Cada día de borde con su día anterior y su día siguiente
+DESFASES = (-1, 0, 1)
+# Horas locales sembradas alrededor de cada día: medianoche y el último segundo del día;
+# (hora, fold) para distinguir las dos 1:30 del 31 de octubre
+HORAS = [(time(0, 0, 0), 0), (time(23, 59, 59), 0), (time(1, 30), 0), (time(1, 30), 1), (time(3, 0), 0)]
+
+
+def _momentos():
+    zona = ZoneInfo(ZONA)
+    for fecha in _dias():
+        for hora, fold in HORAS:
+            yield datetime.combine(fecha, hora, tzinfo=zona).replace(fold=fold)
+
+
+def _dias():
+    return sorted({dia + timedelta(days=desfase) for dia in DIAS_BORDE for desfase in DESFASES})
+
+
+class Command(BaseCommand):
+    help = (
+        f'Comprueba en una base de datos temporal, con TIME_ZONE={ZONA}, que los filtros por '
+        'rango de gimnasio.fechas (rango_dia, rango_dias, rango_mes) dan las mismas filas que '
+        'los lookups __date, __month y __year a los que sustituyen: medianoche, fin de mes, '
+        'fin de año y los cambios de horario de verano de 2021.'
+    )
+
+    def handle(self, *args, **options):
+        fallas = []
+        with override_settings(TIME_ZONE=ZONA), base_de_datos_temporal():
+            momentos = list(_momentos())
+            self._sembrar(momentos)
+            for modelo, campo in ((RegistroEntrada, 'fecha_entrada'), (Pago, 'fecha_pago')):
+                fallas += self._comparar(modelo, campo)
+            self.stdout.write(f'{len(momentos)} filas por tabla en {len(_dias())} días de borde')
+
+        if fallas:
+            raise CommandError(f'{len(fallas)} rangos difieren de los lookups:\n  ' + '\n  '.join(fallas))
+        self.stdout.write(self.style.SUCCESS('Los rangos coinciden con __date, __month y __year'))
+
+    def _sembrar(self, momentos):
+        cliente = Cliente.objects.create(nombre='Fechas', apellidos='Borde', telefono='5550000001')
+        membresia = Membresia.objects.create(
+            cliente=cliente, tipo='anual', fecha_inicio=date(2021, 1, 1), fecha_fin=date(2021, 12, 31),
+            costo=100, pagado=True,
+        )
+        # bulk_create: sin señales de métricas, que no se verifican aquí
+        RegistroEntrada.objects.bulk_create(
+            RegistroEntrada(cliente=cliente, sede_id=cliente.sede_id, fecha_entrada=momento)
+            for momento in momentos
+        )
+        Pago.objects.bulk_create(
+            Pago(membresia=membresia, sede_id=cliente.sede_id, monto=1, metodo='efectivo', fecha_pago=momento)
+            for momento in momentos
+        )
+
+    def _comparar(self, modelo, campo):
+        fallas = []
+
+        def comparar(descripcion, anterior, rango):
+            inicio, fin = rango
+            esperado = set(modelo.objects.filter(**anterior).values_list('pk', flat=True))
+            obtenido = set(
+                modelo.objects.filter(**{f'{campo}__gte': inicio, f'{campo}__lt': fin}).values_list('pk', flat=True)
+            )
+            if esperado != obtenido:
+                fallas.append(f'{modelo.__name__}.{campo} {descripcion}: {sorted(esperado ^ obtenido)}')
+            elif not esperado:
+                fallas.append(f'{modelo.__name__}.{campo} {descripcion}: sin filas, no prueba nada')
+
+        for dia in _dias():
+            comparar(f'día {dia}', {f'{campo}__date': dia}, rango_dia(dia))
+            hasta = dia + timedelta(days=1)
+            comparar(f'días {dia} a {hasta}', {f'{campo}__date__gte': dia, f'{campo}__date__lte': hasta},
+                     rango_dias(dia, hasta))
+        for mes in sorted({(dia.year, dia.month) for dia in _dias()}):
+            comparar(f'mes {mes[0]}-{mes[1]:02d}', {f'{campo}__year': mes[0], f'{campo}__month': mes[1]},
+                     rango_mes(date(*mes, 1)))
+        self.stdout.write(f'{modelo.__name__}.{campo}: días, rangos de dos días y meses comparados')
+        return fallas
@@ -0,0 +1,88 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from gimnasio import consultas, views
+from gimnasio.datos_prueba import base_de_datos_temporal, sembrar_datos
+from gimnasio.models import SEDE_PRINCIPAL, Cliente, MetricaDiaria
+from gimnasio.paginacion import consulta_keyset
+
+# Recorrido completo de una tabla del gimnasio, según el motor
+ESCANEO_COMPLETO = {
+    'postgresql': re.compile(r'Seq Scan on (gimnasio_\w+)'),
+    'sqlite': re.compile(r'\bSCAN (gimnasio_\w+)\b(?! USING)'),
+}
+
+
+def consultas_frecuentes(contraseña, cliente_id):
+    """Consultas críticas de las vistas, tomadas de gimnasio.consultas con los mismos argumentos"""
+    hoy = timezone.localdate()
+    cliente = Cliente.objects.get(pk=cliente_id)
+    semana = {'desde': hoy - timedelta(days=7), 'hasta': hoy}
+    frecuentes = {
+        'registro_entrada: membresía activa por contraseña': consultas.membresia_activa(contraseña, hoy)[:1],
+        'registro_entrada: cliente por contraseña': consultas.cliente_por_contraseña(contraseña),
+        'registro_entrada: última membresía del cliente': consultas.ultima_membresia(cliente)[:1],
+        'registro_entrada: últimas entradas': consultas.ultimos_registros(None),
+        'registro_entrada: últimas entradas de una sede': consultas.ultimos_registros(SEDE_PRINCIPAL),
+        'detalle_cliente: membresías': consultas.membresias_de_cliente(cliente),
+        'detalle_cliente: últimas entradas': consultas.entradas_de_cliente(cliente),
+        'historial_entradas: por cliente': consultas.historial_entradas(None, cliente_id=cliente_id),
+        'historial_entradas: por rango de fechas': consultas.historial_entradas(None, **semana),
+        'historial_entradas: de una sede': consultas.historial_entradas(SEDE_PRINCIPAL),
+        'dashboard: métricas de la sede': consultas.metricas_de_sede(SEDE_PRINCIPAL, hoy.replace(day=1), hoy),
+        'dashboard: próximas a vencer': consultas.proximas_vencer(SEDE_PRINCIPAL, hoy),
+        'dashboard: membresías vencidas': consultas.membresias_vencidas(SEDE_PRINCIPAL, hoy),
+    }
+    for sede, nombre in ((None, 'lista_clientes'), (SEDE_PRINCIPAL, 'lista_clientes de una sede')):
+        # Como la vista: página de ids en la base de datos y luego el estado de membresía de esa página
+        ids = consultas.buscar_clientes('', '-fecha_registro', sede).values_list('pk', flat=True)
+        frecuentes[f'{nombre}: página de ids'] = ids[:views.CLIENTES_POR_PAGINA]
+        frecuentes[f'{nombre}: estado de membresía'] = consultas.estado_clientes(list(ids[:views.CLIENTES_POR_PAGINA]))
+    for nombre, queryset in list(frecuentes.items()):
+        if nombre.startswith('historial_entradas'):
+            # La página que ejecuta pagina_keyset
+            frecuentes[nombre] = consulta_keyset(queryset, 'fecha_entrada', None, views.ENTRADAS_POR_PAGINA)
+    for nombre, queryset in MetricaDiaria.objects.consultas_del_dia(hoy, SEDE_PRINCIPAL).items():
+        # refrescar cuenta estas filas: el plan de COUNT(*) es el de values('pk'), no el de leerlas completas
+        if nombre != 'ingresos':
+            queryset = queryset.values('pk')
+        frecuentes[f'dashboard: métricas del día, {nombre}'] = queryset
+    return frecuentes
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN sobre las consultas frecuentes en una base de datos de prueba sembrada '
+        'y falla si alguna recorre una tabla completa en lugar de usar un índice'
+    )
+
+    def add_arguments(self, parser):
+        # La escala de benchmark_entrada: con menos filas SQLite elige otros planes
+        parser.add_argument('--clientes', type=int, default=10000)
+        parser.add_argument('--entradas', type=int, default=1000000)
+
+    def handle(self, *args, **options):
+        patron = ESCANEO_COMPLETO.get(connection.vendor)
+        if patron is None:
+            raise CommandError(f'Motor no soportado: {connection.vendor}')
+
+        fallas = []
+        with base_de_datos_temporal():
+            contraseñas = sembrar_datos(options['clientes'], options['entradas'])
+            cliente_id = Cliente.objects.values_list('pk', flat=True).first()
+            for nombre, queryset in consultas_frecuentes(contraseñas[0], cliente_id).items():
+                plan = queryset.explain()
+                tablas = sorted(set(patron.findall(plan)))
+                if tablas:
+                    fallas.append(nombre)
+                    self.stdout.write(self.style.ERROR(f'✗ {nombre}: escaneo completo de {", ".join(tablas)}'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {nombre}'))
+
+        if fallas:
+            raise CommandError(f'{len(fallas)} consultas sin índice')
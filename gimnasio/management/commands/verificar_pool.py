@@ -0,0 +1,190 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.backends.postgresql.base import Database
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from django.db.utils import load_backend
+
+ALIAS = 'verificar_pool'
+ALIAS_AISLAMIENTO = 'verificar_pool_aislamiento'
+# Candado consultivo que deja tomado la transacción que queda abierta al cerrar
+CANDADO = 731_905
+
+
+class Command(BaseCommand):
+    help = (
+        'Comprueba contra la base PostgreSQL de DATABASE_URL el pool de conexiones de '
+        'gimnasio/backends/postgresql (DB_POOL_MAX): que cerrar devuelva la conexión al pool, '
+        'que una transacción abierta o con error se deshaga, que no pasen a la siguiente '
+        'petición el aislamiento ni los SET de la anterior y que un proceso hijo (fork de '
+        'gunicorn) abra su propio pool. Activar DB_POOL_MAX solo si esta verificación pasa.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El pool es solo para PostgreSQL: defina DATABASE_URL con una base PostgreSQL')
+        opciones = connection.settings_dict['OPTIONS']
+        conexion = self._conexion_con_pool(ALIAS, opciones)
+        aislada = self._conexion_con_pool(
+            ALIAS_AISLAMIENTO, dict(opciones, isolation_level=IsolationLevel.REPEATABLE_READ)
+        )
+        try:
+            self._verificar_devolucion(conexion)
+            self._verificar_transaccion_abierta(conexion, aislada)
+            self._verificar_transaccion_con_error(conexion)
+            self._verificar_sesion(conexion)
+            self._verificar_aislamiento(aislada)
+            self._verificar_fork(conexion)
+        finally:
+            for wrapper in (conexion, aislada):
+                wrapper.close()
+                wrapper.pool.cerrar()
+        self.stdout.write(self.style.SUCCESS('Pool de conexiones correcto'))
+
+    def _conexion_con_pool(self, alias, opciones):
+        """Conexión a la base por defecto con el backend del pool, como la deja settings con DB_POOL_MAX"""
+        configuracion = dict(
+            connection.settings_dict, ENGINE='gimnasio.backends.postgresql', CONN_MAX_AGE=0,
+            OPTIONS=opciones, POOL={'maximo': 2, 'espera': 5},
+        )
+        return load_backend(configuracion['ENGINE']).DatabaseWrapper(configuracion, alias)
+
+    def _verificar_devolucion(self, conexion):
+        conexion.ensure_connection()
+        psycopg = conexion.connection
+        sesion = self._sesion(conexion)
+        conexion.close()
+        self._comprobar('close() devuelve la conexión de psycopg al pool sin cerrarla',
+                        (conexion.connection, psycopg.closed), (None, 0))
+        conexion.ensure_connection()
+        self._comprobar('La siguiente petición reutiliza la sesión del pool', self._sesion(conexion), sesion)
+        conexion.close()
+
+    def _verificar_transaccion_abierta(self, conexion, otra):
+        """Una petición que cierra a media transacción no deja candados ni la transacción a la siguiente"""
+        sesion = self._sesion(conexion)
+        conexion.set_autocommit(False)
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CANDADO])
+        self._comprobar('Transacción abierta antes de cerrar', self._estado(conexion), 'INTRANS')
+        psycopg = conexion.connection
+        conexion.close()
+        self._comprobar('La transacción abierta se deshace al devolver la conexión', self._estado_psycopg(psycopg), 'IDLE')
+        with otra.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [CANDADO])
+            self._comprobar('Sus candados quedan libres para otra sesión', cursor.fetchone()[0], True)
+        otra.close()
+        conexion.ensure_connection()
+        self._comprobar('La conexión reutilizada vuelve a autocommit',
+                        (self._sesion(conexion), conexion.get_autocommit()), (sesion, True))
+        conexion.close()
+
+    def _verificar_transaccion_con_error(self, conexion):
+        sesion = self._sesion(conexion)
+        conexion.set_autocommit(False)
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute('SELECT 1 / 0')
+        except DatabaseError:
+            pass
+        self._comprobar('Transacción con error antes de cerrar', self._estado(conexion), 'INERROR')
+        conexion.close()
+        conexion.ensure_connection()
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self._comprobar('Tras una transacción con error la conexión reutilizada responde',
+                            (self._sesion(conexion), cursor.fetchone()[0]), (sesion, 1))
+        conexion.close()
+
+    def _verificar_sesion(self, conexion):
+        """Los SET de sesión de una petición no pasan a la siguiente"""
+        conexion.ensure_connection()
+        sesion = self._sesion(conexion)
+        antes = self._mostrar(conexion, 'statement_timeout'), self._mostrar(conexion, 'default_transaction_isolation')
+        with conexion.cursor() as cursor:
+            cursor.execute("SET statement_timeout = '1234ms'")
+            cursor.execute('SET SESSION CHARACTERISTICS AS TRANSACTION ISOLATION LEVEL SERIALIZABLE')
+        conexion.close()
+        conexion.ensure_connection()
+        despues = self._mostrar(conexion, 'statement_timeout'), self._mostrar(conexion, 'default_transaction_isolation')
+        self._comprobar('Los SET de la petición anterior se restablecen', (self._sesion(conexion), despues), (sesion, antes))
+        conexion.close()
+
+    def _verificar_aislamiento(self, conexion):
+        """OPTIONS['isolation_level'] rige también en las conexiones reutilizadas del pool"""
+        sesiones = []
+        for peticion in (1, 2):
+            conexion.set_autocommit(False)
+            sesiones.append(self._sesion(conexion))
+            aislamiento = self._mostrar(conexion, 'transaction_isolation')
+            conexion.rollback()
+            self._comprobar(f'Aislamiento de OPTIONS en la petición {peticion}',
+                            (aislamiento, conexion.isolation_level), ('repeatable read', IsolationLevel.REPEATABLE_READ))
+            conexion.close()
+        self._comprobar('La segunda es la conexión del pool', sesiones[1], sesiones[0])
+
+    def _verificar_fork(self, conexion):
+        """Un worker nacido por fork no usa las conexiones del pool del padre"""
+        if not hasattr(os, 'fork'):
+            self.stdout.write(self.style.WARNING('Sin os.fork en esta plataforma: se omite el pool por proceso'))
+            return
+        conexion.ensure_connection()
+        sesion_padre = self._sesion(conexion)
+        pool_padre = conexion.pool
+        # Queda libre en el pool del padre, que el hijo hereda en memoria
+        conexion.close()
+        lectura, escritura = os.pipe()
+        hijo = os.fork()
+        if hijo == 0:
+            os.close(lectura)
+            try:
+                conexion.ensure_connection()
+                resultado = f'{int(conexion.pool is not pool_padre)} {self._sesion(conexion)}'
+                # Sin devolverla al pool ni tocar la heredada del padre
+                conexion.connection.close()
+            except Exception as error:
+                resultado = f'error {error}'
+            os.write(escritura, resultado.encode())
+            os._exit(0)
+        os.close(escritura)
+        os.waitpid(hijo, 0)
+        with os.fdopen(lectura) as tuberia:
+            resultado = tuberia.read()
+        if resultado.startswith('error'):
+            raise CommandError(f'El proceso hijo falló: {resultado}')
+        pool_propio, sesion_hijo = resultado.split()
+        self._comprobar('El proceso hijo tiene su propio pool', pool_propio, '1')
+        self._comprobar('El proceso hijo abre su propia sesión', sesion_hijo != str(sesion_padre), True)
+        conexion.ensure_connection()
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self._comprobar('La conexión del padre sigue en su pool y responde',
+                            (self._sesion(conexion), cursor.fetchone()[0]), (sesion_padre, 1))
+        conexion.close()
+
+    def _sesion(self, conexion):
+        """pid del proceso del servidor: identifica la sesión de PostgreSQL"""
+        conexion.ensure_connection()
+        return conexion.connection.info.backend_pid
+
+    def _estado(self, conexion):
+        return self._estado_psycopg(conexion.connection)
+
+    def _estado_psycopg(self, psycopg):
+        extensiones = Database.extensions
+        return {
+            extensiones.TRANSACTION_STATUS_IDLE: 'IDLE',
+            extensiones.TRANSACTION_STATUS_INTRANS: 'INTRANS',
+            extensiones.TRANSACTION_STATUS_INERROR: 'INERROR',
+        }.get(psycopg.info.transaction_status, str(psycopg.info.transaction_status))
+
+    def _mostrar(self, conexion, parametro):
+        with conexion.cursor() as cursor:
+            cursor.execute(f'SHOW {parametro}')
+            return cursor.fetchone()[0]
+
+    def _comprobar(self, descripcion, obtenido, esperado):
+        if obtenido != esperado:
+            raise CommandError(f'{descripcion}: se esperaba {esperado} y se obtuvo {obtenido}')
+        self.stdout.write(f'{descripcion}: ok')
@@ -0,0 +1,123 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from gimnasio import replica
+from gimnasio.datos_prueba import base_de_datos_temporal, generar_gimnasio
+from gimnasio.models import SEDE_PRINCIPAL
+
+USUARIO = 'replica'
+
+
+class Command(BaseCommand):
+    help = (
+        'Comprueba el enrutamiento a la réplica de lectura con dos bases SQLite '
+        'temporales: la primaria y una copia que hace de réplica atrasada. Verifica '
+        'que las listas lean de la réplica, que quien acaba de escribir lea de la '
+        'primaria durante REPLICA_ADHERENCIA segundos y que, si la réplica no '
+        'responde, se lea de la primaria.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=100)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('La verificación usa archivos SQLite temporales: requiere la base SQLite por defecto')
+        originales = settings.DATABASES.get(replica.ALIAS), connections.settings.get(replica.ALIAS)
+        try:
+            with tempfile.TemporaryDirectory() as directorio, \
+                    base_de_datos_temporal(archivo=Path(directorio) / 'primaria.sqlite3'):
+                generar_gimnasio(options['clientes'], años=1)
+                User.objects.create_user(USUARIO, password=USUARIO, is_superuser=True)
+                archivo_replica = Path(directorio) / 'replica.sqlite3'
+                self._copiar(archivo_replica)
+                self._registrar_replica(archivo_replica)
+                self._verificar(Path(directorio))
+        finally:
+            self._restaurar(*originales)
+        self.stdout.write(self.style.SUCCESS('Enrutamiento a la réplica correcto'))
+
+    def _copiar(self, destino):
+        """La réplica arranca como copia exacta de la primaria; después ya no recibe cambios"""
+        connection.ensure_connection()
+        with sqlite3.connect(destino) as copia:
+            connection.connection.backup(copia)
+        copia.close()
+
+    def _registrar_replica(self, archivo):
+        base = {
+            'ENGINE': 'gimnasio.backends.sqlite3',
+            'NAME': str(archivo),
+            'TRANSACCION_INMEDIATA': False,
+        }
+        configuradas = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS], replica.ALIAS: base,
+        })
+        connections.close_all()
+        settings.DATABASES[replica.ALIAS] = connections.settings[replica.ALIAS] = configuradas[replica.ALIAS]
+        replica._caida_hasta = 0.0
+
+    def _restaurar(self, base, configurada):
+        if replica.ALIAS in connections:
+            connections[replica.ALIAS].close()
+            del connections[replica.ALIAS]
+        for destino, valor in ((settings.DATABASES, base), (connections.settings, configurada)):
+            destino.pop(replica.ALIAS, None)
+            if valor is not None:
+                destino[replica.ALIAS] = valor
+        replica._caida_hasta = 0.0
+
+    def _verificar(self, directorio):
+        # Los clientes se crean después de registrar la réplica: ReplicaMiddleware se carga en la primera petición
+        escritor, lector = Client(), Client()
+        for navegador in (escritor, lector):
+            navegador.login(username=USUARIO, password=USUARIO)
+
+        email = 'replica@verificacion.local'
+        if self._encontrados(lector, email) != 0:
+            raise CommandError('El cliente de la verificación ya existe')
+        response = escritor.post(reverse('nuevo_cliente'), {
+            'nombre': 'Réplica', 'apellidos': 'Verificación', 'telefono': '5550000000', 'email': email,
+            'sede': SEDE_PRINCIPAL,
+        }, secure=True)
+        if response.status_code != 302:
+            raise CommandError(f'El alta del cliente respondió {response.status_code}')
+        cookie = response.cookies.get(replica.COOKIE)
+        if cookie is None or int(cookie['max-age']) != settings.REPLICA_ADHERENCIA:
+            raise CommandError(f'El alta no dejó la cookie {replica.COOKIE} de {settings.REPLICA_ADHERENCIA}s')
+
+        self._comprobar('Quien escribió lee de la primaria y ve su cambio', self._encontrados(escritor, email), 1)
+        self._comprobar('Otro navegador lee de la réplica, que no tiene el cambio', self._encontrados(lector, email), 0)
+        response = lector.get(reverse('exportar_entradas'), secure=True)
+        filas = b''.join(response.streaming_content).count(b'\n')
+        self._comprobar('La exportación en streaming lee de la réplica', response.status_code, 200)
+        self.stdout.write(f'  ({filas} líneas exportadas)')
+
+        # El navegador descarta la cookie al cumplirse max-age
+        del escritor.cookies[replica.COOKIE]
+        self._comprobar('Vencida la adherencia, quien escribió vuelve a la réplica', self._encontrados(escritor, email), 0)
+
+        connections[replica.ALIAS].close()
+        connections[replica.ALIAS].settings_dict['NAME'] = str(directorio / 'no-existe' / 'replica.sqlite3')
+        self._comprobar('Con la réplica caída se lee de la primaria', self._encontrados(lector, email), 1)
+        if not replica._caida_hasta:
+            raise CommandError('La caída de la réplica no quedó registrada')
+
+    def _encontrados(self, navegador, email):
+        response = navegador.get(reverse('clientes_datos'), {'search[value]': email, 'draw': 1}, secure=True)
+        if response.status_code != 200:
+            raise CommandError(f'clientes_datos respondió {response.status_code}')
+        return response.json()['recordsFiltered']
+
+    def _comprobar(self, descripcion, obtenido, esperado):
+        if obtenido != esperado:
+            raise CommandError(f'{descripcion}: se esperaba {esperado} y se obtuvo {obtenido}')
+        self.stdout.write(f'{descripcion}: ok')
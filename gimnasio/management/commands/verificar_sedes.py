@@ -0,0 +1,164 @@
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gimnasio import cache_dashboard, views
+from gimnasio.datos_prueba import base_de_datos_temporal, generar_gimnasio
+from gimnasio.fechas import rango_mes
+from gimnasio.models import Cliente, Membresia, Pago, PerfilUsuario, RegistroEntrada, Sede
+
+DUEÑO = 'dueno'
+RECEPCION = 'recepcion'
+
+
+class Command(BaseCommand):
+    help = (
+        'Comprueba el trabajo por sedes sobre una base SQLite temporal con varias sedes: '
+        'el personal de una sede solo ve y modifica lo de su sede, la entrada se registra '
+        'en la sede de la recepción y el dashboard consolidado del dueño suma el de cada '
+        'sede. Muestra el tiempo de calcular el dashboard consolidado en serie y en paralelo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=600)
+        parser.add_argument('--sedes', type=int, default=3)
+        parser.add_argument('--hilos', type=int, default=4,
+                            help='Hilos con que se mide el dashboard consolidado en paralelo')
+
+    def handle(self, *args, **options):
+        if options['sedes'] < 2:
+            raise CommandError('Se necesitan al menos 2 sedes')
+        sin_manifiesto = override_settings(
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'
+        )
+        # En archivo: los hilos del dashboard consolidado abren su propia conexión
+        with tempfile.TemporaryDirectory() as directorio, sin_manifiesto, \
+                base_de_datos_temporal(archivo=Path(directorio) / 'sedes.sqlite3'):
+            generar_gimnasio(options['clientes'], años=1, sedes=options['sedes'])
+            propia, otra = Sede.objects.order_by('pk')[:2]
+            User.objects.create_user(DUEÑO, password=DUEÑO, is_superuser=True)
+            recepcionista = User.objects.create_user(RECEPCION, password=RECEPCION)
+            PerfilUsuario.objects.create(usuario=recepcionista, sede=propia)
+            dueño, recepcion = Client(), Client()
+            dueño.login(username=DUEÑO, password=DUEÑO)
+            recepcion.login(username=RECEPCION, password=RECEPCION)
+
+            self._verificar_alcance(recepcion, propia, otra)
+            self._verificar_entrada(recepcion, propia, otra)
+            self._verificar_kiosco(propia, otra)
+            self._verificar_dashboard(dueño, recepcion, propia)
+            self._medir_dashboard(options['hilos'])
+        self.stdout.write(self.style.SUCCESS('Trabajo por sedes correcto'))
+
+    def _verificar_alcance(self, recepcion, propia, otra):
+        response = self._get(recepcion, reverse('clientes_datos'), {'draw': 1})
+        self._comprobar(
+            'La recepción solo lista clientes de su sede',
+            response.json()['recordsTotal'], Cliente.objects.filter(sede=propia).count(),
+        )
+        ajeno = Cliente.objects.filter(sede=otra).first()
+        self._comprobar(
+            'Un cliente de otra sede no existe para la recepción',
+            recepcion.get(reverse('detalle_cliente', args=(ajeno.pk,)), secure=True).status_code, 404,
+        )
+        response = self._get(recepcion, reverse('buscar_membresias'), {'q': ajeno.nombre})
+        ids = {opcion['id'] for opcion in response.json()['results']}
+        self._comprobar(
+            'El autocompletado de membresías no ofrece las de otra sede',
+            Membresia.objects.filter(pk__in=ids).exclude(sede=propia).count(), 0,
+        )
+
+    def _verificar_entrada(self, recepcion, propia, otra):
+        # Las membresías valen en todas las sedes: la entrada queda en la sede donde se registró
+        visitante = Membresia.objects.activas(timezone.localdate()).filter(sede=otra).select_related('cliente').first()
+        if visitante is None:
+            raise CommandError('No hay membresías activas en la otra sede; use más --clientes')
+        antes = RegistroEntrada.objects.filter(sede=propia, cliente=visitante.cliente).count()
+        recepcion.post(reverse('registro_entrada'), {'contraseña': visitante.cliente.contraseña}, secure=True)
+        self._comprobar(
+            'Un cliente de otra sede entra y la entrada queda en la sede de la recepción',
+            RegistroEntrada.objects.filter(sede=propia, cliente=visitante.cliente).count(), antes + 1,
+        )
+
+    def _verificar_kiosco(self, propia, otra):
+        """Sin sesión, la entrada y la lista de últimos registros son de SEDE_RECEPCION"""
+        activas = Membresia.objects.activas(timezone.localdate()).filter(sede=propia).select_related('cliente')
+        cliente = activas.first().cliente
+        antes = RegistroEntrada.objects.filter(sede=otra, cliente=cliente).count()
+        with override_settings(SEDE_RECEPCION=otra.pk):
+            response = Client().post(reverse('registro_entrada'), {'contraseña': cliente.contraseña}, secure=True)
+        self._comprobar(
+            'En el kiosco sin sesión la entrada queda en SEDE_RECEPCION',
+            RegistroEntrada.objects.filter(sede=otra, cliente=cliente).count(), antes + 1,
+        )
+        self._comprobar(
+            'El kiosco sin sesión solo lista los últimos registros de SEDE_RECEPCION',
+            {registro.sede_id for registro in response.context['ultimos_registros']}, {otra.pk},
+        )
+
+    def _verificar_dashboard(self, dueño, recepcion, propia):
+        cache_dashboard.invalidar()
+        consolidado = self._get(dueño, reverse('dashboard')).context
+        por_sede = self._get(recepcion, reverse('dashboard')).context
+        inicio_mes, fin_mes = rango_mes(timezone.localdate())
+        ingresos = Pago.objects.filter(fecha_pago__gte=inicio_mes, fecha_pago__lt=fin_mes).aggregate(
+            total=Sum('monto')
+        )['total'] or Decimal('0')
+        self._comprobar('El consolidado cuenta los clientes de todas las sedes',
+                        consolidado['total_clientes'], Cliente.objects.count())
+        self._comprobar('El consolidado suma los ingresos del mes de todas las sedes',
+                        consolidado['ingresos_mes'], ingresos)
+        self._comprobar('El dashboard de la recepción solo cuenta su sede',
+                        por_sede['total_clientes'], Cliente.objects.filter(sede=propia).count())
+        hoy = timezone.localdate()
+        proximas = Membresia.objects.filter(fecha_fin__gte=hoy, fecha_fin__lte=hoy + timedelta(days=7), pagado=True)
+        self._comprobar('Las próximas a vencer del consolidado son las de todas las sedes',
+                        {m.pk for m in consolidado['proximas_vencer']}, set(proximas.values_list('pk', flat=True)))
+
+    def _medir_dashboard(self, hilos, rondas=5):
+        """Mediana del cálculo sin caché de todos los bloques de todas las sedes, en serie y con hilos"""
+        pares = views._pares_dashboard([sede.pk for sede in Sede.objects.all()])
+        tiempos = {}
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            for nombre, pool_medido in (('en serie', None), (f'con {hilos} hilos', pool)):
+                medidas = []
+                # La primera ronda abre las conexiones de los hilos
+                for _ in range(rondas + 1):
+                    cache_dashboard.invalidar()
+                    inicio = time.perf_counter()
+                    if pool_medido is None:
+                        for bloque, sede in pares:
+                            views._obtener_bloque(bloque, sede)
+                    else:
+                        views._calcular_bloques(pares, pool_medido)
+                    medidas.append(time.perf_counter() - inicio)
+                tiempos[nombre] = statistics.median(medidas[1:]) * 1000
+        self.stdout.write(
+            f'Dashboard consolidado sin caché ({len(pares)} bloques): '
+            + ', '.join(f'{tiempo:.1f} ms {nombre}' for nombre, tiempo in tiempos.items())
+            + f' (DASHBOARD_HILOS={settings.DASHBOARD_HILOS})'
+        )
+
+    def _get(self, navegador, url, datos=None):
+        response = navegador.get(url, datos, secure=True)
+        if response.status_code != 200:
+            raise CommandError(f'{url} respondió {response.status_code}')
+        return response
+
+    def _comprobar(self, descripcion, obtenido, esperado):
+        if obtenido != esperado:
+            raise CommandError(f'{descripcion}: se esperaba {esperado} y se obtuvo {obtenido}')
+        self.stdout.write(f'{descripcion}: ok')
@@ -0,0 +1,44 @@
+"""
+Filas del día de MetricaDiaria creadas de antemano.
+
+Las señales suman cada entrada, cliente o pago a la fila del día con un UPDATE;
+si la fila aún no existe, `MetricaDiaria.objects.sumar` la calcula completa
+(unas quince consultas) dentro de la petición que llegó primero. Para que eso no
+le toque a la primera entrada del día, cada worker de gunicorn crea las filas al
+arrancar y justo después de cada medianoche local (hilo de fondo arrancado en
+gunicorn.conf.py). Sin gunicorn, `manage.py reconstruir_metricas --preparar` hace
+lo mismo desde un cron.
+"""
+import logging
+import threading
+import time
+
+from django.db import close_old_connections, connection
+
+from .fechas import segundos_hasta_medianoche
+from .models import MetricaDiaria
+
+logger = logging.getLogger(__name__)
+
+
+def _preparar_sin_fin():
+    while True:
+        try:
+            close_old_connections()
+            creadas = MetricaDiaria.objects.preparar_dia()
+            if creadas:
+                logger.info('%s filas de MetricaDiaria creadas para hoy', creadas)
+        except Exception:
+            # p. ej. la base de datos no responde: la petición que llegue primero calcula la fila
+            logger.exception('No se pudieron preparar las métricas del día')
+        finally:
+            connection.close()
+        # Un segundo de margen para que localdate() ya sea el día siguiente
+        time.sleep(segundos_hasta_medianoche() + 1)
+
+
+def iniciar_en_segundo_plano():
+    """Prepara las filas de hoy y de cada día siguiente en un hilo de fondo del proceso actual"""
+    hilo = threading.Thread(target=_preparar_sin_fin, name='metricas-del-dia', daemon=True)
+    hilo.start()
+    return hilo
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gimnasio', '0002_cliente_contraseña'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cliente',
+            name='contraseña',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='registroentrada',
+            name='fecha_entrada',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gimnasio', '0003_indices_registro_entrada'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-fecha_registro'], name='cliente_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membresia',
+            index=models.Index(condition=models.Q(('pagado', True)), fields=['cliente', '-fecha_fin', 'fecha_inicio'], name='membresia_pagada_cli_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membresia',
+            index=models.Index(condition=models.Q(('pagado', True)), fields=['fecha_fin'], name='membresia_pagada_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago'], name='pago_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroentrada',
+            index=models.Index(fields=['cliente', '-fecha_entrada'], name='entrada_cliente_fecha_idx'),
+        ),
+    ]
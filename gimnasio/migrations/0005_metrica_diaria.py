@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gimnasio', '0004_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('entradas', models.PositiveIntegerField(default=0)),
+                ('nuevos_clientes', models.PositiveIntegerField(default=0)),
+                ('total_clientes', models.PositiveIntegerField(default=0)),
+                ('clientes_activos', models.PositiveIntegerField(blank=True, null=True)),
+                ('ingresos_efectivo', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('ingresos_tarjeta', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('ingresos_transferencia', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('membresias_activas', models.PositiveIntegerField(default=0)),
+                ('vencimientos', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Métrica diaria',
+                'verbose_name_plural': 'Métricas diarias',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
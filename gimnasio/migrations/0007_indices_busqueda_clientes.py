@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Índices para la búsqueda por prefijo sin distinguir mayúsculas (istartswith) del
+# autocompletado. La expresión indexada depende del motor porque Django genera SQL
+# distinto para istartswith:
+# - SQLite: `campo LIKE 'x%'`; LIKE ya ignora mayúsculas y solo usa un índice NOCASE.
+# - PostgreSQL: `UPPER(campo::text) LIKE UPPER('x%')`; text_pattern_ops permite
+#   usar el índice con LIKE en bases con collation distinta de C.
+# Las coincidencias por contenido (icontains) siguen recorriendo la tabla.
+CAMPOS = ('nombre', 'apellidos', 'email', 'telefono')
+
+EXPRESIONES = {
+    'sqlite': '{campo} COLLATE NOCASE',
+    'postgresql': 'UPPER({campo}::text) text_pattern_ops',
+}
+
+
+def crear_indices(apps, schema_editor):
+    expresion = EXPRESIONES.get(schema_editor.connection.vendor)
+    if expresion is None:
+        return
+    for campo in CAMPOS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS cliente_{campo}_prefijo_idx '
+            f'ON gimnasio_cliente ({expresion.format(campo=campo)})'
+        )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor not in EXPRESIONES:
+        return
+    for campo in CAMPOS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS cliente_{campo}_prefijo_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gimnasio', '0006_trabajo_exportacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,94 @@
+import hashlib
+import hmac
+import secrets
+
+from django.db import migrations, models
+from django.db.models import F
+
+LOTE = 1000
+
+# Copia congelada de gimnasio.credenciales al escribir esta migración: el módulo
+# puede cambiar después y las migraciones solo deben usar los modelos históricos.
+# Para cada longitud la permutación depende solo de la clave y los números de la
+# secuencia no se repiten, así que las contraseñas asignadas aquí no chocan con
+# las que asigne después el módulo, aunque cambie CREDENCIAL_DIGITOS.
+RONDAS = 8
+DIGITOS = 6
+
+
+def _digitos(numero):
+    digitos = DIGITOS
+    while numero >= 10 ** digitos:
+        digitos += 2
+    return digitos
+
+
+def _credencial(numero, clave):
+    digitos = _digitos(numero)
+    mitad = 10 ** (digitos // 2)
+    izquierda, derecha = divmod(numero, mitad)
+    for ronda in range(RONDAS):
+        resumen = hmac.new(clave, f'{digitos}:{ronda}:{derecha}'.encode(), hashlib.sha256).digest()
+        izquierda, derecha = derecha, (izquierda + int.from_bytes(resumen[:8], 'big')) % mitad
+    return f'{izquierda * mitad + derecha:0{digitos}d}'
+
+
+def _asignar(cantidad, SecuenciaCredenciales):
+    """Reserva `cantidad` números de la secuencia y retorna sus contraseñas"""
+    SecuenciaCredenciales.objects.filter(pk=1).update(siguiente=F('siguiente') + cantidad)
+    fila = SecuenciaCredenciales.objects.get(pk=1)
+    clave = bytes.fromhex(fila.clave)
+    return [_credencial(numero, clave) for numero in range(fila.siguiente - cantidad, fila.siguiente)]
+
+
+def reasignar_repetidas(apps, schema_editor):
+    """
+    Crea la secuencia de credenciales y da contraseña nueva a los clientes sin
+    contraseña o cuya contraseña (año + teléfono) repite la de otro cliente
+    anterior; el cliente más antiguo conserva la suya.
+    """
+    Cliente = apps.get_model('gimnasio', 'Cliente')
+    SecuenciaCredenciales = apps.get_model('gimnasio', 'SecuenciaCredenciales')
+    SecuenciaCredenciales.objects.create(pk=1, clave=secrets.token_hex(32))
+
+    vistas, reasignar = set(), []
+    for pk, contraseña in Cliente.objects.order_by('pk').values_list('pk', 'contraseña').iterator(chunk_size=LOTE):
+        if not contraseña or contraseña in vistas:
+            reasignar.append(pk)
+        else:
+            vistas.add(contraseña)
+
+    nuevas = []
+    while len(nuevas) < len(reasignar):
+        # Solo una contraseña escrita a mano podría coincidir con una asignada
+        nuevas += [c for c in _asignar(len(reasignar) - len(nuevas), SecuenciaCredenciales)
+                   if c not in vistas]
+    for inicio in range(0, len(reasignar), LOTE):
+        clientes = [
+            Cliente(pk=pk, contraseña=contraseña)
+            for pk, contraseña in zip(reasignar[inicio:inicio + LOTE], nuevas[inicio:inicio + LOTE])
+        ]
+        Cliente.objects.bulk_update(clientes, ['contraseña'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gimnasio', '0007_indices_busqueda_clientes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaCredenciales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('siguiente', models.PositiveBigIntegerField(default=0)),
+                ('clave', models.CharField(max_length=64)),
+            ],
+            options={
+                'verbose_name': 'Secuencia de credenciales',
+                'verbose_name_plural': 'Secuencia de credenciales',
+            },
+        ),
+        migrations.RunPython(reasignar_repetidas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Separada de 0008: en PostgreSQL no se puede alterar la tabla en la misma
+    # transacción que acaba de actualizar sus filas
+    dependencies = [
+        ('gimnasio', '0008_secuencia_credenciales'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cliente',
+            name='contraseña',
+            field=models.CharField(blank=True, editable=False, max_length=20, unique=True),
+        ),
+    ]
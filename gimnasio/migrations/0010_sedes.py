@@ -0,0 +1,53 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+# Igual que models.SEDE_PRINCIPAL: los datos existentes pasan a esta sede
+SEDE_PRINCIPAL = 1
+
+
+def crear_sede_principal(apps, schema_editor):
+    Sede = apps.get_model('gimnasio', 'Sede')
+    Sede.objects.create(pk=SEDE_PRINCIPAL, nombre='Principal')
+    # La pk explícita no avanza la secuencia en PostgreSQL
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Sede]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('gimnasio', '0009_contraseña_unica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sede',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Sede',
+                'verbose_name_plural': 'Sedes',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PerfilUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sede', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='personal', to='gimnasio.sede')),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='perfil_gimnasio', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil de usuario',
+                'verbose_name_plural': 'Perfiles de usuario',
+            },
+        ),
+        migrations.RunPython(crear_sede_principal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Separada de 0010: la sede principal ya existe cuando se crean las llaves foráneas
+    dependencies = [
+        ('gimnasio', '0010_sedes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='sede',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.PROTECT, related_name='clientes', to='gimnasio.sede'),
+        ),
+        migrations.AddField(
+            model_name='membresia',
+            name='sede',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.PROTECT, related_name='membresias', to='gimnasio.sede'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='pago',
+            name='sede',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.PROTECT, related_name='pagos', to='gimnasio.sede'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='registroentrada',
+            name='sede',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.PROTECT, related_name='entradas', to='gimnasio.sede'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='metricadiaria',
+            name='sede',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.PROTECT, related_name='metricas', to='gimnasio.sede'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='trabajoexportacion',
+            name='sede',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gimnasio.sede'),
+        ),
+        migrations.AlterField(
+            model_name='metricadiaria',
+            name='fecha',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='metricadiaria',
+            constraint=models.UniqueConstraint(fields=('sede', 'fecha'), name='metrica_sede_fecha_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='membresia',
+            name='membresia_pagada_fin_idx',
+        ),
+        migrations.AddIndex(
+            model_name='membresia',
+            index=models.Index(condition=models.Q(('pagado', True)), fields=['sede', 'fecha_fin'], name='membresia_sede_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['sede', '-fecha_registro'], name='cliente_sede_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['sede', 'fecha_pago'], name='pago_sede_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroentrada',
+            index=models.Index(fields=['sede', '-fecha_entrada'], name='entrada_sede_fecha_idx'),
+        ),
+    ]
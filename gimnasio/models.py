@@ -1,9 +1,176 @@
 import logging
-from django.db import models
+import random
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, NullIf
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from . import credenciales
+from .fechas import rango_dia
+
 logger = logging.getLogger(__name__)
+# Diagnóstico detallado con consultas extra (p. ej. todas las membresías del cliente):
+# apagado salvo que se active LOG_TRAZAS=DEBUG, y muestreado con TRAZAS_MUESTREO
+trazas = logging.getLogger('gimnasio.trazas')
+
+
+def _trazar():
+    """Decide si esta llamada registra el diagnóstico detallado"""
+    if not trazas.isEnabledFor(logging.DEBUG):
+        return False
+    from django.conf import settings
+
+    return random.random() < getattr(settings, 'TRAZAS_MUESTREO', 1.0)
+
+
+class DiasEntre(models.Func):
+    """Días transcurridos entre dos fechas (fecha_a - fecha_b) calculados en SQL"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            function='DATEDIFF', template='%(function)s(%(expressions)s)', arg_joiner=', ',
+            **extra_context
+        )
+
+
+# La crea la migración 0010; sede de los clientes dados de alta sin indicar otra
+SEDE_PRINCIPAL = 1
+
+
+class Sede(models.Model):
+    """Sucursal del gimnasio; clientes, membresías, pagos, entradas y métricas llevan la suya"""
+    nombre = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.nombre
+
+    class Meta:
+        verbose_name = "Sede"
+        verbose_name_plural = "Sedes"
+        ordering = ['nombre']
+
+
+class PerfilUsuario(models.Model):
+    """Sede del personal: sus vistas solo muestran esa sede. Sin sede (dueños) se ven todas"""
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, related_name='perfil_gimnasio')
+    sede = models.ForeignKey(Sede, on_delete=models.PROTECT, null=True, blank=True, related_name='personal')
+
+    def __str__(self):
+        return f"{self.usuario} ({self.sede or 'todas las sedes'})"
+
+    class Meta:
+        verbose_name = "Perfil de usuario"
+        verbose_name_plural = "Perfiles de usuario"
+
+
+class SedeQuerySet(models.QuerySet):
+    def de_sede(self, sede):
+        """Filas de la sede indicada (instancia o id); con None, las de todas las sedes"""
+        return self if sede is None else self.filter(sede=sede)
+
+
+class ClienteQuerySet(SedeQuerySet):
+    def con_estado_membresia(self, hoy=None):
+        """
+        Anota en una sola consulta el estado de membresía de cada cliente:
+        membresía activa, última membresía pagada, días restantes/vencida y tipo.
+        """
+        if hoy is None:
+            hoy = timezone.localdate()
+        fecha_hoy = Value(hoy, output_field=models.DateField())
+
+        activas = Membresia.objects.activas(hoy).filter(cliente=OuterRef('pk')).order_by('-fecha_fin')
+        pagadas = Membresia.objects.filter(
+            cliente=OuterRef('pk'),
+            pagado=True
+        ).order_by('-fecha_fin')
+
+        return self.annotate(
+            membresia_activa_id=Subquery(activas.values('pk')[:1]),
+            fecha_inicio_activa=Subquery(activas.values('fecha_inicio')[:1]),
+            fecha_fin_activa=Subquery(activas.values('fecha_fin')[:1]),
+            ultima_fecha_fin=Subquery(pagadas.values('fecha_fin')[:1]),
+            tipo=Coalesce(
+                Subquery(activas.values('tipo')[:1]),
+                Subquery(pagadas.values('tipo')[:1])
+            ),
+        ).annotate(
+            es_activa=Exists(activas),
+            fecha_vencimiento=Coalesce('fecha_fin_activa', 'ultima_fecha_fin'),
+            dias_restantes=Coalesce(DiasEntre(F('fecha_fin_activa'), fecha_hoy), Value(0)),
+            # Solo positivo si la última membresía pagada ya venció (y por tanto no hay una activa)
+            dias_vencida=NullIf(Greatest(DiasEntre(fecha_hoy, F('ultima_fecha_fin')), Value(0)), Value(0)),
+        )
+
+    def sincronizar_activo(self, hoy=None):
+        """Corrige el campo activo con dos UPDATE en bloque. Retorna las filas modificadas"""
+        if hoy is None:
+            hoy = timezone.localdate()
+        activas = Membresia.objects.activas(hoy).filter(cliente=OuterRef('pk'))
+        activados = self.filter(activo=False).filter(Exists(activas)).update(activo=True)
+        desactivados = self.filter(activo=True).exclude(Exists(activas)).update(activo=False)
+        return activados + desactivados
+
+
+_recalculo = threading.local()
+
+
+@contextmanager
+def recalcular_activo_al_confirmar():
+    """
+    Unidad de trabajo para altas/cambios de membresías: dentro del bloque (una
+    transacción) Membresia.save() solo anota el cliente afectado y `activo` se
+    sincroniza una vez, con UPDATE en bloque, cuando la transacción se confirma.
+    """
+    if getattr(_recalculo, 'clientes', None) is not None:
+        # Bloque anidado: los clientes se acumulan en el exterior
+        yield
+        return
+
+    _recalculo.clientes = clientes = set()
+    try:
+        with transaction.atomic():
+            yield
+            if clientes:
+                transaction.on_commit(lambda: _sincronizar_clientes(clientes))
+    finally:
+        _recalculo.clientes = None
+
+
+def _diferir_recalculo(cliente_id):
+    """Anota el cliente si hay un recálculo diferido en curso; retorna si se difirió"""
+    clientes = getattr(_recalculo, 'clientes', None)
+    if clientes is None:
+        return False
+    clientes.add(cliente_id)
+    return True
+
+
+def _sincronizar_clientes(ids):
+    # Los UPDATE en bloque no disparan señales: métricas y caché del dashboard a mano
+    if Cliente.objects.filter(pk__in=ids).sincronizar_activo():
+        from . import cache_dashboard
+
+        MetricaDiaria.objects.actualizar_clientes_activos()
+        cache_dashboard.invalidar('metricas')
+
 
 class Cliente(models.Model):
     TIPO_MEMBRESIA = [
@@ -14,18 +181,30 @@ class Cliente(models.Model):
     ]
     
     usuario = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
+    # Sin índice propio: los índices de las consultas por sede empiezan por ella
+    sede = models.ForeignKey(
+        Sede, on_delete=models.PROTECT, default=SEDE_PRINCIPAL, related_name='clientes', db_index=False
+    )
     nombre = models.CharField(max_length=100)
     apellidos = models.CharField(max_length=100)
     telefono = models.CharField(max_length=15)
     email = models.EmailField(unique=True)
     fecha_registro = models.DateTimeField(default=timezone.now)
     activo = models.BooleanField(default=True)
-    contraseña = models.CharField(max_length=20, blank=True, editable=False) 
+    # Única: la asigna gimnasio/credenciales.py y el registro de entradas la busca con get()
+    contraseña = models.CharField(max_length=20, blank=True, editable=False, unique=True)
+
+    objects = ClienteQuerySet.as_manager()
     
+    @property
+    def tipo_membresia(self):
+        """Nombre del tipo de membresía anotado por `con_estado_membresia`"""
+        return dict(self.TIPO_MEMBRESIA).get(getattr(self, 'tipo', None))
+
     def get_membresia_activa(self):
         """Retorna la membresía activa del cliente si existe"""
-        hoy = timezone.now().date()
-        logger.debug(f"Buscando membresía activa para cliente {self.id} - Fecha actual: {hoy}")
+        hoy = timezone.localdate()
+        logger.debug("Buscando membresía activa para cliente %s - Fecha actual: %s", self.id, hoy)
         
         membresia = self.membresias.filter(
             fecha_inicio__lte=hoy,
@@ -34,22 +213,30 @@ class Cliente(models.Model):
         ).first()
         
         if membresia:
-            logger.debug(f"Membresía activa encontrada: ID={membresia.id}, del {membresia.fecha_inicio} al {membresia.fecha_fin}")
+            logger.debug(
+                "Membresía activa encontrada: ID=%s, del %s al %s",
+                membresia.id, membresia.fecha_inicio, membresia.fecha_fin
+            )
         else:
             logger.debug("No se encontró membresía activa")
             
-            # DEBUG: Mostrar todas las membresías del cliente para verificar
-            todas = self.membresias.all()
-            logger.debug(f"Total membresías del cliente: {todas.count()}")
-            for m in todas:
-                logger.debug(f"  - Membresía ID={m.id}: {m.fecha_inicio} a {m.fecha_fin}, pagado={m.pagado}, activa hoy={m.fecha_inicio <= hoy <= m.fecha_fin and m.pagado}")
+            # Mostrar todas las membresías del cliente para verificar (solo con trazas activas)
+            if _trazar():
+                todas = list(self.membresias.all())
+                trazas.debug("Total membresías del cliente %s: %s", self.id, len(todas))
+                for m in todas:
+                    trazas.debug(
+                        "  - Membresía ID=%s: %s a %s, pagado=%s, activa hoy=%s",
+                        m.id, m.fecha_inicio, m.fecha_fin, m.pagado,
+                        m.fecha_inicio <= hoy <= m.fecha_fin and m.pagado
+                    )
         
         return membresia
     
     def tiene_membresia_activa(self):
         """Verifica si el cliente tiene una membresía activa"""
         resultado = self.get_membresia_activa() is not None
-        logger.debug(f"Cliente {self.id} - ¿Tiene membresía activa?: {resultado}")
+        logger.debug("Cliente %s - ¿Tiene membresía activa?: %s", self.id, resultado)
         return resultado
     
     def actualizar_estado_activo(self):
@@ -58,30 +245,15 @@ class Cliente(models.Model):
         self.activo = self.tiene_membresia_activa()
         
         if estado_anterior != self.activo:
-            logger.debug(f"Cliente {self.id} - Estado cambiado: {estado_anterior} -> {self.activo}")
+            logger.debug("Cliente %s - Estado cambiado: %s -> %s", self.id, estado_anterior, self.activo)
             self.save(update_fields=['activo'])
         else:
-            logger.debug(f"Cliente {self.id} - Estado sin cambios: {self.activo}")
+            logger.debug("Cliente %s - Estado sin cambios: %s", self.id, self.activo)
 
         
     def generar_contraseña(self):
-        """Genera una contraseña con formato: últimos 2 dígitos del año + últimos 3 dígitos del teléfono"""
-        from datetime import datetime
-        
-        # Obtener últimos 2 dígitos del año actual
-        año_actual = datetime.now().year
-        ultimos_2_año = str(año_actual)[-2:]
-        
-        # Obtener últimos 3 dígitos del teléfono (limpiando el número)
-        telefono_limpio = ''.join(filter(str.isdigit, self.telefono))
-        if len(telefono_limpio) >= 3:
-            ultimos_3_telefono = telefono_limpio[-3:]
-        else:
-            # Si el teléfono tiene menos de 3 dígitos, rellenar con ceros
-            ultimos_3_telefono = telefono_limpio.zfill(3)
-        
-        # Generar contraseña
-        self.contraseña = f"{ultimos_2_año}{ultimos_3_telefono}"
+        """Asigna una contraseña de entrada nueva, única en toda la base de datos"""
+        self.contraseña = credenciales.asignar()[0]
         return self.contraseña
     
     def save(self, *args, **kwargs):
@@ -96,50 +268,90 @@ class Cliente(models.Model):
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
+        indexes = [
+            # Orden de la lista de clientes (todas las sedes y una sede)
+            models.Index(fields=['-fecha_registro'], name='cliente_registro_idx'),
+            models.Index(fields=['sede', '-fecha_registro'], name='cliente_sede_registro_idx'),
+            # Clientes activos de la sede en las métricas del día
+            models.Index(fields=['sede', 'activo'], name='cliente_sede_activo_idx'),
+        ]
+        # Los índices de búsqueda por prefijo dependen del motor: migración 0007
+
+class MembresiaQuerySet(SedeQuerySet):
+    def activas(self, hoy=None):
+        """Membresías pagadas vigentes en la fecha indicada (hoy por defecto)"""
+        if hoy is None:
+            hoy = timezone.localdate()
+        return self.filter(fecha_inicio__lte=hoy, fecha_fin__gte=hoy, pagado=True)
 
 class Membresia(models.Model):
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='membresias')
+    # La del cliente (ver save): copiada para filtrar por sede sin unir con Cliente
+    sede = models.ForeignKey(Sede, on_delete=models.PROTECT, related_name='membresias', db_index=False)
     tipo = models.CharField(max_length=20, choices=Cliente.TIPO_MEMBRESIA)
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
     costo = models.DecimalField(max_digits=10, decimal_places=2)
     pagado = models.BooleanField(default=False)
+
+    objects = MembresiaQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.cliente} - {self.tipo} ({self.fecha_inicio} a {self.fecha_fin})"
     
     @property
     def dias_restantes(self):
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         if self.fecha_fin and self.fecha_fin >= hoy:
             dias = (self.fecha_fin - hoy).days
-            logger.debug(f"Membresía {self.id} - Días restantes: {dias}")
+            logger.debug("Membresía %s - Días restantes: %s", self.id, dias)
             return dias
-        logger.debug(f"Membresía {self.id} - Días restantes: 0 (vencida)")
+        logger.debug("Membresía %s - Días restantes: 0 (vencida)", self.id)
         return 0
     
     @property
     def esta_activa(self):
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         activa = self.pagado and self.fecha_inicio <= hoy <= self.fecha_fin
-        logger.debug(f"Membresía {self.id} - ¿Está activa?: {activa}")
+        logger.debug("Membresía %s - ¿Está activa?: %s", self.id, activa)
         return activa
     
     @property
     def esta_vencida(self):
         """Verifica si la membresía está vencida"""
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         return self.fecha_fin < hoy
     
     def save(self, *args, **kwargs):
         """Sobrescribimos save para actualizar el estado del cliente"""
+        if self.sede_id is None:
+            self.sede_id = self.cliente.sede_id
         super().save(*args, **kwargs)
-        # Actualizar el estado activo del cliente
-        self.cliente.actualizar_estado_activo()
+        # Actualizar el estado activo del cliente (al confirmar, si se difirió)
+        if not _diferir_recalculo(self.cliente_id):
+            self.cliente.actualizar_estado_activo()
     
     class Meta:
         verbose_name = "Membresía"
         verbose_name_plural = "Membresías"
+        indexes = [
+            # Membresía activa / última pagada por cliente (entradas, lista y detalle)
+            models.Index(
+                fields=['cliente', '-fecha_fin', 'fecha_inicio'],
+                name='membresia_pagada_cli_idx',
+                condition=models.Q(pagado=True)
+            ),
+            # Próximas a vencer, vencidas y activas por sede en el dashboard
+            models.Index(
+                fields=['sede', 'fecha_fin'],
+                name='membresia_sede_fin_idx',
+                condition=models.Q(pagado=True)
+            ),
+        ]
+
+class PagoQuerySet(SedeQuerySet):
+    pass
+
 
 class Pago(models.Model):
     METODO_PAGO = [
@@ -149,26 +361,325 @@ class Pago(models.Model):
     ]
     
     membresia = models.ForeignKey(Membresia, on_delete=models.CASCADE, related_name='pagos')
+    # La de la membresía (ver save)
+    sede = models.ForeignKey(Sede, on_delete=models.PROTECT, related_name='pagos', db_index=False)
     fecha_pago = models.DateTimeField(default=timezone.now)
     monto = models.DecimalField(max_digits=10, decimal_places=2)
     metodo = models.CharField(max_length=20, choices=METODO_PAGO)
     comprobante = models.FileField(upload_to='comprobantes/', null=True, blank=True)
+
+    objects = PagoQuerySet.as_manager()
     
     def __str__(self):
         return f"Pago {self.membresia} - {self.monto}"
+
+    def save(self, *args, **kwargs):
+        if self.sede_id is None:
+            self.sede_id = self.membresia.sede_id
+        super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "Pago"
         verbose_name_plural = "Pagos"
+        indexes = [
+            # Ingresos por periodo (todas las sedes y una sede)
+            models.Index(fields=['fecha_pago'], name='pago_fecha_idx'),
+            models.Index(fields=['sede', 'fecha_pago'], name='pago_sede_fecha_idx'),
+        ]
+
+class RegistroEntradaQuerySet(SedeQuerySet):
+    def con_membresia_activa(self):
+        """Anota si el cliente tenía una membresía pagada vigente el día de cada entrada"""
+        vigentes = Membresia.objects.filter(
+            cliente=OuterRef('cliente'),
+            fecha_inicio__lte=OuterRef('fecha_entrada__date'),
+            fecha_fin__gte=OuterRef('fecha_entrada__date'),
+            pagado=True
+        )
+        return self.annotate(membresia_activa=Exists(vigentes))
+
+    def con_ultima_membresia(self):
+        """Anota inicio, fin y estado de pago de la membresía más reciente del cliente"""
+        ultima = Membresia.objects.filter(cliente=OuterRef('cliente')).order_by('-fecha_inicio')
+        return self.annotate(
+            ultima_membresia_inicio=Subquery(ultima.values('fecha_inicio')[:1]),
+            ultima_membresia_fin=Subquery(ultima.values('fecha_fin')[:1]),
+            ultima_membresia_pagado=Subquery(ultima.values('pagado')[:1]),
+        )
 
 class RegistroEntrada(models.Model):
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='entradas')
-    fecha_entrada = models.DateTimeField(default=timezone.now)
+    # Donde se registró la entrada; por defecto la del cliente (ver save)
+    sede = models.ForeignKey(Sede, on_delete=models.PROTECT, related_name='entradas', db_index=False)
+    fecha_entrada = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = RegistroEntradaQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.cliente} - {self.fecha_entrada.strftime('%Y-%m-%d %H:%M')}"
+
+    def save(self, *args, **kwargs):
+        if self.sede_id is None:
+            self.sede_id = self.cliente.sede_id
+        super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "Registro de Entrada"
         verbose_name_plural = "Registros de Entrada"
-        ordering = ['-fecha_entrada']
\ No newline at end of file
+        ordering = ['-fecha_entrada']
+        indexes = [
+            # Historial y últimas entradas de un cliente
+            models.Index(fields=['cliente', '-fecha_entrada'], name='entrada_cliente_fecha_idx'),
+            # Historial, últimas entradas y entradas del día de una sede
+            models.Index(fields=['sede', '-fecha_entrada'], name='entrada_sede_fecha_idx'),
+        ]
+
+
+class MetricaDiariaQuerySet(models.QuerySet):
+    def sumar(self, sede_id, fecha, **incrementos):
+        """
+        Suma los incrementos al día de la sede con un UPDATE. Si aún no existe la fila
+        (no la creó `preparar_dia`), la calcula completa.
+        """
+        actualizadas = self.filter(sede_id=sede_id, fecha=fecha).update(
+            **{campo: F(campo) + valor for campo, valor in incrementos.items()}
+        )
+        if not actualizadas:
+            self.refrescar(fecha, sede_id)
+
+    def preparar_dia(self, fecha=None):
+        """
+        Crea (calculadas completas) las filas del día que aún no tienen las sedes, para
+        que la primera entrada o pago del día sea un solo UPDATE en `sumar`.
+        Retorna cuántas creó.
+        """
+        if fecha is None:
+            fecha = timezone.localdate()
+        con_fila = self.filter(fecha=fecha).values('sede')
+        sedes = list(Sede.objects.exclude(pk__in=con_fila).values_list('pk', flat=True))
+        for sede_id in sedes:
+            self.refrescar(fecha, sede_id)
+        return len(sedes)
+
+    def actualizar_clientes_activos(self):
+        """
+        Recuenta clientes_activos en las filas de hoy de todas las sedes con un solo
+        UPDATE (Cliente.activo solo refleja el presente)
+        """
+        activos = Cliente.objects.filter(sede=OuterRef('sede'), activo=True).order_by().values('sede').annotate(
+            total=Count('pk')
+        ).values('total')
+        return self.filter(fecha=timezone.localdate()).update(
+            clientes_activos=Coalesce(Subquery(activos), Value(0))
+        )
+
+    def consultas_del_dia(self, fecha, sede_id):
+        """Querysets sin evaluar con que `refrescar` calcula las métricas de un día de una sede"""
+        inicio, fin = rango_dia(fecha)
+        clientes = Cliente.objects.filter(sede_id=sede_id)
+        return {
+            'entradas': RegistroEntrada.objects.filter(
+                sede_id=sede_id, fecha_entrada__gte=inicio, fecha_entrada__lt=fin
+            ),
+            'nuevos_clientes': clientes.filter(fecha_registro__gte=inicio, fecha_registro__lt=fin),
+            'total_clientes': clientes.filter(fecha_registro__lt=fin),
+            'clientes_activos': clientes.filter(activo=True),
+            'ingresos': Pago.objects.filter(sede_id=sede_id, fecha_pago__gte=inicio, fecha_pago__lt=fin)
+            .values('metodo').annotate(total=Sum('monto')),
+            'membresias_activas': Membresia.objects.filter(sede_id=sede_id).activas(fecha),
+            'vencimientos': Membresia.objects.filter(sede_id=sede_id, fecha_fin=fecha, pagado=True),
+        }
+
+    def refrescar(self, fecha, sede_id, campos=None):
+        """
+        Recalcula desde las tablas transaccionales las métricas de un día (fecha local)
+        de una sede. `campos` limita el cálculo a los grupos indicados y actualiza la
+        fila existente con un solo UPDATE (retorna None); por defecto calcula todo y
+        retorna la fila.
+        """
+        consultas = self.consultas_del_dia(fecha, sede_id)
+        calculos = {
+            'entradas': lambda: {'entradas': consultas['entradas'].count()},
+            'clientes': lambda: {
+                'nuevos_clientes': consultas['nuevos_clientes'].count(),
+                'total_clientes': consultas['total_clientes'].count(),
+            },
+            'ingresos': lambda: self._ingresos_por_metodo(consultas['ingresos']),
+            'membresias': lambda: {
+                'membresias_activas': consultas['membresias_activas'].count(),
+                'vencimientos': consultas['vencimientos'].count(),
+            },
+        }
+        valores = {}
+        for grupo in (campos or calculos):
+            valores.update(calculos[grupo]())
+        if fecha == timezone.localdate() and (campos is None or 'clientes' in campos):
+            valores['clientes_activos'] = consultas['clientes_activos'].count()
+
+        if campos is not None:
+            if self.filter(sede_id=sede_id, fecha=fecha).update(actualizado=timezone.now(), **valores):
+                return None
+            # El día aún no tiene fila: se calcula completa
+            return self.refrescar(fecha, sede_id)
+
+        metrica, _ = self.update_or_create(sede_id=sede_id, fecha=fecha, defaults=valores)
+        return metrica
+
+    @staticmethod
+    def _ingresos_por_metodo(filas):
+        valores = {f'ingresos_{metodo}': Decimal('0') for metodo, _ in Pago.METODO_PAGO}
+        for fila in filas:
+            valores[f'ingresos_{fila["metodo"]}'] = fila['total'] or Decimal('0')
+        return valores
+
+
+class MetricaDiaria(models.Model):
+    """
+    Resumen por día (fecha local) y sede de la actividad del gimnasio para el dashboard.
+
+    Se mantiene de forma incremental con las señales de `gimnasio.signals`;
+    `manage.py reconstruir_metricas` lo recalcula completo (p. ej. tras cargas
+    masivas con bulk_create, que no disparan señales).
+    """
+    # Campos que se suman al combinar las métricas de varias sedes
+    CAMPOS_SUMABLES = (
+        'entradas', 'nuevos_clientes', 'total_clientes', 'membresias_activas', 'vencimientos',
+        'ingresos_efectivo', 'ingresos_tarjeta', 'ingresos_transferencia',
+    )
+
+    sede = models.ForeignKey(Sede, on_delete=models.PROTECT, related_name='metricas', db_index=False)
+    fecha = models.DateField()
+    entradas = models.PositiveIntegerField(default=0)
+    nuevos_clientes = models.PositiveIntegerField(default=0)
+    total_clientes = models.PositiveIntegerField(default=0)
+    # Solo se conoce para el día en que se registró (depende del campo Cliente.activo)
+    clientes_activos = models.PositiveIntegerField(null=True, blank=True)
+    ingresos_efectivo = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    ingresos_tarjeta = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    ingresos_transferencia = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    membresias_activas = models.PositiveIntegerField(default=0)
+    vencimientos = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    objects = MetricaDiariaQuerySet.as_manager()
+
+    @property
+    def ingresos_total(self):
+        return self.ingresos_efectivo + self.ingresos_tarjeta + self.ingresos_transferencia
+
+    def __str__(self):
+        return f"Métricas {self.fecha}"
+
+    class Meta:
+        verbose_name = "Métrica diaria"
+        verbose_name_plural = "Métricas diarias"
+        ordering = ['-fecha']
+        constraints = [
+            # También el índice de la tendencia de una sede
+            models.UniqueConstraint(fields=['sede', 'fecha'], name='metrica_sede_fecha_uniq'),
+        ]
+
+
+class TrabajoExportacionQuerySet(models.QuerySet):
+    def tomar_siguiente(self):
+        """
+        Reserva el trabajo pendiente más antiguo y lo retorna, o None si no hay.
+        El UPDATE condicionado al estado evita que dos workers tomen el mismo.
+        """
+        while True:
+            pk = self.filter(estado='pendiente').order_by('creado').values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            tomado = self.filter(pk=pk, estado='pendiente').update(
+                estado='procesando', iniciado=timezone.now()
+            )
+            if tomado:
+                return self.get(pk=pk)
+
+    def reclamar_abandonados(self, segundos):
+        """
+        Devuelve a la cola los trabajos en proceso desde hace más de `segundos` (su
+        worker murió o se reinició). Los más recientes pueden estar en un worker vivo
+        y no se tocan. Retorna cuántos se devolvieron.
+        """
+        limite = timezone.now() - timedelta(seconds=segundos)
+        return self.filter(estado='procesando', iniciado__lt=limite).update(
+            estado='pendiente', procesadas=0, iniciado=None
+        )
+
+
+class TrabajoExportacion(models.Model):
+    """Exportación en cola; la genera `gimnasio.trabajos` fuera de la petición web"""
+    DATOS = [
+        ('clientes', 'Clientes'),
+        ('membresias', 'Membresías'),
+        ('pagos', 'Pagos'),
+        ('entradas', 'Entradas'),
+    ]
+
+    FORMATOS = [
+        ('xlsx', 'Excel'),
+        ('csv', 'CSV'),
+    ]
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('terminado', 'Terminado'),
+        ('error', 'Error'),
+    ]
+
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Sede de quien la pidió; sin sede, los datos de todas
+    sede = models.ForeignKey(Sede, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    datos = models.CharField(max_length=20, choices=DATOS)
+    formato = models.CharField(max_length=4, choices=FORMATOS, default='xlsx')
+    fecha_inicio = models.DateField(null=True, blank=True)
+    fecha_fin = models.DateField(null=True, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    total = models.PositiveIntegerField(default=0)
+    procesadas = models.PositiveIntegerField(default=0)
+    archivo = models.FileField(upload_to='exportaciones/', null=True, blank=True)
+    error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    objects = TrabajoExportacionQuerySet.as_manager()
+
+    @property
+    def progreso(self):
+        """Porcentaje de filas escritas"""
+        if self.estado == 'terminado':
+            return 100
+        if not self.total:
+            return 0
+        return min(int(self.procesadas * 100 / self.total), 99)
+
+    @property
+    def nombre_archivo(self):
+        return f'{self.datos}_{self.creado:%Y%m%d_%H%M%S}.{self.formato}'
+
+    def __str__(self):
+        return f"Exportación de {self.get_datos_display()} ({self.get_estado_display()})"
+
+    class Meta:
+        verbose_name = "Trabajo de exportación"
+        verbose_name_plural = "Trabajos de exportación"
+        ordering = ['-creado']
+        indexes = [
+            models.Index(fields=['estado', 'creado'], name='trabajo_estado_idx'),
+        ]
+
+
+class SecuenciaCredenciales(models.Model):
+    """Contador y clave de la permutación de gimnasio/credenciales.py (una sola fila)"""
+    siguiente = models.PositiveBigIntegerField(default=0)
+    clave = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"Secuencia de credenciales ({self.siguiente} asignadas)"
+
+    class Meta:
+        verbose_name = "Secuencia de credenciales"
+        verbose_name_plural = "Secuencia de credenciales"
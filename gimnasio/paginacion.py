@@ -0,0 +1,102 @@
+"""
+Paginación por cursor (keyset) sobre (campo de fecha, id) en orden descendente.
+
+A diferencia de OFFSET, el costo de cada página no crece con la posición:
+la consulta arranca desde el último registro visto usando el índice.
+
+También PaginadorEstimado, para listas sin filtros sobre tablas grandes (admin).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def codificar_cursor(fecha, pk):
+    microsegundos = (fecha - EPOCH) // timedelta(microseconds=1)
+    return f'{microsegundos}_{pk}'
+
+
+def decodificar_cursor(valor):
+    """Retorna (fecha, pk) o None si el cursor está vacío o es inválido"""
+    try:
+        microsegundos, pk = valor.split('_')
+        return EPOCH + timedelta(microseconds=int(microsegundos)), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def consulta_keyset(queryset, campo, cursor, tamaño):
+    """
+    Queryset de la página que sigue a `cursor`, ordenado por `campo` e id descendentes,
+    con un registro de más para saber si hay página siguiente.
+    """
+    queryset = queryset.order_by(f'-{campo}', '-pk')
+    posicion = decodificar_cursor(cursor)
+    if posicion:
+        fecha, pk = posicion
+        queryset = queryset.filter(Q(**{f'{campo}__lt': fecha}) | Q(**{campo: fecha, 'pk__lt': pk}))
+    return queryset[:tamaño + 1]
+
+
+def pagina_keyset(queryset, campo, cursor, tamaño):
+    """
+    Retorna (registros, siguiente_cursor) de la página que sigue a `cursor`,
+    ordenando por `campo` e id descendentes. `siguiente_cursor` es None en la última página.
+    """
+    registros = list(consulta_keyset(queryset, campo, cursor, tamaño))
+    siguiente = None
+    if len(registros) > tamaño:
+        registros = registros[:tamaño]
+        ultimo = registros[-1]
+        siguiente = codificar_cursor(getattr(ultimo, campo), ultimo.pk)
+    return registros, siguiente
+
+
+def estimar_total(queryset):
+    """
+    Filas estimadas de la tabla de un queryset sin filtros, según las
+    estadísticas de la base de datos (reltuples en PostgreSQL, sqlite_stat1 en
+    SQLite tras ANALYZE). None si hay filtros o no hay estadísticas.
+    """
+    if queryset.query.where:
+        return None
+    conexion = connections[queryset.db]
+    tabla = queryset.model._meta.db_table
+    try:
+        with conexion.cursor() as cursor:
+            if conexion.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [tabla])
+            elif conexion.vendor == 'sqlite':
+                # La primera cifra de `stat` es el número de filas del índice (o de la tabla)
+                cursor.execute('SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s', [tabla])
+            else:
+                return None
+            fila = cursor.fetchone()
+    except DatabaseError:
+        # SQLite sin ANALYZE previo no tiene sqlite_stat1
+        return None
+    # reltuples es -1 en tablas nunca analizadas
+    if not fila or fila[0] is None or fila[0] < 0:
+        return None
+    return int(fila[0])
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginator que, sin filtros y en tablas de más de `umbral` filas, usa el
+    total estimado en lugar de COUNT(*), que recorre la tabla en cada página.
+    Con filtros cuenta exacto: los filtros usan índices y reducen el conteo.
+    """
+    umbral = 100_000
+
+    @cached_property
+    def count(self):
+        estimado = estimar_total(self.object_list)
+        if estimado is None or estimado < self.umbral:
+            return self.object_list.count()
+        return estimado
@@ -0,0 +1,147 @@
+"""
+Réplica de solo lectura para los reportes y las listas (DATABASE_REPLICA_URL).
+
+Las vistas pesadas de lectura se marcan con `usar_replica`; mientras se ejecutan
+(y mientras se genera su respuesta en streaming) EnrutadorReplica manda las
+lecturas a la réplica. Todo lo demás, y toda escritura, va a la primaria.
+
+- Leer lo propio: tras una petición que escribe (POST, etc.) ReplicaMiddleware
+  deja una cookie de REPLICA_ADHERENCIA segundos y, mientras exista, ese
+  navegador lee de la primaria aunque la réplica vaya atrasada.
+- Sin réplica configurada, o si no se puede conectar a ella, se lee de la
+  primaria; tras un fallo no se reintenta hasta pasados REINTENTO segundos.
+
+`manage.py verificar_replica` comprueba todo con dos bases SQLite locales.
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+ALIAS = 'replica'
+COOKIE = 'leer_primaria'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+# Segundos sin intentar conectar a la réplica después de un fallo
+REINTENTO = 30
+
+_leer_de_replica = ContextVar('leer_de_replica', default=False)
+_caida_hasta = 0.0
+
+
+def replica_disponible():
+    """True si hay réplica configurada y se puede conectar a ella"""
+    global _caida_hasta
+    if ALIAS not in settings.DATABASES or time.monotonic() < _caida_hasta:
+        return False
+    try:
+        connections[ALIAS].ensure_connection()
+    except DatabaseError as error:
+        logger.warning('Réplica no disponible (%s); se lee de la primaria durante %ss', error, REINTENTO)
+        _caida_hasta = time.monotonic() + REINTENTO
+        return False
+    return True
+
+
+@contextmanager
+def en_replica():
+    """Dentro del bloque las lecturas van a la réplica, si hay una disponible"""
+    if not replica_disponible():
+        yield
+        return
+    token = _leer_de_replica.set(True)
+    try:
+        yield
+    finally:
+        _leer_de_replica.reset(token)
+
+
+def _iterar_en_replica(contenido):
+    # El contenido en streaming se genera después de que la vista retorna
+    contenido = iter(contenido)
+    while True:
+        token = _leer_de_replica.set(True)
+        try:
+            parte = next(contenido)
+        except StopIteration:
+            return
+        finally:
+            _leer_de_replica.reset(token)
+        yield parte
+
+
+def _puede_leer_de_replica(request):
+    return request.method in METODOS_SEGUROS and COOKIE not in request.COOKIES
+
+
+def usar_replica(vista):
+    """Las lecturas de la vista van a la réplica, salvo si el navegador acaba de escribir"""
+    if asyncio.iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            if not (_puede_leer_de_replica(request) and await sync_to_async(replica_disponible)()):
+                return await vista(request, *args, **kwargs)
+            # sync_to_async copia el contexto: los hilos de la vista también leen de la réplica
+            token = _leer_de_replica.set(True)
+            try:
+                return await vista(request, *args, **kwargs)
+            finally:
+                _leer_de_replica.reset(token)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not _puede_leer_de_replica(request):
+            return vista(request, *args, **kwargs)
+        with en_replica():
+            response = vista(request, *args, **kwargs)
+            replica = _leer_de_replica.get()
+        if replica and response.streaming:
+            response.streaming_content = _iterar_en_replica(response.streaming_content)
+        return response
+    return envoltura
+
+
+class EnrutadorReplica:
+    def db_for_read(self, model, **hints):
+        return ALIAS if _leer_de_replica.get() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explícito: sin esto Django escribiría un objeto leído de la réplica en la réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las dos bases tienen las mismas filas (con retraso)
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación
+        return False if db == ALIAS else None
+
+
+class ReplicaMiddleware:
+    """Tras una petición que escribe, el navegador lee de la primaria REPLICA_ADHERENCIA segundos"""
+
+    def __init__(self, get_response):
+        if ALIAS not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in METODOS_SEGUROS:
+            response.set_cookie(
+                COOKIE, '1', max_age=settings.REPLICA_ADHERENCIA, httponly=True,
+                secure=settings.SESSION_COOKIE_SECURE, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,115 @@
+"""
+Sede con la que se filtran las consultas de cada petición.
+
+- El personal con sede (PerfilUsuario.sede) solo ve la suya y no puede cambiarla.
+- Quien no tiene sede (dueños, administración) ve todas, o la que elija en el
+  menú; la elección se guarda en la sesión.
+- El kiosco de registro de entradas siempre trabaja en una sede: la de la
+  sesión o, sin ella, SEDE_RECEPCION.
+
+La sede de cada usuario y la lista de sedes viven en la caché (se invalidan con
+las señales de `gimnasio.signals`), así que resolver la sede de una petición no
+agrega consultas. Con una caché por proceso (LocMem), un cambio de sede del
+personal llega a los demás workers al vencer SEDES_CACHE_TTL.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import SEDE_PRINCIPAL, PerfilUsuario, Sede
+
+PREFIJO = 'sedes:'
+CLAVE_LISTA = f'{PREFIJO}lista'
+CLAVE_SESION = 'sede'
+# En caché: el usuario no tiene sede fija (None no se distingue de "no está en caché")
+SIN_SEDE = 0
+
+
+def _clave_usuario(usuario_id):
+    return f'{PREFIJO}usuario:{usuario_id}'
+
+
+def _ttl():
+    return getattr(settings, 'SEDES_CACHE_TTL', 300)
+
+
+def listar():
+    """Todas las sedes, ordenadas por nombre"""
+    sedes = cache.get(CLAVE_LISTA)
+    if sedes is None:
+        sedes = list(Sede.objects.all())
+        cache.set(CLAVE_LISTA, sedes, _ttl())
+    return sedes
+
+
+def ids(sede=None):
+    """Ids de las sedes que abarca `sede` (None = todas)"""
+    if sede is not None:
+        return [sede]
+    return [s.pk for s in listar()] or [SEDE_PRINCIPAL]
+
+
+def sede_fija(usuario):
+    """Id de la sede del personal, o None si el usuario puede ver todas"""
+    clave = _clave_usuario(usuario.pk)
+    sede = cache.get(clave)
+    if sede is None:
+        sede = PerfilUsuario.objects.filter(usuario=usuario).values_list('sede_id', flat=True).first() or SIN_SEDE
+        cache.set(clave, sede, _ttl())
+    return sede or None
+
+
+def sede_de(request):
+    """Id de la sede de la petición; None = todas las sedes"""
+    if not hasattr(request, '_sede'):
+        sede = None
+        if request.user.is_authenticated:
+            sede = sede_fija(request.user)
+            if sede is None:
+                sede = request.session.get(CLAVE_SESION)
+        request._sede = sede
+    return request._sede
+
+
+def sede_de_recepcion(request):
+    """
+    Sede del registro de entradas: la de la petición si tiene una, o SEDE_RECEPCION
+    (kiosco sin sesión). Nunca None: la entrada queda en la sede donde se registró.
+    """
+    return sede_de(request) or settings.SEDE_RECEPCION
+
+
+def puede_elegir(request):
+    return request.user.is_authenticated and sede_fija(request.user) is None
+
+
+def elegir(request, sede):
+    """Guarda en la sesión la sede elegida (None = todas); retorna False si no se permite"""
+    if not puede_elegir(request) or (sede is not None and sede not in ids()):
+        return False
+    if sede is None:
+        request.session.pop(CLAVE_SESION, None)
+    else:
+        request.session[CLAVE_SESION] = sede
+    request._sede = sede
+    return True
+
+
+def invalidar(*usuarios):
+    """Sin usuarios, la lista de sedes; con usuarios, la sede de cada uno"""
+    if usuarios:
+        cache.delete_many([_clave_usuario(usuario_id) for usuario_id in usuarios])
+    else:
+        cache.delete(CLAVE_LISTA)
+
+
+def contexto(request):
+    """Context processor: sede actual y, para quien puede elegir, la lista de sedes del menú"""
+    if not request.user.is_authenticated:
+        return {}
+    sede = sede_de(request)
+    sedes = listar()
+    return {
+        'sede_actual': next((s for s in sedes if s.pk == sede), None),
+        'sedes': sedes,
+        'puede_elegir_sede': puede_elegir(request),
+    }
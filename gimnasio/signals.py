@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache_dashboard, cache_entradas, sedes
+from .models import Cliente, Membresia, MetricaDiaria, Pago, PerfilUsuario, RegistroEntrada, Sede
+
+
+@receiver(pre_save, sender=Cliente)
+def recordar_contraseña_anterior(sender, instance, update_fields=None, **kwargs):
+    """
+    Guarda la contraseña previa para invalidarla si cambia (p. ej. al regenerarla)
+    y la sede previa para corregir las métricas de ambas sedes si el cliente se cambia
+    """
+    if not instance.pk or (update_fields is not None and not {'contraseña', 'sede'} & set(update_fields)):
+        return
+    instance._contraseña_anterior, instance._sede_anterior = (
+        Cliente.objects.filter(pk=instance.pk).values_list('contraseña', 'sede_id').first() or (None, None)
+    )
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def invalidar_cliente(sender, instance, **kwargs):
+    cache_entradas.invalidar(instance.contraseña, getattr(instance, '_contraseña_anterior', None))
+
+
+@receiver(post_save, sender=Membresia)
+@receiver(post_delete, sender=Membresia)
+def invalidar_membresia(sender, instance, **kwargs):
+    try:
+        cache_entradas.invalidar(instance.cliente.contraseña)
+    except Cliente.DoesNotExist:
+        # Borrado en cascada: el cliente ya no existe y su clave se invalidó antes
+        pass
+
+
+@receiver(post_save, sender=Pago)
+@receiver(post_delete, sender=Pago)
+def invalidar_pago(sender, instance, **kwargs):
+    try:
+        cache_entradas.invalidar(instance.membresia.cliente.contraseña)
+    except (Membresia.DoesNotExist, Cliente.DoesNotExist):
+        pass
+
+
+# Métricas diarias del dashboard (MetricaDiaria)
+# Sin post_delete para RegistroEntrada: así el borrado en cascada de entradas sigue
+# siendo un DELETE directo; `manage.py reconstruir_metricas` corrige esos días.
+
+@receiver(post_save, sender=RegistroEntrada)
+def sumar_entrada(sender, instance, created, **kwargs):
+    if created:
+        MetricaDiaria.objects.sumar(instance.sede_id, timezone.localdate(instance.fecha_entrada), entradas=1)
+
+
+def _sede_cambiada(cliente):
+    anterior = getattr(cliente, '_sede_anterior', None)
+    return anterior if anterior not in (None, cliente.sede_id) else None
+
+
+@receiver(post_save, sender=Cliente)
+def actualizar_metricas_cliente(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        MetricaDiaria.objects.sumar(
+            instance.sede_id, timezone.localdate(instance.fecha_registro), nuevos_clientes=1, total_clientes=1
+        )
+        return
+    anterior = _sede_cambiada(instance)
+    if anterior is not None:
+        # Sus membresías, pagos y entradas conservan la sede en que se registraron
+        for sede_id in (anterior, instance.sede_id):
+            MetricaDiaria.objects.refrescar(timezone.localdate(), sede_id, campos=['clientes'])
+    elif update_fields is None or 'activo' in update_fields:
+        MetricaDiaria.objects.actualizar_clientes_activos()
+
+
+@receiver(post_delete, sender=Cliente)
+def restar_cliente(sender, instance, **kwargs):
+    MetricaDiaria.objects.refrescar(timezone.localdate(), instance.sede_id, campos=['clientes'])
+
+
+@receiver(post_save, sender=Pago)
+def sumar_pago(sender, instance, created, **kwargs):
+    fecha = timezone.localdate(instance.fecha_pago)
+    if created:
+        MetricaDiaria.objects.sumar(instance.sede_id, fecha, **{f'ingresos_{instance.metodo}': instance.monto})
+    else:
+        MetricaDiaria.objects.refrescar(fecha, instance.sede_id, campos=['ingresos'])
+
+
+@receiver(post_delete, sender=Pago)
+def restar_pago(sender, instance, **kwargs):
+    MetricaDiaria.objects.refrescar(timezone.localdate(instance.fecha_pago), instance.sede_id, campos=['ingresos'])
+
+
+@receiver(post_save, sender=Membresia)
+@receiver(post_delete, sender=Membresia)
+def actualizar_metricas_membresia(sender, instance, signal, created=False, **kwargs):
+    # Solo cuentan las pagadas: dar de alta o borrar una sin pagar no cambia las métricas
+    if not instance.pagado and (created or signal is post_delete):
+        return
+    # Tras el commit, como la sincronización de `activo`: los dos COUNT y el UPDATE no
+    # alargan la transacción de escritura
+    sede_id = instance.sede_id
+    transaction.on_commit(
+        lambda: MetricaDiaria.objects.refrescar(timezone.localdate(), sede_id, campos=['membresias'])
+    )
+
+
+# Caché del dashboard: se registra al final para invalidar después de actualizar
+# MetricaDiaria, y tras el commit para que ninguna petición cachee datos previos
+
+def invalidar_dashboard(sender, instance, **kwargs):
+    bloques = cache_dashboard.bloques_de(sender)
+    sedes_afectadas = {instance.sede_id, _sede_cambiada(instance)} - {None}
+    transaction.on_commit(lambda: cache_dashboard.invalidar(*bloques, sedes=sedes_afectadas))
+
+
+for _modelo in (Cliente, Membresia, MetricaDiaria, Pago, RegistroEntrada):
+    post_save.connect(invalidar_dashboard, sender=_modelo, dispatch_uid=f'dashboard_{_modelo.__name__}')
+    post_delete.connect(invalidar_dashboard, sender=_modelo, dispatch_uid=f'dashboard_{_modelo.__name__}')
+
+
+# Sedes (gimnasio.sedes): lista de sedes y sede de cada usuario en caché
+
+@receiver(post_save, sender=Sede)
+@receiver(post_delete, sender=Sede)
+def invalidar_sedes(sender, **kwargs):
+    transaction.on_commit(sedes.invalidar)
+
+
+@receiver(post_save, sender=PerfilUsuario)
+@receiver(post_delete, sender=PerfilUsuario)
+def invalidar_sede_usuario(sender, instance, **kwargs):
+    transaction.on_commit(lambda: sedes.invalidar(instance.usuario_id))
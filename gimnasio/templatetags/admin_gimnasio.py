@@ -0,0 +1,81 @@
+"""
+date_hierarchy del admin sin SELECT DISTINCT sobre la tabla.
+
+El de Django lista los años, meses o días con datos truncando la fecha de cada
+fila del periodo mostrado (en SQLite, con una función de Python por fila). Aquí
+los periodos salen del MIN/MAX del periodo, que el índice de la columna resuelve
+sin recorrerla; a cambio también se listan los periodos intermedios sin datos.
+"""
+import datetime
+
+from django import template
+from django.db.models import Max, Min
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+register = template.Library()
+
+
+def _fecha_local(valor):
+    if isinstance(valor, datetime.datetime):
+        return (timezone.localtime(valor) if timezone.is_aware(valor) else valor).date()
+    return valor
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def jerarquia_fechas(cl):
+    campo = cl.date_hierarchy
+    año, mes, dia = (cl.params.get(f'{campo}__{parte}') for parte in ('year', 'month', 'day'))
+
+    def enlace(filtros):
+        return cl.get_query_string(filtros, [f'{campo}__'])
+
+    # cl.queryset ya está acotado al periodo elegido (ChangeList lo filtra por rango)
+    rango = cl.queryset.aggregate(primero=Min(campo), ultimo=Max(campo))
+    primero, ultimo = _fecha_local(rango['primero']), _fecha_local(rango['ultimo'])
+    if primero and not (año or mes or dia) and primero.year == ultimo.year:
+        # Como Django: si todo cae en un año (o mes) se empieza en ese nivel
+        año = primero.year
+        if primero.month == ultimo.month:
+            mes = primero.month
+
+    if año and mes and dia:
+        fecha = datetime.date(int(año), int(mes), int(dia))
+        return {
+            'show': True,
+            'back': {
+                'link': enlace({f'{campo}__year': año, f'{campo}__month': mes}),
+                'title': capfirst(formats.date_format(fecha, 'YEAR_MONTH_FORMAT')),
+            },
+            'choices': [{'title': capfirst(formats.date_format(fecha, 'MONTH_DAY_FORMAT'))}],
+        }
+
+    periodos = []
+    if año and mes:
+        atras = {'link': enlace({f'{campo}__year': año}), 'title': str(año)}
+        fecha = primero
+        while fecha and fecha <= ultimo:
+            periodos.append((
+                {f'{campo}__year': año, f'{campo}__month': mes, f'{campo}__day': fecha.day},
+                capfirst(formats.date_format(fecha, 'MONTH_DAY_FORMAT')),
+            ))
+            fecha += datetime.timedelta(days=1)
+    elif año:
+        atras = {'link': enlace({}), 'title': _('All dates')}
+        for numero in range(primero.month, ultimo.month + 1) if primero else ():
+            fecha = datetime.date(int(año), numero, 1)
+            periodos.append((
+                {f'{campo}__year': año, f'{campo}__month': numero},
+                capfirst(formats.date_format(fecha, 'YEAR_MONTH_FORMAT')),
+            ))
+    else:
+        atras = None
+        for numero in range(primero.year, ultimo.year + 1) if primero else ():
+            periodos.append(({f'{campo}__year': str(numero)}, str(numero)))
+
+    return {
+        'show': True,
+        'back': atras,
+        'choices': [{'link': enlace(filtros), 'title': titulo} for filtros, titulo in periodos],
+    }
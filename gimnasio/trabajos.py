@@ -0,0 +1,122 @@
+"""
+Ejecución de los trabajos de exportación en cola (TrabajoExportacion).
+
+La vista solo crea el trabajo; `atender_cola` lo toma, genera el archivo con las
+funciones de `gimnasio.exportacion` guardando el avance cada INTERVALO_PROGRESO
+filas y lo deja en MEDIA_ROOT para su descarga.
+
+La cola se atiende dentro de cada worker de gunicorn (hilo de fondo arrancado en
+gunicorn.conf.py con TRABAJOS_EN_WEB): el despliegue es un solo contenedor que
+corre solo el startCommand de railway.json, y el archivo debe quedar en el
+MEDIA_ROOT del proceso web que lo sirve. `manage.py procesar_trabajos` corre el
+mismo ciclo aparte (desarrollo con runserver, o un servicio que comparta
+MEDIA_ROOT con la web). Varios procesos pueden atender la cola a la vez.
+"""
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from . import exportacion, replica
+from .models import TrabajoExportacion
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_PROGRESO = 2000
+
+
+def _con_progreso(trabajo, filas):
+    procesadas = 0
+    for fila in filas:
+        yield fila
+        procesadas += 1
+        if procesadas % INTERVALO_PROGRESO == 0:
+            TrabajoExportacion.objects.filter(pk=trabajo.pk).update(procesadas=procesadas)
+
+
+def procesar(trabajo):
+    """Genera el archivo del trabajo; los errores quedan registrados en el propio trabajo"""
+    try:
+        # Lecturas de los datos exportados en la réplica, si hay; el avance se escribe en la primaria
+        with replica.en_replica():
+            filtro = (trabajo.datos, trabajo.fecha_inicio, trabajo.fecha_fin, trabajo.sede_id)
+            total = exportacion.filtrar(*filtro).count()
+            TrabajoExportacion.objects.filter(pk=trabajo.pk).update(total=total)
+            filas = _con_progreso(trabajo, exportacion.filas(*filtro))
+
+            with tempfile.TemporaryFile() as archivo:
+                exportacion.escribir(trabajo.datos, trabajo.formato, filas, archivo)
+                archivo.seek(0)
+                trabajo.archivo.save(trabajo.nombre_archivo, File(archivo), save=False)
+
+            trabajo.estado = 'terminado'
+            trabajo.total = trabajo.procesadas = total
+            trabajo.terminado = timezone.now()
+            trabajo.save(update_fields=['archivo', 'estado', 'total', 'procesadas', 'terminado'])
+    except Exception as error:
+        logger.exception('Falló el trabajo de exportación %s', trabajo.pk)
+        TrabajoExportacion.objects.filter(pk=trabajo.pk).update(
+            estado='error', error=str(error), terminado=timezone.now()
+        )
+
+
+def _ejecutar(trabajo):
+    try:
+        procesar(trabajo)
+    finally:
+        # Cada hilo abre su propia conexión; se cierra al terminar el trabajo
+        connection.close()
+
+
+def atender_cola(hilos=1, intervalo=2.0, abandono=None, una_vez=False, avisar=logger.info):
+    """
+    Toma los trabajos pendientes y los procesa en un pool de `hilos`. Los trabajos en
+    proceso desde hace más de `abandono` segundos (TRABAJOS_ABANDONO por defecto)
+    vuelven a la cola. Con `una_vez` termina cuando no queda nada pendiente.
+    """
+    if abandono is None:
+        abandono = settings.TRABAJOS_ABANDONO
+    hilos = max(hilos, 1)
+    en_curso = set()
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='trabajos') as pool:
+        while True:
+            close_old_connections()
+            en_curso = {futuro for futuro in en_curso if not futuro.done()}
+            # Solo los de procesos caídos: los que otro proceso vivo atiende son más recientes
+            reclamados = TrabajoExportacion.objects.reclamar_abandonados(abandono)
+            if reclamados:
+                avisar(f'{reclamados} trabajos abandonados devueltos a la cola')
+            while len(en_curso) < hilos:
+                trabajo = TrabajoExportacion.objects.tomar_siguiente()
+                if trabajo is None:
+                    break
+                avisar(f'Procesando {trabajo} #{trabajo.pk}')
+                en_curso.add(pool.submit(_ejecutar, trabajo))
+
+            if una_vez and not en_curso:
+                break
+            time.sleep(intervalo if not en_curso else 0.5)
+
+
+def _atender_sin_fin():
+    while True:
+        try:
+            atender_cola(settings.TRABAJOS_HILOS)
+        except Exception:
+            # p. ej. la base de datos no responde: se reintenta sin tumbar al worker web
+            logger.exception('Falló la cola de exportaciones; se reintenta')
+            connection.close()
+            time.sleep(10)
+
+
+def iniciar_en_segundo_plano():
+    """Atiende la cola en un hilo de fondo del proceso actual (un worker web)"""
+    hilo = threading.Thread(target=_atender_sin_fin, name='cola-exportaciones', daemon=True)
+    hilo.start()
+    return hilo
@@ -1,18 +1,29 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
 
+# Con SERVIDOR=asgi el dashboard, el registro de entradas y las consultas de estado son async
+if settings.SERVIDOR == 'asgi':
+    from . import views_async as vistas_concurridas
+else:
+    vistas_concurridas = views
+
 urlpatterns = [
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', vistas_concurridas.dashboard, name='dashboard'),
     
     # Autenticación
     path('login/', auth_views.LoginView.as_view(template_name='gimnasio/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
+    path('sede/', views.elegir_sede, name='elegir_sede'),
 
     # Clientes
     path('clientes/', views.lista_clientes, name='lista_clientes'),
+    path('clientes/datos/', views.clientes_datos, name='clientes_datos'),
+    path('clientes/buscar/', views.buscar_clientes, name='buscar_clientes'),
     path('clientes/nuevo/', views.nuevo_cliente, name='nuevo_cliente'),
+    path('clientes/importar/', views.importar_clientes, name='importar_clientes'),
     path('clientes/<int:pk>/', views.detalle_cliente, name='detalle_cliente'),
     path('clientes/<int:pk>/editar/', views.editar_cliente, name='editar_cliente'),
     path('clientes/<int:pk>/regenerar-contraseña/', views.regenerar_contraseña, name='regenerar_contraseña'), 
@@ -24,11 +35,18 @@ urlpatterns = [
     # Pagos
     path('pagos/nuevo/', views.nuevo_pago, name='nuevo_pago'),
     path('pagos/nuevo/<int:membresia_pk>/', views.nuevo_pago, name='nuevo_pago_membresia'),
+    path('pagos/membresias/buscar/', views.buscar_membresias, name='buscar_membresias'),
     
     # Registro de entradas
-    path('entradas/', views.registro_entrada, name='registro_entrada'),
+    path('entradas/', vistas_concurridas.registro_entrada, name='registro_entrada'),
     path('entradas/historial/', views.historial_entradas, name='historial_entradas'),
+    path('entradas/historial/exportar/', views.exportar_entradas, name='exportar_entradas'),
+    path('entradas/cache/', vistas_concurridas.estadisticas_cache_entradas, name='estadisticas_cache_entradas'),
     
     # Exportar
+    path('exportar/', views.exportar, name='exportar'),
     path('exportar/clientes/', views.exportar_clientes, name='exportar_clientes'),
+    path('exportar/trabajos/', views.trabajos_exportacion, name='trabajos_exportacion'),
+    path('exportar/trabajos/<int:pk>/', vistas_concurridas.estado_trabajo, name='estado_trabajo'),
+    path('exportar/trabajos/<int:pk>/descargar/', views.descargar_trabajo, name='descargar_trabajo'),
 ]
\ No newline at end of file
@@ -1,81 +1,142 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Exists, OuterRef
-from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Sum
+from django.core.paginator import Paginator
+from django.db import close_old_connections
+from django.urls import reverse
+from django.contrib.auth.decorators import login_required, permission_required
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from datetime import datetime, timedelta
-import pandas as pd
+from decimal import Decimal
+from functools import partial
+from itertools import chain
+import csv
+import json
 
-from .models import Cliente, Membresia, Pago, RegistroEntrada
-from .forms import ClienteForm, MembresiaForm, PagoForm, RegistroEntradaForm
+from . import autocompletar, cache_dashboard, cache_entradas, consultas, exportacion, importacion, sedes
+from .fechas import parse_fecha
+from .paginacion import pagina_keyset
+from .replica import usar_replica
+from .models import (
+    Cliente, Membresia, MetricaDiaria, RegistroEntrada, TrabajoExportacion,
+    recalcular_activo_al_confirmar,
+)
+from .forms import (
+    ClienteForm, FiltroEntradasForm, ImportacionClientesForm, MembresiaForm, PagoForm, RegistroEntradaForm,
+)
+
+ENTRADAS_POR_PAGINA = 50
+CLIENTES_POR_PAGINA = 25
+DIAS_TENDENCIA = 7
+ERRORES_IMPORTACION_MOSTRADOS = 200
+
+# Índice de columna de DataTables -> campo de Cliente
+COLUMNAS_DATATABLES = {0: 'nombre', 1: 'telefono', 2: 'email', 3: 'fecha_registro', 6: 'activo'}
 
 # Vistas de clientes
+def _entero(valor, defecto):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+def _con_estado(ids):
+    """Estado de membresía calculado solo para los clientes indicados, conservando su orden"""
+    ids = list(ids)
+    clientes = {cliente.pk: cliente for cliente in consultas.estado_clientes(ids)}
+    return [clientes[pk] for pk in ids if pk in clientes]
+
+@login_required
+def buscar_clientes(request):
+    """Autocompletado de clientes (JSON para Select2): primero por prefijo, luego por contenido"""
+    clientes, hay_mas = autocompletar.buscar(
+        Cliente.objects.de_sede(sedes.sede_de(request)).only('nombre', 'apellidos', 'email'),
+        request.GET.get('q', ''),
+        _entero(request.GET.get('page'), 1),
+        orden=('nombre', 'apellidos', 'pk'),
+    )
+    return JsonResponse(autocompletar.respuesta_json(clientes, hay_mas, autocompletar.etiqueta_cliente))
+
 @login_required
+@usar_replica
 def lista_clientes(request):
-    # Opcional: actualizar todos los clientes al cargar la lista
-    for cliente in Cliente.objects.all():
-        cliente.actualizar_estado_activo()
-    
-    clientes = Cliente.objects.all().order_by('-fecha_registro')
-    
-    # Marcar en la lista quiénes tienen membresía activa y su fecha de vencimiento
-    for cliente in clientes:
-        # Obtener membresía activa si existe
-        membresia_activa = cliente.get_membresia_activa()
-        cliente.tiene_membresia_activa = membresia_activa is not None
-        
-        if membresia_activa:
-            # Si tiene membresía activa, mostrar su fecha de vencimiento
-            cliente.fecha_vencimiento = membresia_activa.fecha_fin
-            cliente.dias_restantes = membresia_activa.dias_restantes
-            cliente.tipo_membresia = membresia_activa.get_tipo_display()
-            cliente.es_activa = True
-        else:
-            # Si no tiene membresía activa, buscar la última membresía (aunque esté vencida)
-            ultima_membresia = cliente.membresias.filter(pagado=True).order_by('-fecha_fin').first()
-            if ultima_membresia:
-                cliente.fecha_vencimiento = ultima_membresia.fecha_fin
-                cliente.tipo_membresia = ultima_membresia.get_tipo_display()
-                cliente.dias_restantes = 0
-                cliente.es_activa = False
-                
-                # Calcular días desde que venció
-                hoy = timezone.now().date()
-                if ultima_membresia.fecha_fin < hoy:
-                    cliente.dias_vencida = (hoy - ultima_membresia.fecha_fin).days
-            else:
-                cliente.fecha_vencimiento = None
-                cliente.tipo_membresia = None
-                cliente.es_activa = False
-                cliente.dias_vencida = None
-    
-    return render(request, 'gimnasio/clientes/lista.html', {'clientes': clientes})
+    # El campo activo lo mantiene `manage.py reconciliar_activos`; esta vista solo lee
+    busqueda = request.GET.get('q', '').strip()
+    orden = request.GET.get('orden', '-fecha_registro')
+    
+    # Paginación en la base de datos; el estado de membresía solo para la página actual
+    ids = consultas.buscar_clientes(busqueda, orden, sedes.sede_de(request)).values_list('pk', flat=True)
+    clientes = Paginator(ids, CLIENTES_POR_PAGINA).get_page(request.GET.get('page'))
+    clientes.object_list = _con_estado(clientes.object_list)
+    
+    filtros = request.GET.copy()
+    filtros.pop('page', None)
+    
+    return render(request, 'gimnasio/clientes/lista.html', {
+        'clientes': clientes,
+        'busqueda': busqueda,
+        'filtros': filtros.urlencode(),
+    })
+
+@login_required
+@usar_replica
+def clientes_datos(request):
+    """Procesamiento del lado del servidor para la tabla DataTables de clientes"""
+    inicio = max(_entero(request.GET.get('start'), 0), 0)
+    cantidad = min(max(_entero(request.GET.get('length'), CLIENTES_POR_PAGINA), 1), 100)
+    busqueda = request.GET.get('search[value]', '').strip()
+    
+    campo = COLUMNAS_DATATABLES.get(_entero(request.GET.get('order[0][column]'), None), 'fecha_registro')
+    orden = f'-{campo}' if request.GET.get('order[0][dir]') == 'desc' else campo
+    
+    sede = sedes.sede_de(request)
+    total = Cliente.objects.de_sede(sede).count()
+    clientes = consultas.buscar_clientes(busqueda, orden, sede)
+    filtrados = clientes.count() if busqueda else total
+    pagina = _con_estado(clientes.values_list('pk', flat=True)[inicio:inicio + cantidad])
+    
+    data = [{
+        'nombre': f'{cliente.nombre} {cliente.apellidos}',
+        'telefono': cliente.telefono,
+        'email': cliente.email,
+        'fecha_registro': timezone.localtime(cliente.fecha_registro).strftime('%d/%m/%Y'),
+        'tipo_membresia': cliente.tipo_membresia,
+        'es_activa': cliente.es_activa,
+        'fecha_vencimiento': cliente.fecha_vencimiento.strftime('%d/%m/%Y') if cliente.fecha_vencimiento else None,
+        'dias_restantes': cliente.dias_restantes,
+        'dias_vencida': cliente.dias_vencida,
+        'activo': cliente.activo,
+        'url_detalle': reverse('detalle_cliente', args=[cliente.pk]),
+        'url_editar': reverse('editar_cliente', args=[cliente.pk]),
+        'url_membresia': reverse('nueva_membresia_cliente', args=[cliente.pk]),
+    } for cliente in pagina]
+    
+    return JsonResponse({
+        'draw': _entero(request.GET.get('draw'), 0),
+        'recordsTotal': total,
+        'recordsFiltered': filtrados,
+        'data': data,
+    })
 
 @login_required
 def detalle_cliente(request, pk):
-    cliente = get_object_or_404(Cliente, pk=pk)
-    
-    # Verificar y actualizar el estado del cliente basado en sus membresías
-    estado_anterior = cliente.activo
-    cliente.actualizar_estado_activo()
-    
-    # Si cambió el estado, mostrar un mensaje
-    if estado_anterior != cliente.activo:
-        if cliente.activo:
-            messages.info(request, f'✨ El cliente {cliente.nombre} ha sido reactivado automáticamente (tiene membresía activa)')
-        else:
-            messages.warning(request, f'⚠️ El cliente {cliente.nombre} ha sido desactivado automáticamente (su membresía expiró)')
+    cliente = get_object_or_404(Cliente.objects.de_sede(sedes.sede_de(request)).con_estado_membresia(), pk=pk)
     
     # 👇 IMPORTANTE: Verificar si se debe mostrar la contraseña
     mostrar_contraseña = request.GET.get('mostrar_contraseña') == '1'
     
-    membresias = cliente.membresias.all().order_by('-fecha_inicio')
-    entradas = cliente.entradas.all()[:10]  # Últimas 10 entradas
+    membresias = consultas.membresias_de_cliente(cliente)
+    entradas = consultas.entradas_de_cliente(cliente)
     
     # Pasar today al template para los cálculos de fechas
-    today = timezone.now().date()
+    today = timezone.localdate()
     
     return render(request, 'gimnasio/clientes/detalle.html', {
         'cliente': cliente,
@@ -87,30 +148,61 @@ def detalle_cliente(request, pk):
 
 @login_required
 def nuevo_cliente(request):
+    sede = sedes.sede_de(request)
     if request.method == 'POST':
-        form = ClienteForm(request.POST)
+        form = ClienteForm(request.POST, sede=sede)
         if form.is_valid():
             form.save()
             return redirect('lista_clientes')
     else:
-        form = ClienteForm()
+        form = ClienteForm(sede=sede)
     
     return render(request, 'gimnasio/clientes/form.html', {
         'form': form,
         'accion': 'Nuevo'
     })
 
+@login_required
+@permission_required('gimnasio.add_cliente', raise_exception=True)
+def importar_clientes(request):
+    """Alta masiva de clientes y membresías desde Excel/CSV (ver gimnasio.importacion)"""
+    resultado = None
+    sede = sedes.sede_de(request)
+    if request.method == 'POST':
+        form = ImportacionClientesForm(request.POST, request.FILES, sede=sede)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            resultado = importacion.importar_archivo(
+                archivo.file, archivo.name, simular=form.cleaned_data['simular'],
+                sede=form.cleaned_data['sede'].pk,
+            )
+            if not form.cleaned_data['simular']:
+                messages.success(
+                    request,
+                    f'{resultado.clientes} clientes y {resultado.membresias} membresías importados'
+                )
+    else:
+        form = ImportacionClientesForm(sede=sede)
+    
+    return render(request, 'gimnasio/clientes/importar.html', {
+        'form': form,
+        'resultado': resultado,
+        'errores': resultado.errores[:ERRORES_IMPORTACION_MOSTRADOS] if resultado else [],
+        'columnas': importacion.COLUMNAS,
+    })
+
 @login_required
 def editar_cliente(request, pk):
-    cliente = get_object_or_404(Cliente, pk=pk)
+    sede = sedes.sede_de(request)
+    cliente = get_object_or_404(Cliente.objects.de_sede(sede), pk=pk)
     if request.method == 'POST':
-        form = ClienteForm(request.POST, instance=cliente)
+        form = ClienteForm(request.POST, instance=cliente, sede=sede)
         if form.is_valid():
             form.save()
             messages.success(request, 'Cliente actualizado exitosamente')
             return redirect('detalle_cliente', pk=cliente.pk)
     else:
-        form = ClienteForm(instance=cliente)
+        form = ClienteForm(instance=cliente, sede=sede)
     
     return render(request, 'gimnasio/clientes/form.html', {'form': form, 'accion': 'Editar'})
 
@@ -118,28 +210,31 @@ def editar_cliente(request, pk):
 @login_required
 def nueva_membresia(request, cliente_pk=None):
     cliente = None
+    sede = sedes.sede_de(request)
     if cliente_pk:
-        cliente = get_object_or_404(Cliente, pk=cliente_pk)
+        cliente = get_object_or_404(Cliente.objects.de_sede(sede), pk=cliente_pk)
     
     if request.method == 'POST':
-        form = MembresiaForm(request.POST)
+        form = MembresiaForm(request.POST, sede=sede)
         if form.is_valid():
-            membresia = form.save()
+            with recalcular_activo_al_confirmar():
+                membresia = form.save()
             messages.success(request, 'Membresía registrada exitosamente')
             return redirect('detalle_cliente', pk=membresia.cliente.pk)
     else:
         initial = {}
         if cliente:
             initial['cliente'] = cliente
-        form = MembresiaForm(initial=initial)
+        form = MembresiaForm(initial=initial, sede=sede)
     
     return render(request, 'gimnasio/membresias/form.html', {'form': form, 'accion': 'Nueva'})
 
 
+@login_required
 def regenerar_contraseña(request, pk):
     """Vista para regenerar la contraseña de un cliente"""
     if request.method == 'POST':
-        cliente = get_object_or_404(Cliente, pk=pk)
+        cliente = get_object_or_404(Cliente.objects.de_sede(sedes.sede_de(request)), pk=pk)
         nueva_contraseña = cliente.generar_contraseña()
         cliente.save(update_fields=['contraseña'])
         
@@ -150,20 +245,36 @@ def regenerar_contraseña(request, pk):
     return redirect('detalle_cliente', pk=pk)
 
 # Vistas de pagos
+@login_required
+def buscar_membresias(request):
+    """Autocompletado de membresías por datos del cliente; primero las pendientes de pago y las más recientes"""
+    membresias, hay_mas = autocompletar.buscar(
+        Membresia.objects.de_sede(sedes.sede_de(request)).select_related('cliente'),
+        request.GET.get('q', ''),
+        _entero(request.GET.get('page'), 1),
+        prefijo='cliente__',
+        orden=('pagado', '-fecha_inicio', '-pk'),
+    )
+    return JsonResponse(autocompletar.respuesta_json(membresias, hay_mas, autocompletar.etiqueta_membresia))
+
 @login_required
 def nuevo_pago(request, membresia_pk=None):
     membresia = None
+    sede = sedes.sede_de(request)
     if membresia_pk:
-        membresia = get_object_or_404(Membresia, pk=membresia_pk)
+        membresia = get_object_or_404(Membresia.objects.de_sede(sede), pk=membresia_pk)
     
     if request.method == 'POST':
-        form = PagoForm(request.POST, request.FILES)
+        form = PagoForm(request.POST, request.FILES, sede=sede)
         if form.is_valid():
-            pago = form.save()
-            # Marcar membresía como pagada
-            membresia = pago.membresia
-            membresia.pagado = True
-            membresia.save()
+            # Pago y membresía en una transacción; `activo` se sincroniza una vez al confirmar
+            with recalcular_activo_al_confirmar():
+                pago = form.save()
+                # Marcar membresía como pagada
+                membresia = pago.membresia
+                if not membresia.pagado:
+                    membresia.pagado = True
+                    membresia.save(update_fields=['pagado'])
             
             messages.success(request, 'Pago registrado exitosamente')
             return redirect('detalle_cliente', pk=membresia.cliente.pk)
@@ -172,14 +283,78 @@ def nuevo_pago(request, membresia_pk=None):
         if membresia:
             initial['membresia'] = membresia
             initial['monto'] = membresia.costo
-        form = PagoForm(initial=initial)
+        form = PagoForm(initial=initial, sede=sede)
     
     return render(request, 'gimnasio/pagos/form.html', {'form': form, 'accion': 'Nuevo'})
 
 # Vistas de registro de entrada
+def _entrada_registrada(request, acceso, hoy):
+    """Mensaje y datos de la tarjeta de un cliente con membresía activa cuya entrada se registró"""
+    dias_restantes = (acceso['fecha_fin'] - hoy).days
+    messages.success(
+        request, 
+        f'✅ Entrada registrada para {acceso["nombre"]} {acceso["apellidos"]}<br>'
+        f'📅 Membresía vigente por {dias_restantes} días más '
+        f'(vence: {acceso["fecha_fin"].strftime("%d/%m/%Y")})'
+    )
+    
+    return {
+        'nombre': f'{acceso["nombre"]} {acceso["apellidos"]}',
+        'tipo_membresia': acceso['tipo_membresia'],
+        'fecha_inicio': acceso['fecha_inicio'],
+        'fecha_fin': acceso['fecha_fin'],
+        'dias_restantes': dias_restantes,
+        'tiene_membresia_activa': True,
+        'cliente_id': acceso['cliente_id']
+    }
+
+
+def _entrada_rechazada(request, cliente, ultima_membresia):
+    """Mensaje y datos de la tarjeta de un cliente sin membresía activa (no se registra la entrada)"""
+    cliente_info = {
+        'nombre': f'{cliente.nombre} {cliente.apellidos}',
+        'tiene_membresia_activa': False,
+        'cliente_id': cliente.id,
+        'email': cliente.email,
+        'telefono': cliente.telefono
+    }
+    
+    if ultima_membresia:
+        hoy = timezone.localdate()
+        cliente_info['ultima_membresia'] = ultima_membresia
+        cliente_info['tipo_membresia'] = ultima_membresia.get_tipo_display()
+        cliente_info['fecha_fin'] = ultima_membresia.fecha_fin
+        
+        if not ultima_membresia.pagado:
+            cliente_info['motivo'] = 'membresía pendiente de pago'
+            cliente_info['membresia_pendiente'] = ultima_membresia
+        elif ultima_membresia.fecha_fin < hoy:
+            cliente_info['motivo'] = 'membresía vencida'
+            cliente_info['dias_vencida'] = (hoy - ultima_membresia.fecha_fin).days
+    else:
+        cliente_info['motivo'] = 'sin membresía registrada'
+    
+    # Mensaje de advertencia
+    messages.warning(
+        request,
+        f'⚠️ {cliente.nombre} {cliente.apellidos} no tiene una membresía activa.<br>'
+        f'Motivo: {cliente_info["motivo"]}'
+    )
+    return cliente_info
+
+
+def _cliente_no_encontrado(request, contraseña):
+    messages.error(request, f'❌ No se encontró ningún cliente con la contraseña "{contraseña}"')
+
+
+def _contraseña_vacia(request):
+    messages.warning(request, '⚠️ Por favor ingrese una contraseña')
+
+
 def registro_entrada(request):
     cliente_info = None
     contraseña_buscada = None
+    sede = sedes.sede_de_recepcion(request)
     
     if request.method == 'POST':
         contraseña = request.POST.get('contraseña', '').strip()
@@ -187,212 +362,310 @@ def registro_entrada(request):
         
         if contraseña:
             try:
-                # Buscar cliente por contraseña
-                cliente = Cliente.objects.get(contraseña=contraseña)
-                
-                # Actualizar estado del cliente
-                estado_anterior = cliente.activo
-                cliente.actualizar_estado_activo()
+                # Ruta rápida: primero la caché de credenciales, luego una sola consulta
+                hoy = timezone.localdate()
+                acceso = cache_entradas.obtener_acceso(contraseña, hoy)
+                if acceso is None:
+                    membresia_activa = consultas.membresia_activa(contraseña, hoy).first()
+                    if membresia_activa:
+                        acceso = cache_entradas.guardar_acceso(contraseña, membresia_activa)
                 
-                # Verificar membresía activa
-                membresia_activa = cliente.get_membresia_activa()
-                
-                if membresia_activa:
+                if acceso:
                     # Cliente con membresía activa - REGISTRAR ENTRADA
-                    if not estado_anterior and cliente.activo:
-                        messages.info(request, f'✨ {cliente.nombre} ha sido reactivado automáticamente')
-                    
-                    dias_restantes = membresia_activa.dias_restantes
-                    
-                    # Registrar la entrada
-                    entrada = RegistroEntrada.objects.create(cliente=cliente)
-                    
-                    messages.success(
-                        request, 
-                        f'✅ Entrada registrada para {cliente.nombre} {cliente.apellidos}<br>'
-                        f'📅 Membresía vigente por {dias_restantes} días más '
-                        f'(vence: {membresia_activa.fecha_fin.strftime("%d/%m/%Y")})'
-                    )
-                    
-                    cliente_info = {
-                        'nombre': f'{cliente.nombre} {cliente.apellidos}',
-                        'tipo_membresia': membresia_activa.get_tipo_display(),
-                        'fecha_inicio': membresia_activa.fecha_inicio,
-                        'fecha_fin': membresia_activa.fecha_fin,
-                        'dias_restantes': dias_restantes,
-                        'tiene_membresia_activa': True,
-                        'cliente_id': cliente.id
-                    }
+                    # Las membresías valen en todas las sedes; la entrada queda en la de recepción
+                    RegistroEntrada.objects.create(cliente_id=acceso['cliente_id'], sede_id=sede)
+                    cliente_info = _entrada_registrada(request, acceso, hoy)
                 else:
                     # Cliente sin membresía activa - NO REGISTRAR ENTRADA
-                    if cliente.activo:
-                        cliente.activo = False
-                        cliente.save(update_fields=['activo'])
-                        messages.warning(
-                            request,
-                            f'⚠️ {cliente.nombre} {cliente.apellidos} ha sido desactivado automáticamente (sin membresía activa)'
-                        )
-                    
-                    # Buscar información de membresías anteriores
-                    ultima_membresia = Membresia.objects.filter(
-                        cliente=cliente
-                    ).order_by('-fecha_fin').first()
-                    
-                    # Preparar información detallada del cliente inactivo
-                    cliente_info = {
-                        'nombre': f'{cliente.nombre} {cliente.apellidos}',
-                        'tiene_membresia_activa': False,
-                        'cliente_id': cliente.id,
-                        'email': cliente.email,
-                        'telefono': cliente.telefono
-                    }
-                    
-                    if ultima_membresia:
-                        cliente_info['ultima_membresia'] = ultima_membresia
-                        cliente_info['tipo_membresia'] = ultima_membresia.get_tipo_display()
-                        cliente_info['fecha_fin'] = ultima_membresia.fecha_fin
-                        
-                        if not ultima_membresia.pagado:
-                            cliente_info['motivo'] = 'membresía pendiente de pago'
-                            cliente_info['membresia_pendiente'] = ultima_membresia
-                        elif ultima_membresia.fecha_fin < timezone.now().date():
-                            cliente_info['motivo'] = 'membresía vencida'
-                            cliente_info['dias_vencida'] = (timezone.now().date() - ultima_membresia.fecha_fin).days
-                    else:
-                        cliente_info['motivo'] = 'sin membresía registrada'
-                    
-                    # Mensaje de advertencia
-                    messages.warning(
-                        request,
-                        f'⚠️ {cliente.nombre} {cliente.apellidos} no tiene una membresía activa.<br>'
-                        f'Motivo: {cliente_info["motivo"]}'
-                    )
+                    cliente = consultas.cliente_por_contraseña(contraseña).get()
+                    ultima_membresia = consultas.ultima_membresia(cliente).first()
+                    cliente_info = _entrada_rechazada(request, cliente, ultima_membresia)
             
             except Cliente.DoesNotExist:
-                messages.error(request, f'❌ No se encontró ningún cliente con la contraseña "{contraseña}"')
+                _cliente_no_encontrado(request, contraseña)
         else:
-            messages.warning(request, '⚠️ Por favor ingrese una contraseña')
-    
-    # Obtener últimos registros
-    ultimos_registros = RegistroEntrada.objects.all().select_related('cliente')[:10]
-    
-    for registro in ultimos_registros:
-        membresia_en_momento = Membresia.objects.filter(
-            cliente=registro.cliente,
-            fecha_inicio__lte=registro.fecha_entrada.date(),
-            fecha_fin__gte=registro.fecha_entrada.date(),
-            pagado=True
-        ).first()
-        
-        registro.membresia_activa = membresia_en_momento is not None
+            _contraseña_vacia(request)
     
     return render(request, 'gimnasio/registro_entrada.html', {
-        'ultimos_registros': ultimos_registros,
+        'ultimos_registros': consultas.ultimos_registros(sede),
         'cliente_info': cliente_info,
         'contraseña_buscada': contraseña_buscada
     })
 
 @login_required
+def estadisticas_cache_entradas(request):
+    """Aciertos y fallos de la caché de credenciales del registro de entradas"""
+    return JsonResponse(cache_entradas.estadisticas())
+
+def _filtros_entradas(request):
+    """Filtros de sede, fecha y cliente del historial de entradas, para consultas.filtrar_entradas"""
+    cliente_id = request.GET.get('cliente', '')
+    return {
+        'sede': sedes.sede_de(request),
+        'desde': parse_fecha(request.GET.get('fecha_inicio')),
+        'hasta': parse_fecha(request.GET.get('fecha_fin')),
+        'cliente_id': int(cliente_id) if cliente_id.isdigit() else None,
+    }
+
+@login_required
+@usar_replica
 def historial_entradas(request):
-    entradas = RegistroEntrada.objects.all()
+    entradas = consultas.historial_entradas(**_filtros_entradas(request))
     
-    # Filtros
-    fecha_inicio = request.GET.get('fecha_inicio')
-    fecha_fin = request.GET.get('fecha_fin')
-    cliente_id = request.GET.get('cliente')
+    # Paginación por cursor sobre (fecha_entrada, id): mismo costo en cualquier página
+    entradas, siguiente_cursor = pagina_keyset(
+        entradas, 'fecha_entrada', request.GET.get('cursor'), ENTRADAS_POR_PAGINA
+    )
     
-    if fecha_inicio:
-        entradas = entradas.filter(fecha_entrada__date__gte=fecha_inicio)
-    if fecha_fin:
-        entradas = entradas.filter(fecha_entrada__date__lte=fecha_fin)
-    if cliente_id:
-        entradas = entradas.filter(cliente_id=cliente_id)
+    filtros = request.GET.copy()
+    filtros.pop('cursor', None)
     
     return render(request, 'gimnasio/historial_entradas.html', {
         'entradas': entradas,
-        'clientes': Cliente.objects.filter(activo=True)
+        'siguiente_cursor': siguiente_cursor,
+        'es_primera_pagina': not request.GET.get('cursor'),
+        'filtros': filtros.urlencode(),
+        # Solo el cliente filtrado; los demás se buscan con autocompletado
+        'filtro': FiltroEntradasForm(
+            initial={'cliente': request.GET.get('cliente') or None}, sede=sedes.sede_de(request)
+        ),
     })
 
-# Dashboard / Reportes
 @login_required
-def dashboard(request):
-    hoy = timezone.now().date()
-    
-    # Estadísticas generales
-    total_clientes = Cliente.objects.count()
-    clientes_activos = Cliente.objects.filter(activo=True).count()
-    
-    # Membresías activas hoy
-    membresias_activas = Membresia.objects.filter(
-        fecha_inicio__lte=hoy,
-        fecha_fin__gte=hoy,
-        pagado=True
-    ).count()
-    
-    # Ingresos del mes
-    ingresos_mes = Pago.objects.filter(
-        fecha_pago__month=hoy.month,
-        fecha_pago__year=hoy.year
-    ).aggregate(total=Sum('monto'))['total'] or 0
-    
-    # Entradas hoy
-    entradas_hoy = RegistroEntrada.objects.filter(
-        fecha_entrada__date=hoy
-    ).count()
-    
-    # Próximas membresías a vencer (próximos 7 días)
-    proximas_vencer = Membresia.objects.filter(
-        fecha_fin__gte=hoy,
-        fecha_fin__lte=hoy + timedelta(days=7),
-        pagado=True
-    ).select_related('cliente')
-    
-    # 🟢 CORREGIDO: Solo membresías vencidas de clientes SIN membresía activa
-    from django.db.models import Exists, OuterRef
+@usar_replica
+def exportar_entradas(request):
+    """Descarga en streaming (CSV o JSON) de las entradas filtradas del historial"""
+    formato = request.GET.get('formato', 'csv')
+    filas = consultas.filtrar_entradas(**_filtros_entradas(request)).order_by('-fecha_entrada', '-pk').values_list(
+        'fecha_entrada', 'cliente_id', 'cliente__nombre', 'cliente__apellidos', 'cliente__email'
+    ).iterator(chunk_size=2000)
+    
+    if formato == 'json':
+        response = StreamingHttpResponse(_entradas_json(filas), content_type='application/json')
+        response['Content-Disposition'] = 'attachment; filename="entradas.json"'
+    else:
+        escritor = csv.writer(exportacion.EcoCSV())
+        encabezado = ['fecha_entrada', 'cliente_id', 'nombre', 'apellidos', 'email']
+        contenido = (escritor.writerow(fila) for fila in chain([encabezado], filas))
+        response = StreamingHttpResponse(contenido, content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="entradas.csv"'
+    return response
+
+def _entradas_json(filas):
+    campos = ('fecha_entrada', 'cliente_id', 'nombre', 'apellidos', 'email')
+    yield '['
+    for i, fila in enumerate(filas):
+        yield (',' if i else '') + json.dumps(dict(zip(campos, fila)), cls=DjangoJSONEncoder)
+    yield ']'
 
-    clientes_con_membresia_activa = Membresia.objects.filter(
-    cliente=OuterRef('cliente'),
-    fecha_fin__gte=hoy,
-    pagado=True
+# Dashboard / Reportes
+# Hilos para calcular a la vez los bloques de cada sede del dashboard consolidado;
+# con DASHBOARD_HILOS=1 no hay pool y se calculan en serie en el hilo de la petición
+_HILOS_DASHBOARD = getattr(settings, 'DASHBOARD_HILOS', 4)
+_hilos_dashboard = (
+    ThreadPoolExecutor(max_workers=_HILOS_DASHBOARD, thread_name_prefix='dashboard')
+    if _HILOS_DASHBOARD > 1 else None
 )
 
-    membresias_vencidas = Membresia.objects.filter(
-        fecha_fin__lt=hoy,
-        fecha_fin__gte=hoy - timedelta(days=360),
-        pagado=True
-    ).exclude(
-        Exists(clientes_con_membresia_activa)
-    ).select_related('cliente').order_by('-fecha_fin')
-
-    # Calcular días de vencimiento para cada una
-    for membresia in membresias_vencidas:
-        membresia.dias_vencida = (hoy - membresia.fecha_fin).days
-    
-    context = {
-        'total_clientes': total_clientes,
-        'clientes_activos': clientes_activos,
-        'membresias_activas': membresias_activas,
-        'ingresos_mes': ingresos_mes,
-        'entradas_hoy': entradas_hoy,
-        'proximas_vencer': proximas_vencer,
-        'membresias_vencidas': membresias_vencidas,
+
+def _metricas_dashboard(sede):
+    """Métricas del día y tendencia de la sede desde el resumen diario (una sola consulta)"""
+    hoy_local = timezone.localdate()
+    inicio_mes = hoy_local.replace(day=1)
+    desde = min(inicio_mes, hoy_local - timedelta(days=DIAS_TENDENCIA - 1))
+    metricas = list(consultas.metricas_de_sede(sede, desde, hoy_local))
+    if not metricas or metricas[-1].fecha != hoy_local:
+        # Primera visita del día: se calcula la fila de hoy desde las tablas transaccionales
+        metricas.append(MetricaDiaria.objects.refrescar(hoy_local, sede))
+    metrica_hoy = metricas[-1]
+    
+    return {
+        'total_clientes': metrica_hoy.total_clientes,
+        'clientes_activos': metrica_hoy.clientes_activos,
+        'membresias_activas': metrica_hoy.membresias_activas,
+        'entradas_hoy': metrica_hoy.entradas,
+        'ingresos_mes': sum((m.ingresos_total for m in metricas if m.fecha >= inicio_mes), Decimal('0')),
+        'tendencia': [m for m in metricas if m.fecha > hoy_local - timedelta(days=DIAS_TENDENCIA)],
     }
-    
-    return render(request, 'gimnasio/dashboard.html', context)
 
-# Exportar datos
-@login_required
-def exportar_clientes(request):
-    clientes = Cliente.objects.all().values(
-        'nombre', 'apellidos', 'telefono', 'email', 
-        'fecha_registro', 'activo'
+
+def _proximas_vencer(sede):
+    return list(consultas.proximas_vencer(sede, timezone.localdate()))
+
+
+def _membresias_vencidas(sede):
+    return list(consultas.membresias_vencidas(sede, timezone.localdate()))
+
+
+BLOQUES_DASHBOARD = {
+    'metricas': _metricas_dashboard,
+    'proximas_vencer': _proximas_vencer,
+    'membresias_vencidas': _membresias_vencidas,
+}
+
+
+def _combinar_metricas(valores):
+    """Suma las métricas de varias sedes; la tendencia, día por día"""
+    tendencia = {}
+    for valor in valores:
+        for metrica in valor['tendencia']:
+            total = tendencia.setdefault(metrica.fecha, MetricaDiaria(fecha=metrica.fecha))
+            for campo in MetricaDiaria.CAMPOS_SUMABLES:
+                setattr(total, campo, getattr(total, campo) + getattr(metrica, campo))
+    activos = [valor['clientes_activos'] for valor in valores if valor['clientes_activos'] is not None]
+    return {
+        'total_clientes': sum(valor['total_clientes'] for valor in valores),
+        'clientes_activos': sum(activos) if activos else None,
+        'membresias_activas': sum(valor['membresias_activas'] for valor in valores),
+        'entradas_hoy': sum(valor['entradas_hoy'] for valor in valores),
+        'ingresos_mes': sum((valor['ingresos_mes'] for valor in valores), Decimal('0')),
+        'tendencia': [tendencia[fecha] for fecha in sorted(tendencia)],
+    }
+
+
+COMBINAR_BLOQUES = {
+    'metricas': _combinar_metricas,
+    'proximas_vencer': lambda valores: sorted(chain(*valores), key=lambda m: m.fecha_fin),
+    'membresias_vencidas': lambda valores: sorted(chain(*valores), key=lambda m: m.fecha_fin, reverse=True),
+}
+
+
+def _obtener_bloque(bloque, sede):
+    return cache_dashboard.obtener(bloque, partial(BLOQUES_DASHBOARD[bloque], sede), sede)
+
+
+def _obtener_bloque_en_hilo(bloque, sede):
+    try:
+        return _obtener_bloque(bloque, sede)
+    finally:
+        # El hilo no recibe request_finished: cierra o conserva su conexión según CONN_MAX_AGE
+        close_old_connections()
+
+
+def _pares_dashboard(ids_sedes):
+    return [(bloque, sede) for sede in ids_sedes for bloque in BLOQUES_DASHBOARD]
+
+
+def _pares_de(request):
+    """(bloque, sede) del dashboard de la petición; la lista de sedes puede consultar la base"""
+    return _pares_dashboard(sedes.ids(sedes.sede_de(request)))
+
+
+def _calcular_bloques(pares, hilos=None):
+    """(valor, calculado, acierto) de cada (bloque, sede); varias sedes, a la vez en `hilos`"""
+    hilos = hilos or _hilos_dashboard
+    if hilos is None or len(pares) == len(BLOQUES_DASHBOARD):
+        return [_obtener_bloque(bloque, sede) for bloque, sede in pares]
+    # Cada hilo con su conexión y con el contexto de la petición (la réplica)
+    futuros = [
+        hilos.submit(copy_context().run, _obtener_bloque_en_hilo, bloque, sede)
+        for bloque, sede in pares
+    ]
+    return [futuro.result() for futuro in futuros]
+
+
+def _combinar_dashboard(pares, resultados):
+    """{bloque: (valor, calculado, acierto)} a partir de los resultados de cada (bloque, sede)"""
+    por_bloque = defaultdict(list)
+    for (bloque, _), resultado in zip(pares, resultados):
+        por_bloque[bloque].append(resultado)
+    combinados = {}
+    for bloque, lista in por_bloque.items():
+        valores, calculados, aciertos = zip(*lista)
+        valor = valores[0] if len(valores) == 1 else COMBINAR_BLOQUES[bloque](valores)
+        combinados[bloque] = (valor, min(calculados), all(aciertos))
+    return combinados
+
+
+def _contexto_dashboard(resultados):
+    """Contexto y cabecera X-Dashboard-Cache a partir de {bloque: (valor, calculado, acierto)}"""
+    context = {}
+    calculados = {}
+    for bloque, (valor, calculados[bloque], _) in resultados.items():
+        if bloque == 'metricas':
+            context.update(valor)
+        else:
+            context[bloque] = valor
+    context['calculado_en'] = calculados
+    context['calculado_mas_antiguo'] = min(calculados.values())
+    cabecera = ', '.join(
+        f'{bloque}={"hit" if acierto else "miss"}' for bloque, (_, _, acierto) in resultados.items()
     )
-    df = pd.DataFrame(list(clientes))
-    
-    response = HttpResponse(content_type='application/vnd.ms-excel')
-    response['Content-Disposition'] = 'attachment; filename="clientes.xlsx"'
-    
-    with pd.ExcelWriter(response, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Clientes', index=False)
-    
+    return context, cabecera
+
+
+@login_required
+@usar_replica
+def dashboard(request):
+    # Cada bloque de cada sede sale de la caché por separado (ver gimnasio.cache_dashboard)
+    pares = _pares_de(request)
+    context, cabecera = _contexto_dashboard(_combinar_dashboard(pares, _calcular_bloques(pares)))
+    response = render(request, 'gimnasio/dashboard.html', context)
+    response['X-Dashboard-Cache'] = cabecera
     return response
+
+
+@login_required
+@require_POST
+def elegir_sede(request):
+    """Sede con la que trabaja quien puede ver todas; vacío = todas"""
+    sede = _entero(request.POST.get('sede'), None)
+    if not sedes.elegir(request, sede):
+        messages.error(request, 'No puedes cambiar de sede')
+    siguiente = request.POST.get('next', '')
+    if not url_has_allowed_host_and_scheme(siguiente, {request.get_host()}, request.is_secure()):
+        siguiente = reverse('dashboard')
+    return redirect(siguiente)
+
+# Exportar datos (en cola: el archivo lo genera `gimnasio.trabajos`)
+# POST: crea un trabajo en la cola; un GET (prefetch, rastreador, enlace externo) no debe encolar nada
+@login_required
+@require_POST
+def exportar(request, datos=None):
+    """Encola la exportación de clientes, membresías, pagos o entradas con filtro de fechas"""
+    datos = datos or request.POST.get('datos', 'clientes')
+    if datos not in exportacion.EXPORTACIONES:
+        raise Http404('Exportación no disponible')
+    
+    trabajo = TrabajoExportacion.objects.create(
+        usuario=request.user,
+        sede_id=sedes.sede_de(request),
+        datos=datos,
+        formato='csv' if request.POST.get('formato') == 'csv' else 'xlsx',
+        fecha_inicio=parse_fecha(request.POST.get('fecha_inicio')),
+        fecha_fin=parse_fecha(request.POST.get('fecha_fin')),
+    )
+    messages.success(request, f'{trabajo} en cola. Podrás descargarla aquí cuando termine.')
+    return redirect('trabajos_exportacion')
+
+@login_required
+@require_POST
+def exportar_clientes(request):
+    return exportar(request, 'clientes')
+
+@login_required
+def trabajos_exportacion(request):
+    trabajos = TrabajoExportacion.objects.filter(usuario=request.user)[:20]
+    return render(request, 'gimnasio/trabajos_exportacion.html', {
+        'trabajos': trabajos,
+        'en_proceso': any(t.estado in ('pendiente', 'procesando') for t in trabajos),
+    })
+
+def _estado_trabajo_json(trabajo):
+    return JsonResponse({
+        'estado': trabajo.estado,
+        'progreso': trabajo.progreso,
+        'procesadas': trabajo.procesadas,
+        'total': trabajo.total,
+        'error': trabajo.error,
+        'descarga': reverse('descargar_trabajo', args=[trabajo.pk]) if trabajo.estado == 'terminado' else None,
+    })
+
+@login_required
+def estado_trabajo(request, pk):
+    return _estado_trabajo_json(get_object_or_404(TrabajoExportacion, pk=pk, usuario=request.user))
+
+@login_required
+def descargar_trabajo(request, pk):
+    trabajo = get_object_or_404(TrabajoExportacion, pk=pk, usuario=request.user, estado='terminado')
+    return FileResponse(trabajo.archivo.open('rb'), as_attachment=True, filename=trabajo.nombre_archivo)
@@ -0,0 +1,110 @@
+"""
+Versiones async de las vistas más concurridas para el modo ASGI (SERVIDOR=asgi).
+
+`gimnasio/urls.py` las usa en lugar de las de `views` cuando el proyecto corre
+con workers de uvicorn: mientras una petición espera a la base de datos el
+worker atiende otras. Comparten con `views` los textos y el armado del contexto;
+solo cambia cómo se consulta la base de datos:
+
+- registro de entradas y estado de trabajos: ORM async (afirst, acreate, aget).
+- dashboard: los bloques (de cada sede, en el consolidado) son independientes y
+  se calculan a la vez con asyncio.gather, cada uno en un hilo propio con su
+  conexión. El ORM async de Django 4.2 ejecuta todas las consultas de una
+  petición en un mismo hilo, así que con él no correrían en paralelo.
+
+El render de plantillas va en sync_to_async porque los context processors
+pueden consultar la base de datos (usuario y sesión).
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from . import cache_entradas, consultas, sedes
+from .models import Cliente, RegistroEntrada, TrabajoExportacion
+from .replica import usar_replica
+from .views import (
+    _cliente_no_encontrado, _combinar_dashboard, _contexto_dashboard, _contraseña_vacia, _entrada_rechazada,
+    _entrada_registrada, _estado_trabajo_json, _obtener_bloque_en_hilo, _pares_de,
+)
+
+_render = sync_to_async(render)
+
+
+def login_requerido(vista):
+    """login_required para vistas async (el de Django 4.2 solo sabe envolver vistas síncronas)"""
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await vista(request, *args, **kwargs)
+    return envoltura
+
+
+async def registro_entrada(request):
+    cliente_info = None
+    contraseña_buscada = None
+    sede = await sync_to_async(sedes.sede_de_recepcion)(request)
+
+    if request.method == 'POST':
+        contraseña = request.POST.get('contraseña', '').strip()
+        contraseña_buscada = contraseña
+
+        if contraseña:
+            try:
+                hoy = timezone.localdate()
+                acceso = await sync_to_async(cache_entradas.obtener_acceso)(contraseña, hoy)
+                if acceso is None:
+                    membresia_activa = await consultas.membresia_activa(contraseña, hoy).afirst()
+                    if membresia_activa:
+                        acceso = await sync_to_async(cache_entradas.guardar_acceso)(contraseña, membresia_activa)
+
+                if acceso:
+                    await RegistroEntrada.objects.acreate(cliente_id=acceso['cliente_id'], sede_id=sede)
+                    cliente_info = _entrada_registrada(request, acceso, hoy)
+                else:
+                    cliente = await consultas.cliente_por_contraseña(contraseña).aget()
+                    ultima_membresia = await consultas.ultima_membresia(cliente).afirst()
+                    cliente_info = _entrada_rechazada(request, cliente, ultima_membresia)
+
+            except Cliente.DoesNotExist:
+                _cliente_no_encontrado(request, contraseña)
+        else:
+            _contraseña_vacia(request)
+
+    return await _render(request, 'gimnasio/registro_entrada.html', {
+        'ultimos_registros': consultas.ultimos_registros(sede),
+        'cliente_info': cliente_info,
+        'contraseña_buscada': contraseña_buscada
+    })
+
+
+@login_requerido
+@usar_replica
+async def dashboard(request):
+    pares = await sync_to_async(_pares_de)(request)
+    resultados = await asyncio.gather(*(
+        sync_to_async(_obtener_bloque_en_hilo, thread_sensitive=False)(bloque, sede)
+        for bloque, sede in pares
+    ))
+    context, cabecera = _contexto_dashboard(_combinar_dashboard(pares, resultados))
+    response = await _render(request, 'gimnasio/dashboard.html', context)
+    response['X-Dashboard-Cache'] = cabecera
+    return response
+
+
+@login_requerido
+async def estadisticas_cache_entradas(request):
+    return JsonResponse(await sync_to_async(cache_entradas.estadisticas)())
+
+
+@login_requerido
+async def estado_trabajo(request, pk):
+    trabajo = await TrabajoExportacion.objects.filter(pk=pk, usuario_id=request.user.pk).afirst()
+    if trabajo is None:
+        raise Http404('Trabajo no encontrado')
+    return _estado_trabajo_json(trabajo)
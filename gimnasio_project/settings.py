@@ -56,6 +56,8 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # =============================================================================
 MIDDLEWARE = [
+    # Primero para medir la petición completa; sin INSTRUMENTACION=True se retira solo
+    'gimnasio.instrumentacion.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -64,8 +66,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Lectura de la primaria tras escribir; sin DATABASE_REPLICA_URL se retira solo
+    'gimnasio.replica.ReplicaMiddleware',
 ]
 
+# Métricas por vista (consultas, SQL, plantillas, Server-Timing): manage.py reporte_rendimiento
+INSTRUMENTACION = config('INSTRUMENTACION', default=False, cast=bool)
+INSTRUMENTACION_DIRECTORIO = config('INSTRUMENTACION_DIRECTORIO', default=str(BASE_DIR / 'rendimiento'))
+# Segundos entre volcados de las estadísticas de cada proceso
+INSTRUMENTACION_VOLCADO = config('INSTRUMENTACION_VOLCADO', default=10, cast=int)
+
 # =============================================================================
 # URLS
 # =============================================================================
@@ -85,35 +95,143 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                # Sede actual y menú de sedes (gimnasio/sedes.py)
+                'gimnasio.sedes.contexto',
             ],
         },
     },
 ]
 
 # =============================================================================
-# WSGI
+# WSGI / ASGI
 # =============================================================================
 WSGI_APPLICATION = 'gimnasio_project.wsgi.application'
+ASGI_APPLICATION = 'gimnasio_project.asgi.application'
+# 'wsgi' (workers síncronos) o 'asgi' (uvicorn + vistas async de gimnasio/views_async.py); ver gunicorn.conf.py
+SERVIDOR = config('SERVIDOR', default='wsgi')
 
 # =============================================================================
 # BASE DE DATOS - MEJORADO PARA RAILWAY
 # =============================================================================
+# Conexiones persistentes (segundos) y verificación al reutilizarlas en una nueva petición
+# Con ASGI cada petición usa un hilo nuevo y una conexión persistente quedaría huérfana: 0 (o el pool)
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0 if SERVIDOR == 'asgi' else 600, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+# Pool de conexiones por proceso para PostgreSQL (0 = sin pool): gimnasio/backends/postgresql.
+# Desactivado por defecto: activarlo solo después de que `manage.py verificar_pool` pase
+# contra la base PostgreSQL de DATABASE_URL
+DB_POOL_MAX = config('DB_POOL_MAX', default=0, cast=int)
+DB_POOL_ESPERA = config('DB_POOL_ESPERA', default=10, cast=int)
+
+# Réplica de solo lectura (opcional) para reportes y listas: gimnasio/replica.py
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+DATABASE_REPLICA_SSL = config('DATABASE_REPLICA_SSL', default=True, cast=bool)
+# Segundos que un navegador lee de la primaria después de escribir (leer lo propio)
+REPLICA_ADHERENCIA = config('REPLICA_ADHERENCIA', default=10, cast=int)
+
+
+def _con_pool(base_de_datos):
+    if DB_POOL_MAX and base_de_datos['ENGINE'] == 'django.db.backends.postgresql':
+        base_de_datos.update({
+            'ENGINE': 'gimnasio.backends.postgresql',
+            # La conexión vuelve al pool al terminar cada petición
+            'CONN_MAX_AGE': 0,
+            'POOL': {'maximo': DB_POOL_MAX, 'espera': DB_POOL_ESPERA, 'vida': DB_CONN_MAX_AGE or 600},
+        })
+    return base_de_datos
+
+
 if 'DATABASE_URL' in os.environ:
     DATABASES = {
-        'default': dj_database_url.config(
+        'default': _con_pool(dj_database_url.config(
             default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
             ssl_require=True  # Importante para Railway
-        )
+        ))
     }
 else:
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            # busy_timeout, WAL y BEGIN IMMEDIATE: gimnasio/backends/sqlite3
+            'ENGINE': 'gimnasio.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'PRAGMAS': {'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int)},
+            # WAL convierte el archivo para siempre: solo donde se pide (p. ej. el servidor
+            # con varios workers); el db.sqlite3 del repositorio queda como está
+            'WAL': config('SQLITE_WAL', default=False, cast=bool),
+            'TRANSACCION_INMEDIATA': config('SQLITE_TRANSACCION_INMEDIATA', default=True, cast=bool),
         }
     }
 
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = _con_pool(dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        ssl_require=DATABASE_REPLICA_SSL and DATABASE_REPLICA_URL.startswith('postgres'),
+    ))
+    if DATABASES['replica']['ENGINE'] == 'django.db.backends.sqlite3':
+        # Solo lecturas: sin BEGIN IMMEDIATE
+        DATABASES['replica'].update({'ENGINE': 'gimnasio.backends.sqlite3', 'TRANSACCION_INMEDIATA': False})
+    # En pruebas la réplica es la misma base de datos que la primaria
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['gimnasio.replica.EnrutadorReplica']
+
+# =============================================================================
+# CACHÉ
+# =============================================================================
+# LocMem por defecto; se puede cambiar (p. ej. Redis o Memcached) por variables de entorno
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='gimnasio'),
+    }
+}
+
+# LocMem (y Dummy) es de cada proceso: lo que invalida una señal en un worker de gunicorn
+# o en un comando de manage.py no llega a la caché de los demás workers
+CACHE_COMPARTIDA = not CACHES['default']['BACKEND'].endswith(('.LocMemCache', '.DummyCache'))
+
+# Vigencia máxima (segundos) de la caché de credenciales de entrada; nunca pasa de medianoche.
+# Sin caché compartida es lo que otro worker puede seguir dejando entrar a un cliente cuya
+# membresía se canceló o borró, por eso es corta; con Redis o Memcached las señales
+# invalidan en todos y puede ser larga.
+ENTRADAS_CACHE_TTL = config('ENTRADAS_CACHE_TTL', default=3600 if CACHE_COMPARTIDA else 60, cast=int)
+
+# Cifras de las contraseñas de entrada nuevas (par; crece de dos en dos al agotarse)
+CREDENCIAL_DIGITOS = config('CREDENCIAL_DIGITOS', default=6, cast=int)
+
+# Vigencia (segundos) de cada bloque del dashboard si ninguna señal lo invalida antes
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=60, cast=int)
+# Hilos que calculan a la vez las sedes del dashboard consolidado. Ayudan cuando las
+# consultas esperan a la red (PostgreSQL); con SQLite el trabajo es todo de Python y
+# en serie (1) es más rápido. `manage.py verificar_sedes` mide ambos casos.
+DASHBOARD_HILOS = config(
+    'DASHBOARD_HILOS', default=1 if DATABASES['default']['ENGINE'].endswith('sqlite3') else 4, cast=int
+)
+
+# Cola de exportaciones (gimnasio/trabajos.py). Railway corre solo el startCommand
+# (gunicorn), así que cada worker web la atiende en un hilo de fondo y el archivo queda
+# en el MEDIA_ROOT del contenedor que lo sirve. Con TRABAJOS_EN_WEB=False hay que correr
+# `manage.py procesar_trabajos` en un proceso que comparta MEDIA_ROOT con la web.
+TRABAJOS_EN_WEB = config('TRABAJOS_EN_WEB', default=True, cast=bool)
+# Exportaciones a la vez en cada worker web
+TRABAJOS_HILOS = config('TRABAJOS_HILOS', default=1, cast=int)
+# Segundos en proceso tras los que un trabajo de exportación se da por abandonado (su
+# proceso murió o se reinició) y vuelve a la cola; debe superar la exportación más larga
+TRABAJOS_ABANDONO = config('TRABAJOS_ABANDONO', default=3600, cast=int)
+
+# Vigencia en caché de la lista de sedes y de la sede de cada usuario (gimnasio/sedes.py)
+SEDES_CACHE_TTL = config('SEDES_CACHE_TTL', default=300, cast=int)
+
+# Sede del kiosco de registro de entradas cuando se usa sin sesión (o con la de alguien
+# sin sede fija): ahí quedan las entradas y de ahí es la lista de últimos registros.
+# Por defecto la sede principal (migración 0010); un kiosco por sede se configura con
+# esta variable o iniciando en él la sesión de personal de esa sede.
+SEDE_RECEPCION = config('SEDE_RECEPCION', default=1, cast=int)
+
 # =============================================================================
 # VALIDACIÓN DE CONTRASEÑAS
 # =============================================================================
@@ -255,10 +373,19 @@ LOGGING = {
             'level': 'DEBUG' if DEBUG else 'INFO',
             'propagate': False,
         },
+        # Diagnóstico detallado de membresías (hace consultas extra): LOG_TRAZAS=DEBUG
+        'gimnasio.trazas': {
+            'handlers': ['console'],
+            'level': config('LOG_TRAZAS', default='WARNING'),
+            'propagate': False,
+        },
         'django': {
             'handlers': ['console'],
             'level': 'INFO',
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
+
+# Fracción (0 a 1) de llamadas que registran el diagnóstico detallado cuando LOG_TRAZAS=DEBUG
+TRAZAS_MUESTREO = config('TRAZAS_MUESTREO', default=1.0, cast=float)
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Configuración de gunicorn (se carga sola desde el directorio del proyecto).
+
+SERVIDOR=wsgi: workers síncronos, una petición a la vez por worker.
+SERVIDOR=asgi: workers de uvicorn con gimnasio_project.asgi; las vistas de
+gimnasio/views_async.py atienden otras peticiones mientras esperan a la base de
+datos. El número de workers sale de WEB_CONCURRENCY (por defecto 1) y el puerto
+de PORT, como antes.
+"""
+# Sin `from decouple import config`: gunicorn leería `config` como uno de sus ajustes
+import decouple
+
+if decouple.config('SERVIDOR', default='wsgi') == 'asgi':
+    wsgi_app = 'gimnasio_project.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'gimnasio_project.wsgi:application'
+
+
+def post_worker_init(worker):
+    """
+    Hilos de fondo de cada worker: filas del día de MetricaDiaria (gimnasio/metricas.py)
+    y cola de exportaciones (gimnasio/trabajos.py)
+    """
+    from django.conf import settings
+
+    from gimnasio import metricas
+    metricas.iniciar_en_segundo_plano()
+    if settings.TRABAJOS_EN_WEB:
+        from gimnasio import trabajos
+        trabajos.iniciar_en_segundo_plano()
@@ -0,0 +1,29 @@
+// Select2 con búsqueda en el servidor para los <select data-autocompletar="url">
+// (widget SelectAutocompletar de gimnasio/autocompletar.py)
+$(function () {
+    $('select[data-autocompletar]').each(function () {
+        const $select = $(this);
+        $select.select2({
+            theme: 'bootstrap-5',
+            width: '100%',
+            placeholder: $select.data('placeholder'),
+            allowClear: !$select.prop('required'),
+            minimumInputLength: 1,
+            language: {
+                inputTooShort: function () { return 'Escriba al menos un carácter'; },
+                noResults: function () { return 'Sin resultados'; },
+                searching: function () { return 'Buscando...'; },
+                loadingMore: function () { return 'Cargando más resultados...'; },
+                errorLoading: function () { return 'No se pudieron cargar los resultados'; }
+            },
+            ajax: {
+                url: $select.data('autocompletar'),
+                dataType: 'json',
+                delay: 250,
+                data: function (params) {
+                    return {q: params.term, page: params.page || 1};
+                }
+            }
+        });
+    });
+});